@@ -0,0 +1,457 @@
+"""
+Benchmark every conversion in FORMAT_MAP on synthetic inputs.
+
+Inputs are generated once per size into the work directory, each conversion
+runs through convert_file in a fresh interpreter, and wall time, peak RSS
+and output size are written to a JSON results file:
+
+    python benchmark.py run --sizes small medium --output results.json
+    python benchmark.py run --only csv pdf --repeat 5
+    python benchmark.py compare baseline.json results.json --threshold 0.1
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import importlib.metadata
+
+# Input sizes that are benchmarked unless --sizes is given
+DEFAULT_SIZES = ('small', 'medium')
+
+# Image inputs as (width, height); several resolutions per size
+IMAGE_SIZES = {
+    'small': [(320, 240), (640, 480)],
+    'medium': [(1280, 720), (1920, 1080)],
+    'huge': [(4000, 3000), (6000, 4000)],
+}
+
+# Pages in generated PDFs
+PDF_PAGES = {
+    'small': 2,
+    'medium': 25,
+    'huge': 200,
+}
+
+# Generated DOCX files as (paragraphs, tables, rows per table)
+DOCX_SHAPES = {
+    'small': (10, 1, 5),
+    'medium': (300, 5, 50),
+    'huge': (3000, 20, 200),
+}
+
+# Lines in generated text files
+TEXT_LINES = {
+    'small': 50,
+    'medium': 5000,
+    'huge': 100000,
+}
+
+# Tabular inputs as (label, rows, columns): long files and wide files
+TABLE_SHAPES = {
+    'small': [('long', 1000, 8), ('wide', 100, 100)],
+    'medium': [('long', 100000, 12), ('wide', 2000, 400)],
+    'huge': [('long', 1000000, 12), ('wide', 20000, 1000)],
+}
+
+# Seed for the generated inputs, so every run converts identical files
+SEED = 1234
+
+# Libraries whose versions are recorded with the results
+TRACKED_PACKAGES = ('pandas', 'numpy', 'pillow', 'pymupdf', 'PyPDF2', 'python-docx',
+                    'reportlab', 'pyarrow', 'python-calamine', 'xlsxwriter', 'openpyxl')
+
+# Relative slowdown that counts as a regression when comparing results
+DEFAULT_THRESHOLD = 0.10
+
+# Differences smaller than this (in seconds) are treated as noise
+MIN_TIME_DELTA = 0.005
+
+# Vocabulary for generated text, table and document content
+WORDS = ('invoice', 'total', 'quarter', 'revenue', 'north', 'south', 'delta', 'report',
+         'account', 'balance', 'forecast', 'margin', 'budget', 'region', 'summary')
+
+def _sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+def make_image(path, width, height):
+    """Write a noisy gradient image, which compresses like a photograph."""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(SEED)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    noise = rng.normal(0, 12, (height, width)).astype(np.float32)
+    pixels[..., 0] = np.clip(x + noise, 0, 255)
+    pixels[..., 1] = np.clip(y + noise, 0, 255)
+    pixels[..., 2] = np.clip((x + y) / 2 - noise, 0, 255)
+
+    img = Image.fromarray(pixels, 'RGB')
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.gif':
+        img = img.convert('P', palette=Image.ADAPTIVE)
+    img.save(path)
+
+def make_pdf(path, pages):
+    """Write a PDF with a page of text and a drawing on every page."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    rng = random.Random(SEED)
+    width, height = letter
+    c = canvas.Canvas(path, pagesize=letter)
+    for page in range(pages):
+        c.setFont('Helvetica-Bold', 16)
+        c.drawString(72, height - 72, f"Page {page + 1}")
+        c.setFont('Helvetica', 10)
+        y = height - 100
+        while y > 200:
+            c.drawString(72, y, _sentence(rng))
+            y -= 14
+        for i in range(8):
+            c.setFillColorRGB(rng.random(), rng.random(), rng.random())
+            c.rect(72 + i * 56, 72, 48, rng.randint(20, 110), fill=1)
+        c.setFillColorRGB(0, 0, 0)
+        c.showPage()
+    c.save()
+
+def make_docx(path, paragraphs, tables, rows):
+    """Write a DOCX file with headings, paragraphs and tables."""
+    from docx import Document
+
+    rng = random.Random(SEED)
+    doc = Document()
+    per_table = max(1, paragraphs // max(1, tables))
+    for i in range(paragraphs):
+        if i % per_table == 0:
+            doc.add_heading(_sentence(rng, 4), level=1)
+            if i // per_table < tables:
+                table = doc.add_table(rows=rows, cols=4)
+                for row in table.rows:
+                    for cell in row.cells:
+                        cell.text = rng.choice(WORDS)
+        doc.add_paragraph(' '.join(_sentence(rng) for _ in range(4)))
+    doc.save(path)
+
+def make_text(path, lines):
+    """Write a plain text file of sentences."""
+    rng = random.Random(SEED)
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(lines):
+            f.write(_sentence(rng) + '\n')
+
+def make_table(path, rows, columns):
+    """Write a table of mixed integer, float, text, date and boolean columns."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(SEED)
+    data = {}
+    for i in range(columns):
+        kind = i % 5
+        if kind == 0:
+            data[f'id_{i}'] = np.arange(rows, dtype=np.int64) * (i + 1)
+        elif kind == 1:
+            data[f'amount_{i}'] = np.round(rng.normal(1000, 250, rows), 2)
+        elif kind == 2:
+            data[f'name_{i}'] = np.array(WORDS, dtype=object)[rng.integers(0, len(WORDS), rows)]
+        elif kind == 3:
+            days = rng.integers(0, 3650, rows)
+            data[f'date_{i}'] = (np.datetime64('2015-01-01') + days).astype(str)
+        else:
+            data[f'flag_{i}'] = rng.random(rows) < 0.5
+    df = pd.DataFrame(data)
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        df.to_csv(path, index=False)
+    elif ext == '.xlsx':
+        df.to_excel(path, index=False)
+    elif ext == '.json':
+        df.to_json(path, orient='records')
+    elif ext == '.parquet':
+        df.to_parquet(path, index=False)
+    elif ext == '.feather':
+        df.to_feather(path)
+    else:
+        raise ValueError(f"Unsupported table format: {ext}")
+
+def input_specs(source_ext, size):
+    """
+    List the synthetic inputs for a source format and size.
+
+    Returns:
+        list: (label, generator function, generator arguments) tuples
+    """
+    if source_ext in ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.gif'):
+        return [(f'{w}x{h}', make_image, (w, h)) for w, h in IMAGE_SIZES[size]]
+    if source_ext == '.pdf':
+        return [(f'{PDF_PAGES[size]}p', make_pdf, (PDF_PAGES[size],))]
+    if source_ext == '.docx':
+        return [(f'{DOCX_SHAPES[size][0]}para', make_docx, DOCX_SHAPES[size])]
+    if source_ext == '.txt':
+        return [(f'{TEXT_LINES[size]}lines', make_text, (TEXT_LINES[size],))]
+    return [(f'{label}{rows}x{columns}', make_table, (rows, columns))
+            for label, rows, columns in TABLE_SHAPES[size]]
+
+def build_cases(sizes, only=None):
+    """List (source_ext, target_format, size, label, generator, args) for every benchmark."""
+    from converters import FORMAT_MAP, get_available_formats
+
+    only = {ext.lower().lstrip('.') for ext in only} if only else None
+    cases = []
+    for source_ext in FORMAT_MAP:
+        if only and source_ext.lstrip('.') not in only:
+            continue
+        for target_format in get_available_formats(source_ext):
+            for size in sizes:
+                for label, generator, args in input_specs(source_ext, size):
+                    cases.append((source_ext, target_format, size, label, generator, args))
+    return cases
+
+def ensure_input(work_dir, source_ext, size, label, generator, args):
+    """Generate an input file unless it is already in the work directory."""
+    path = os.path.join(work_dir, 'inputs', f'{size}_{label}{source_ext}')
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = path + '.partial' + source_ext
+        generator(partial, *args)
+        os.replace(partial, path)
+    return path
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+def run_one(source_path, target_path):
+    """
+    Convert one file in this process and report the measurements.
+
+    Called in a fresh interpreter for every run, so imports, caches and
+    memory high-water marks from other conversions do not leak in.
+    """
+    import logging
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from converters import convert_file
+    from conversion_metrics import peak_rss
+    logging.getLogger("FileConverter").setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    success = convert_file(source_path, target_path, lambda progress: None)
+    wall_time = time.perf_counter() - start
+
+    return {
+        'success': bool(success),
+        'wall_time': wall_time,
+        'peak_rss': peak_rss(include_children=True),
+        'output_size': _dir_size(os.path.dirname(target_path)),
+    }
+
+def run_case(work_dir, source_path, target_format, name, repeat, timeout):
+    """Run one conversion repeat times in fresh interpreters and summarize the runs."""
+    runs = []
+    error = None
+    for _ in range(repeat):
+        output_dir = os.path.join(work_dir, 'outputs', name)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir)
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        target_path = os.path.join(output_dir, f'{stem}.{target_format}')
+        try:
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), 'run-one', source_path, target_path],
+                cwd=work_dir, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            error = f"Timed out after {timeout}s"
+            break
+        if proc.returncode != 0:
+            error = (proc.stderr.strip().splitlines() or ['Benchmark process failed'])[-1]
+            break
+        run = json.loads(proc.stdout.strip().splitlines()[-1])
+        if not run['success']:
+            error = "Conversion failed"
+            break
+        runs.append(run)
+    shutil.rmtree(os.path.join(work_dir, 'outputs', name), ignore_errors=True)
+
+    if error:
+        return {'success': False, 'error': error}
+    times = [run['wall_time'] for run in runs]
+    return {
+        'success': True,
+        'wall_time': statistics.median(times),
+        'wall_time_min': min(times),
+        'wall_time_max': max(times),
+        'peak_rss': max(run['peak_rss'] for run in runs),
+        'output_size': runs[-1]['output_size'],
+    }
+
+def environment_info():
+    """Describe the machine and library versions the results were measured with."""
+    versions = {}
+    for package in TRACKED_PACKAGES:
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            continue
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'packages': versions,
+    }
+
+def run_benchmarks(work_dir, sizes, only=None, repeat=3, timeout=None):
+    """
+    Benchmark every conversion pair for the given input sizes.
+
+    Args:
+        work_dir: Directory for generated inputs and temporary outputs
+        sizes: Input sizes to benchmark ('small', 'medium', 'huge')
+        only: Source formats to restrict the run to, e.g. ['csv', 'pdf']
+        repeat: Fresh-process runs per conversion; the median time is kept
+        timeout: Seconds before a single run is abandoned
+
+    Returns:
+        dict: Results document with environment info and one entry per case
+    """
+    work_dir = os.path.abspath(work_dir)
+    os.makedirs(work_dir, exist_ok=True)
+    results = []
+    cases = build_cases(sizes, only)
+    started = time.time()
+
+    for i, (source_ext, target_format, size, label, generator, args) in enumerate(cases, 1):
+        name = f"{source_ext.lstrip('.')}->{target_format}/{size}/{label}"
+        source_path = ensure_input(work_dir, source_ext, size, label, generator, args)
+        result = run_case(work_dir, source_path, target_format,
+                          name.replace('/', '_').replace('>', ''), repeat, timeout)
+        result.update({
+            'name': name,
+            'source': source_ext.lstrip('.'),
+            'target': target_format,
+            'size': size,
+            'input': label,
+            'input_size': os.path.getsize(source_path),
+        })
+        results.append(result)
+
+        if result['success']:
+            print(f"[{i}/{len(cases)}] {name}: {result['wall_time'] * 1000:.1f} ms, "
+                  f"{result['peak_rss'] / 1024 / 1024:.0f} MB peak, "
+                  f"{result['output_size'] / 1024:.0f} KB out")
+        else:
+            print(f"[{i}/{len(cases)}] {name}: FAILED ({result['error']})")
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'elapsed': time.time() - started,
+        'repeat': repeat,
+        'environment': environment_info(),
+        'results': results,
+    }
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare two results documents case by case.
+
+    A case regresses when its median time grows by more than threshold (and
+    by more than MIN_TIME_DELTA), its peak RSS grows by more than threshold,
+    or it succeeded in the baseline and fails now.
+
+    Returns:
+        list: One dict per case present in both documents, with ratios and
+            a list of regression reasons
+    """
+    previous = {result['name']: result for result in baseline['results']}
+    comparison = []
+    for result in current['results']:
+        before = previous.get(result['name'])
+        if before is None:
+            continue
+        entry = {'name': result['name'], 'regressions': []}
+        if before['success'] and not result['success']:
+            entry['regressions'].append('now fails')
+        elif before['success'] and result['success']:
+            entry['time_ratio'] = result['wall_time'] / max(before['wall_time'], 1e-9)
+            entry['rss_ratio'] = result['peak_rss'] / max(before['peak_rss'], 1)
+            entry['size_ratio'] = result['output_size'] / max(before['output_size'], 1)
+            if (entry['time_ratio'] > 1 + threshold
+                    and result['wall_time'] - before['wall_time'] > MIN_TIME_DELTA):
+                entry['regressions'].append(f"time x{entry['time_ratio']:.2f}")
+            if entry['rss_ratio'] > 1 + threshold:
+                entry['regressions'].append(f"peak RSS x{entry['rss_ratio']:.2f}")
+        comparison.append(entry)
+    return comparison
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark file conversions")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the benchmarks")
+    run_parser.add_argument('--sizes', nargs='+', choices=sorted(PDF_PAGES),
+                            default=list(DEFAULT_SIZES), help="Input sizes to benchmark")
+    run_parser.add_argument('--only', nargs='+', metavar='FORMAT',
+                            help="Only benchmark these source formats")
+    run_parser.add_argument('--repeat', type=int, default=3,
+                            help="Runs per conversion (median time is reported)")
+    run_parser.add_argument('--timeout', type=float, default=None,
+                            help="Seconds before a single run is abandoned")
+    run_parser.add_argument('--work-dir', default='benchmark_data',
+                            help="Directory for generated inputs (reused between runs)")
+    run_parser.add_argument('-o', '--output', default='benchmark_results.json',
+                            help="Results file to write")
+
+    compare_parser = commands.add_parser('compare', help="Compare two results files")
+    compare_parser.add_argument('baseline', help="Results file to compare against")
+    compare_parser.add_argument('current', help="Results file to check")
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help="Relative slowdown that counts as a regression")
+
+    one_parser = commands.add_parser('run-one', help=argparse.SUPPRESS)
+    one_parser.add_argument('source')
+    one_parser.add_argument('target')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run-one':
+        print(json.dumps(run_one(args.source, args.target)))
+        return 0
+
+    if args.command == 'run':
+        results = run_benchmarks(args.work_dir, args.sizes, args.only,
+                                 max(1, args.repeat), args.timeout)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        failed = sum(1 for result in results['results'] if not result['success'])
+        print(f"{len(results['results'])} cases, {failed} failed, "
+              f"results written to {args.output}")
+        return 1 if failed else 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+
+    comparison = compare_results(baseline, current, args.threshold)
+    regressed = [entry for entry in comparison if entry['regressions']]
+    for entry in comparison:
+        if 'time_ratio' in entry:
+            status = 'REGRESSED ' + ', '.join(entry['regressions']) if entry['regressions'] else 'ok'
+            print(f"{entry['name']}: time x{entry['time_ratio']:.2f}, "
+                  f"RSS x{entry['rss_ratio']:.2f}, size x{entry['size_ratio']:.2f}  {status}")
+        elif entry['regressions']:
+            print(f"{entry['name']}: REGRESSED {', '.join(entry['regressions'])}")
+    print(f"{len(comparison)} cases compared, {len(regressed)} regressed")
+    return 1 if regressed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
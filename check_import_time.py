@@ -0,0 +1,83 @@
+"""
+Fail when importing converters gets slow or starts loading a heavy backend.
+
+Runs `python -X importtime -c "import converters"` in fresh interpreters
+and compares the best cumulative import time against a budget:
+
+    python check_import_time.py --budget 200
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+# Default budget for a cold `import converters`, in milliseconds
+DEFAULT_BUDGET_MS = 200
+
+# Fresh interpreters to measure; the fastest run is compared to the budget
+DEFAULT_RUNS = 3
+
+# Backends that must only be imported when their conversion family is used
+LAZY_MODULES = ('pandas', 'numpy', 'PIL', 'PyPDF2', 'docx', 'fitz', 'reportlab', 'pyarrow')
+
+def measure_import(module='converters'):
+    """
+    Import module in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple: (cumulative import time in microseconds, set of top-level
+            packages that were imported)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True)
+
+    total_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        # import time: self [us] | cumulative | imported package
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        imported.add(name.split('.')[0])
+        if name == module:
+            total_us = int(fields[1])
+
+    if total_us is None:
+        raise RuntimeError(f"No import time reported for {module}")
+    return total_us, imported
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the cold import time of converters.py")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum import time in milliseconds")
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS,
+                        help="Number of fresh interpreters to measure")
+    args = parser.parse_args(argv)
+
+    timings = []
+    eager = set()
+    for _ in range(max(1, args.runs)):
+        total_us, imported = measure_import()
+        timings.append(total_us / 1000)
+        eager.update(name for name in LAZY_MODULES if name in imported)
+
+    best = min(timings)
+    print(f"import converters: {best:.1f} ms (budget {args.budget:g} ms, "
+          f"runs: {', '.join(f'{t:.1f}' for t in timings)})")
+
+    failed = False
+    if eager:
+        print(f"FAILED: imported at module load: {', '.join(sorted(eager))}")
+        failed = True
+    if best > args.budget:
+        print(f"FAILED: import time exceeds the {args.budget:g} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import logging
+
+from conversion_output import atomic_output
+
+logger = logging.getLogger("FileConverter")
+
+# Bump when converter output changes so stale entries are not reused
+# (2: entries restored as hard links may have been edited through the output)
+CACHE_VERSION = 2
+
+# Default upper bound for the total size of cached outputs (512 MB)
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+# Converters write into the cache under this name; it is swapped for the
+# real target name (e.g. output_page1.png -> report_page1.png) on restore
+STAGED_STEM = 'output'
+
+MANIFEST_NAME = 'manifest.json'
+
+# Staging directories older than this (in seconds) belong to dead conversions
+STALE_STAGING_AGE = 24 * 60 * 60
+
+# Linux ioctl that makes a copy-on-write clone of a file on Btrfs, XFS and similar
+FICLONE = 0x40049409
+
+def _clone_file(source, destination):
+    """
+    Copy source to destination, as a copy-on-write clone when the filesystem can.
+
+    Either way the destination is a separate file, so rewriting it in place
+    never changes the source.
+    """
+    if sys.platform.startswith('linux'):
+        import fcntl
+        with open(source, 'rb') as src, open(destination, 'wb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return
+            except OSError:
+                pass
+    shutil.copyfile(source, destination)
+
+def default_cache_dir():
+    """Return the cache directory from FILE_CONVERTER_CACHE or ~/.cache/file-converter."""
+    return os.environ.get('FILE_CONVERTER_CACHE') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'file-converter')
+
+class ConversionCache:
+    """
+    On-disk cache of conversion results keyed by source content.
+
+    Each entry is a directory named after a hash of the source bytes, the
+    target format and the conversion options. Hits are copied to the
+    requested target (cloned on filesystems with copy-on-write support), so
+    editing an output never changes the cached entry, and the least
+    recently used entries are evicted once the cache grows past max_size
+    bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_size = max_size
+        # (path, size, mtime) -> content digest, so repeat lookups skip rehashing
+        self._digests = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _source_digest(self, source_path):
+        """Hash the source file contents, reusing the hash while the file is unchanged."""
+        stat = os.stat(source_path)
+        stamp = (os.path.abspath(source_path), stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(stamp)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(source_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    hasher.update(block)
+            digest = hasher.hexdigest()
+            self._digests[stamp] = digest
+        return digest
+
+    def make_key(self, source_path, target_path, options=None):
+        """Build the cache key for converting source_path to target_path's format."""
+        hasher = hashlib.sha256()
+        hasher.update(json.dumps({
+            'version': CACHE_VERSION,
+            'source_ext': os.path.splitext(source_path)[1].lower(),
+            'target_ext': os.path.splitext(target_path)[1].lower(),
+            'options': options or {},
+        }, sort_keys=True, default=str).encode('utf-8'))
+        hasher.update(self._source_digest(source_path).encode('ascii'))
+        return hasher.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def restore(self, key, target_path):
+        """
+        Materialize a cached result at target_path.
+
+        Returns:
+            bool: True on a cache hit, False if the entry is missing or damaged
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+
+            target_dir = os.path.dirname(target_path)
+            target_stem = os.path.splitext(os.path.basename(target_path))[0]
+            if target_dir:
+                os.makedirs(target_dir, exist_ok=True)
+
+            for name, size in manifest['files'].items():
+                cached_file = os.path.join(entry_dir, name)
+                # Catch entries truncated by a full disk or edited by hand
+                if os.path.getsize(cached_file) != size:
+                    raise ValueError(f"Cached file changed size: {cached_file}")
+                destination = os.path.join(target_dir, target_stem + name[len(STAGED_STEM):])
+                # Replace the destination in one step so it is never missing or half copied
+                with atomic_output(destination) as temp_path:
+                    _clone_file(cached_file, temp_path)
+
+            # Touch the entry so eviction treats it as recently used
+            os.utime(entry_dir)
+            logger.info(f"Cache hit for {target_path} ({key[:12]})")
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Discarding damaged cache entry {key[:12]}: {str(e)}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return False
+
+    def run(self, source_path, target_path, convert, options=None):
+        """
+        Return a cached result for the conversion or run it and cache the outputs.
+
+        Args:
+            source_path: Path to the source file
+            target_path: Path where the converted file should be saved
+            convert: Function that converts to the staged target path it is
+                given and returns True on success
+            options: Conversion options that affect the output
+
+        Returns:
+            bool: True if the target is available, False if conversion failed
+        """
+        key = self.make_key(source_path, target_path, options)
+        if self.restore(key, target_path):
+            return True
+
+        staging_dir = tempfile.mkdtemp(prefix='.staging-', dir=self.cache_dir)
+        try:
+            staged_target = os.path.join(
+                staging_dir, STAGED_STEM + os.path.splitext(target_path)[1])
+            if not convert(staged_target):
+                return False
+
+            files = {name: os.path.getsize(os.path.join(staging_dir, name))
+                     for name in os.listdir(staging_dir) if name.startswith(STAGED_STEM)}
+            with open(os.path.join(staging_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+                json.dump({'files': files, 'size': sum(files.values()),
+                           'created': time.time()}, f)
+
+            try:
+                os.rename(staging_dir, self._entry_dir(key))
+            except OSError:
+                # Another process stored the same result first; use theirs
+                logger.info(f"Cache entry {key[:12]} already stored")
+
+            if not self.restore(key, target_path):
+                return False
+            self.evict()
+            return True
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_size."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(entry_dir):
+                continue
+            if name.startswith('.staging-'):
+                # Left behind by a conversion that was killed mid-way
+                if time.time() - os.path.getmtime(entry_dir) > STALE_STAGING_AGE:
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                continue
+            try:
+                with open(os.path.join(entry_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                    size = json.load(f)['size']
+                entries.append((os.path.getmtime(entry_dir), size, entry_dir))
+                total += size
+            except (OSError, ValueError, KeyError):
+                continue
+
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            logger.info(f"Evicted cache entry {os.path.basename(entry_dir)[:12]}")
+
+    def clear(self):
+        """Remove every cached result."""
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
@@ -0,0 +1,206 @@
+import sys
+import time
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak memory is then reported as 0
+    resource = None
+
+# Conventional stage names; converters may report others (e.g. rasterize)
+STAGES = ('decode', 'transform', 'encode', 'write')
+
+# Prefix of the metric names in the Prometheus text dump
+PROMETHEUS_PREFIX = 'file_converter'
+
+# Metrics of the conversion running in the current thread or task, if any
+_active_metrics = contextvars.ContextVar('active_metrics', default=None)
+
+def peak_rss(include_children=False):
+    """
+    Return the peak resident memory of this process in bytes.
+
+    With include_children, finished child processes (e.g. page rendering
+    workers) are included as well.
+    """
+    if resource is None:
+        return 0
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    try:
+        # Linux carries the parent's high-water mark across fork and exec in
+        # ru_maxrss, so prefer the per-process VmHWM when it is available
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    peak = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    if include_children:
+        peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+    return peak
+
+def current_metrics():
+    """Return the ConversionMetrics collecting for the running conversion, or None."""
+    return _active_metrics.get()
+
+def stage(name):
+    """Time a stage on the active ConversionMetrics; does nothing when none is active."""
+    metrics = _active_metrics.get()
+    return metrics.stage(name) if metrics is not None else nullcontext()
+
+def timed_iter(iterable, name):
+    """Yield from iterable, counting the time spent producing each item as stage name."""
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class ConversionMetrics:
+    """
+    Timings, byte counts and peak memory for one or more conversions.
+
+    Stage times are exclusive: time spent in a nested stage is only counted
+    for the inner stage, so the stages of a conversion add up to at most
+    its wall time. A single instance can be passed to many conversions to
+    aggregate them.
+
+    Args:
+        on_event: Optional function called with a dict for every event:
+            'start', 'stage' (with the stage name and seconds) and 'finish'
+            (with the success flag, wall time and byte counts)
+    """
+
+    def __init__(self, on_event=None):
+        self.on_event = on_event
+        # stage name -> {'seconds': float, 'calls': int}
+        self.stages = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.peak_rss = 0
+        self.wall_time = 0.0
+        self.conversions = 0
+        self.failures = 0
+        # Per thread stack of [name, start, seconds spent in nested stages]
+        self._local = threading.local()
+        self._started = None
+
+    def _emit(self, event, **fields):
+        if self.on_event is not None:
+            fields['event'] = event
+            self.on_event(fields)
+
+    @contextmanager
+    def activate(self):
+        """Make this the metrics object that stage() and timed_iter() report to."""
+        token = _active_metrics.set(self)
+        try:
+            yield self
+        finally:
+            _active_metrics.reset(token)
+
+    def start(self, source_path=None, target_path=None):
+        """Mark the start of a conversion."""
+        self._started = time.perf_counter()
+        self._emit('start', source=source_path, target=target_path)
+
+    def finish(self, success, bytes_read=0, bytes_written=0):
+        """Mark the end of the conversion started last and record its totals."""
+        wall_time = time.perf_counter() - self._started if self._started is not None else 0.0
+        self._started = None
+        self.wall_time += wall_time
+        self.conversions += 1
+        if not success:
+            self.failures += 1
+        self.bytes_read += bytes_read
+        self.bytes_written += bytes_written
+        self.peak_rss = max(self.peak_rss, peak_rss(include_children=True))
+        self._emit('finish', success=bool(success), wall_time=wall_time,
+                   bytes_read=bytes_read, bytes_written=bytes_written, peak_rss=self.peak_rss)
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage name, excluding time in nested stages."""
+        open_stages = self._local.__dict__.setdefault('stages', [])
+        entry = [name, time.perf_counter(), 0.0]
+        open_stages.append(entry)
+        try:
+            yield
+        finally:
+            open_stages.pop()
+            elapsed = time.perf_counter() - entry[1]
+            if open_stages:
+                open_stages[-1][2] += elapsed
+            self.add_stage(name, elapsed - entry[2])
+
+    def add_stage(self, name, seconds, calls=1):
+        """Record time spent in a stage, e.g. as measured in a worker process."""
+        totals = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+        totals['seconds'] += seconds
+        totals['calls'] += calls
+        self._emit('stage', stage=name, seconds=seconds)
+
+    def merge(self, stages):
+        """Add stage totals from another ConversionMetrics' stages or to_dict()['stages']."""
+        for name, totals in stages.items():
+            self.add_stage(name, totals['seconds'], totals['calls'])
+
+    def add_summary(self, summary):
+        """Fold in the to_dict() of metrics collected elsewhere, e.g. by a batch worker."""
+        self.conversions += summary['conversions']
+        self.failures += summary['failures']
+        self.wall_time += summary['wall_time']
+        self.bytes_read += summary['bytes_read']
+        self.bytes_written += summary['bytes_written']
+        self.peak_rss = max(self.peak_rss, summary['peak_rss'])
+        self.merge(summary['stages'])
+
+    def to_dict(self):
+        """Return the collected metrics as plain, JSON serializable data."""
+        return {
+            'conversions': self.conversions,
+            'failures': self.failures,
+            'wall_time': self.wall_time,
+            'stages': {name: dict(totals) for name, totals in self.stages.items()},
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'peak_rss': self.peak_rss,
+        }
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape_label(val)}"' for key, val in labels)
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if labels
+                             else f"{prefix}_{name} {value}")
+
+        metric('conversions_total', 'counter', "Conversions run, by result",
+               [((('result', 'success'),), self.conversions - self.failures),
+                ((('result', 'failure'),), self.failures)])
+        metric('conversion_seconds_total', 'counter', "Wall time spent converting", [((), self.wall_time)])
+        metric('stage_seconds_total', 'counter', "Time spent in each conversion stage",
+               [((('stage', name),), totals['seconds']) for name, totals in sorted(self.stages.items())])
+        metric('stage_calls_total', 'counter', "Times each conversion stage ran",
+               [((('stage', name),), totals['calls']) for name, totals in sorted(self.stages.items())])
+        metric('read_bytes_total', 'counter', "Source bytes read", [((), self.bytes_read)])
+        metric('written_bytes_total', 'counter', "Output bytes written", [((), self.bytes_written)])
+        metric('peak_rss_bytes', 'gauge', "Peak resident memory of the converting process",
+               [((), self.peak_rss)])
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,197 @@
+import os
+import re
+import contextvars
+from contextlib import contextmanager
+
+# Buffer size of files opened with atomic_open, so outputs are written in large blocks
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Directories to fsync when the enclosing sync_outputs() block ends, or None
+# when outputs do not need to be durable
+_sync_directories = contextvars.ContextVar('sync_directories', default=None)
+
+# OutputTracker of the enclosing track_outputs() block, or None
+_output_tracker = contextvars.ContextVar('output_tracker', default=None)
+
+def temp_path_for(target_path):
+    """Return an unused temporary path next to target_path that keeps its extension."""
+    directory, name = os.path.split(target_path)
+    base, ext = os.path.splitext(name)
+    return os.path.join(directory, f'.{base}.{os.urandom(4).hex()}.tmp{ext}')
+
+def _temp_name_pattern(target_path):
+    """Match the names temp_path_for() gives temporary files of target_path."""
+    base, ext = os.path.splitext(os.path.basename(target_path))
+    return re.compile(re.escape(f'.{base}.') + '[0-9a-f]{8}' + re.escape(f'.tmp{ext}') + '$')
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+class OutputTracker:
+    """
+    The exact output paths one conversion writes.
+
+    Paths are added by atomic_output() and expect_output() together with the
+    (size, mtime) they had before, so a cancelled conversion can remove what
+    it wrote without touching files of other jobs in the same directory.
+    """
+
+    def __init__(self):
+        # Output path -> (size, mtime) before the conversion, or None if it did not exist
+        self.before = {}
+
+    def add(self, path):
+        if path not in self.before:
+            self.before[path] = _file_stamp(path)
+
+    def written(self):
+        """Return {path: size} for the outputs that were created or changed."""
+        written = {}
+        for path, stamp in self.before.items():
+            current = _file_stamp(path)
+            if current is not None and current != stamp:
+                written[path] = current[0]
+        return written
+
+    def remove_written(self):
+        """
+        Delete the outputs that were created or changed, and temporary files
+        of these outputs left behind by killed worker processes.
+
+        Returns:
+            list: Paths of the removed outputs
+        """
+        removed = []
+        for path in self.written():
+            try:
+                os.remove(path)
+                removed.append(path)
+            except OSError:
+                pass
+        by_directory = {}
+        for path in self.before:
+            by_directory.setdefault(os.path.dirname(path), []).append(_temp_name_pattern(path))
+        for directory, patterns in by_directory.items():
+            try:
+                names = os.listdir(directory or '.')
+            except OSError:
+                continue
+            for name in names:
+                if any(pattern.match(name) for pattern in patterns):
+                    try:
+                        os.remove(os.path.join(directory, name))
+                    except OSError:
+                        pass
+        return removed
+
+@contextmanager
+def track_outputs():
+    """Yield an OutputTracker recording the outputs written in the block."""
+    tracker = OutputTracker()
+    token = _output_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _output_tracker.reset(token)
+
+def expect_output(path):
+    """
+    Record that path is about to be written, e.g. by a worker process.
+
+    Call it before handing the path to another process, which cannot report
+    back into the enclosing track_outputs() block itself.
+    """
+    tracker = _output_tracker.get()
+    if tracker is not None:
+        tracker.add(path)
+
+def _fsync_file(path):
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _fsync_directory(directory):
+    # Directories cannot be opened for syncing on Windows
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+@contextmanager
+def atomic_output(target_path):
+    """
+    Write target_path atomically through a temporary file next to it.
+
+    Yields the temporary path, which keeps the target's extension so that
+    libraries choosing the format from the file name still work. When the
+    block ends the temporary file is renamed over target_path; if the block
+    raises, the temporary file is deleted and target_path is left as it was.
+    """
+    expect_output(target_path)
+    temp_path = temp_path_for(target_path)
+    try:
+        yield temp_path
+        directories = _sync_directories.get()
+        if directories is not None:
+            _fsync_file(temp_path)
+            directories.add(os.path.dirname(os.path.abspath(target_path)))
+        os.replace(temp_path, target_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+@contextmanager
+def atomic_open(target_path, mode='wb', encoding=None, newline=None):
+    """
+    Open target_path for writing through atomic_output().
+
+    The file is buffered in WRITE_BUFFER_SIZE blocks and is only renamed to
+    target_path once it has been closed without errors.
+    """
+    with atomic_output(target_path) as temp_path:
+        with open(temp_path, mode, buffering=WRITE_BUFFER_SIZE, encoding=encoding,
+                  newline=newline) as f:
+            yield f
+
+@contextmanager
+def sync_outputs(*directories):
+    """
+    Make the outputs committed by atomic_output() in the block durable.
+
+    Each output is fsynced before it is renamed into place, and the
+    directories holding them (plus the given ones, e.g. where worker
+    processes wrote) are fsynced once when the block ends instead of once
+    per file. A nested block leaves its directories to the outermost one.
+    Worker processes do not inherit the block, so converters pass them an
+    fsync flag to open their own (see outputs_synced()).
+    """
+    pending = set(os.path.abspath(directory or '.') for directory in directories)
+    outer = _sync_directories.get()
+    if outer is not None:
+        outer.update(pending)
+        yield
+        return
+    token = _sync_directories.set(pending)
+    try:
+        yield
+    finally:
+        _sync_directories.reset(token)
+    for directory in sorted(pending):
+        if os.path.isdir(directory):
+            _fsync_directory(directory)
+
+def outputs_synced():
+    """Return True inside a sync_outputs() block."""
+    return _sync_directories.get() is not None
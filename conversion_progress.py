@@ -0,0 +1,231 @@
+import io
+import time
+import threading
+
+# Minimum seconds between on_update calls, so heartbeats stay cheap
+UPDATE_INTERVAL = 0.5
+
+# Buffer size for sources read through a progress counting reader
+READ_BUFFER_SIZE = 1024 * 1024
+
+class ConversionCancelled(BaseException):
+    """
+    Raised inside a conversion whose CancellationToken was cancelled or timed out.
+
+    It derives from BaseException so the `except Exception` fallbacks in the
+    converters do not swallow it; convert_file catches it and returns False.
+    """
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag with an optional deadline.
+
+    Converters check the token whenever they report progress, i.e. between
+    pages, chunks, rows and reads, and stop with ConversionCancelled once
+    it is cancelled. Cancelling is thread safe.
+
+    Args:
+        timeout: Seconds from now after which the token counts as cancelled
+        parent: Token whose cancellation also cancels this one
+    """
+
+    def __init__(self, timeout=None, parent=None):
+        self.parent = parent
+        self.deadline = time.monotonic() + timeout if timeout else None
+        # 'cancelled' or 'timed out' once the token has been found cancelled
+        self.reason = None
+        self._event = threading.Event()
+
+    def cancel(self, reason='cancelled'):
+        """Ask the conversion using this token to stop."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel('timed out')
+            return True
+        if self.parent is not None and self.parent.cancelled:
+            self.cancel(self.parent.reason)
+            return True
+        return False
+
+    def check(self):
+        """Raise ConversionCancelled if the token was cancelled or has timed out."""
+        if self.cancelled:
+            raise ConversionCancelled(f"Conversion {self.reason}")
+
+class ProgressTracker:
+    """
+    Turn counts of real work into progress percentages, throughput and an ETA.
+
+    A conversion is split into phases such as reading the source bytes,
+    rendering pages or writing rows. Each phase covers the range from the
+    current percentage up to its end percentage and advances with the
+    units of work done in it. Phases without a known total still count
+    work and send heartbeats but leave the percentage where it is.
+
+    The tracker is callable with a percentage, so it can be passed to code
+    expecting a plain progress_callback(percent) function. Every report also
+    checks cancel_token, which makes each unit of work a cancellation point.
+
+    Args:
+        callback: Function called with the integer percentage whenever it grows
+        on_update: Function called with snapshot() at most every
+            update_interval seconds while work is being done
+        update_interval: Seconds between on_update calls
+        cancel_token: Optional CancellationToken to check on every report
+    """
+
+    def __init__(self, callback=None, on_update=None, update_interval=UPDATE_INTERVAL,
+                 cancel_token=None):
+        self.callback = callback
+        self.on_update = on_update
+        self.update_interval = update_interval
+        self.cancel_token = cancel_token
+        self.percent = 0
+        self.started = time.monotonic()
+        self.last_activity = self.started
+        self._last_update = 0.0
+        self.phase_name = None
+        self.unit = None
+        self.total = None
+        self.done = 0
+        self._phase_start = 0
+        self._phase_end = 0
+        self._phase_started = self.started
+
+    def __call__(self, percent):
+        self.set(percent)
+
+    def set(self, percent):
+        """Move to a fixed percentage; progress never goes backwards."""
+        self.check()
+        percent = int(min(max(percent, 0), 100))
+        self.last_activity = time.monotonic()
+        if percent > self.percent:
+            self.percent = percent
+            if self.callback:
+                self.callback(percent)
+        self._maybe_update(force=percent == 100)
+
+    def begin(self, name, total=None, unit='bytes', end=100):
+        """Start a phase of total units that ends at the end percentage."""
+        self.check()
+        self.phase_name = name
+        self.unit = unit
+        self.total = total
+        self.done = 0
+        self._phase_start = self.percent
+        self._phase_end = max(end, self.percent)
+        self._phase_started = time.monotonic()
+        self._maybe_update(force=True)
+
+    def advance(self, units=1):
+        """Record units of work done in the current phase."""
+        self.update(self.done + units)
+
+    def update(self, done):
+        """Record the total units of work done so far in the current phase."""
+        self.check()
+        self.done = done
+        self.last_activity = time.monotonic()
+        if self.total:
+            fraction = min(done / self.total, 1.0)
+            percent = int(self._phase_start + (self._phase_end - self._phase_start) * fraction)
+            if percent > self.percent:
+                self.percent = percent
+                if self.callback:
+                    self.callback(percent)
+        self._maybe_update()
+
+    def check(self):
+        """Raise ConversionCancelled if the conversion has been cancelled."""
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+
+    def end(self):
+        """Finish the current phase, jumping to its end percentage."""
+        self.set(self._phase_end)
+
+    @property
+    def rate(self):
+        """Units per second in the current phase."""
+        elapsed = time.monotonic() - self._phase_started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Seconds until the current phase is done, or None when unknown."""
+        rate = self.rate
+        if not self.total or rate <= 0:
+            return None
+        return max(self.total - self.done, 0) / rate
+
+    def snapshot(self):
+        """Return the current state as plain data."""
+        now = time.monotonic()
+        return {
+            'percent': self.percent,
+            'phase': self.phase_name,
+            'unit': self.unit,
+            'done': self.done,
+            'total': self.total,
+            'rate': self.rate,
+            'eta': self.eta,
+            'elapsed': now - self.started,
+            'idle': now - self.last_activity,
+        }
+
+    def _maybe_update(self, force=False):
+        if self.on_update is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_update >= self.update_interval:
+            self._last_update = now
+            self.on_update(self.snapshot())
+
+def as_tracker(progress_callback, cancel_token=None):
+    """
+    Return progress_callback if it is a ProgressTracker, else wrap it in one.
+
+    A given cancel_token is attached to the returned tracker.
+    """
+    if not isinstance(progress_callback, ProgressTracker):
+        progress_callback = ProgressTracker(progress_callback)
+    if cancel_token is not None:
+        progress_callback.cancel_token = cancel_token
+    return progress_callback
+
+class _CountingFileIO(io.FileIO):
+    """Raw file that reports the number of bytes read from it."""
+
+    def __init__(self, path, on_read):
+        super().__init__(path, 'rb')
+        self._on_read = on_read
+
+    def readinto(self, buffer):
+        count = super().readinto(buffer)
+        if count:
+            self._on_read(count)
+        return count
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if data:
+            self._on_read(len(data))
+        return data
+
+    def readall(self):
+        data = super().readall()
+        if data:
+            self._on_read(len(data))
+        return data
+
+def open_counted(path, on_read):
+    """Open a file for binary reading, calling on_read(n) for every n bytes read from disk."""
+    return io.BufferedReader(_CountingFileIO(path, on_read), buffer_size=READ_BUFFER_SIZE)
@@ -0,0 +1,220 @@
+import os
+import heapq
+import itertools
+import threading
+import traceback
+import logging
+
+from converters import convert_file
+from conversion_progress import CancellationToken
+
+logger = logging.getLogger("FileConverter")
+
+# Job priorities; lower numbers run first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Conversions running at once; converters already spread pages and sheets
+# over processes, so only a few whole files are worth running side by side
+DEFAULT_MAX_WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+# States a job does not leave again
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+class ConversionJob:
+    """
+    A conversion waiting in or taken from a ConversionQueue.
+
+    Attributes:
+        id: Number of the job, increasing in submission order
+        source_path: File to convert
+        target_path: File to write
+        priority: PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW
+        timeout: Seconds the conversion may run before it is cancelled
+        status: One of QUEUED, RUNNING, DONE, FAILED or CANCELLED
+        error: Error message when the conversion raised an exception or timed out
+        cancel_token: CancellationToken that stops the conversion while it runs
+    """
+
+    def __init__(self, job_id, source_path, target_path, priority=PRIORITY_NORMAL,
+                 progress_callback=None, options=None, timeout=None):
+        self.id = job_id
+        self.source_path = source_path
+        self.target_path = target_path
+        self.priority = priority
+        self.progress_callback = progress_callback
+        self.options = options or {}
+        self.timeout = timeout
+        self.status = QUEUED
+        self.error = None
+        self.cancel_token = CancellationToken()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+class ConversionQueue:
+    """
+    Run conversions on a fixed number of worker threads in priority order.
+
+    Jobs with the same priority run in the order they were submitted.
+    Queued jobs that are cancelled are skipped by the workers; running jobs
+    stop at their next cancellation point and their partial output is
+    removed. Worker threads are started on the first submit and exit on
+    shutdown().
+
+    Args:
+        max_workers: Number of conversions to run at once
+        cache: Optional ConversionCache passed to every conversion
+        on_change: Function called with a job whenever its status changes.
+            It runs on the thread making the change, usually a worker.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, cache=None, on_change=None):
+        self.max_workers = max(1, max_workers)
+        self.cache = cache
+        self.on_change = on_change
+        # Heap of (priority, job id, job)
+        self._heap = []
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._workers = []
+        # job id -> job, for the jobs being converted
+        self._running = {}
+        self._shutdown = False
+
+    def submit(self, source_path, target_path, priority=PRIORITY_NORMAL, progress_callback=None,
+               timeout=None, **options):
+        """
+        Queue a conversion.
+
+        Args:
+            source_path: File to convert
+            target_path: File to write
+            priority: PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW
+            progress_callback: Passed on to convert_file
+            timeout: Seconds the conversion may run before it is cancelled
+            **options: Conversion options passed on to convert_file
+
+        Returns:
+            ConversionJob: The queued job
+        """
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Conversion queue has been shut down")
+            job = ConversionJob(next(self._ids), source_path, target_path, priority,
+                                progress_callback, options, timeout)
+            heapq.heappush(self._heap, (priority, job.id, job))
+            self._start_workers()
+            self._condition.notify()
+        self._notify(job)
+        return job
+
+    def cancel(self, job):
+        """
+        Cancel a queued job, or stop a running one at its next cancellation point.
+
+        Returns:
+            bool: True if the job was cancelled, False if it had already finished
+        """
+        with self._condition:
+            if job.status == RUNNING:
+                job.cancel_token.cancel()
+                logger.info(f"Cancelling running conversion of {job.source_path}")
+                return True
+            if job.status != QUEUED:
+                return False
+            job.status = CANCELLED
+        logger.info(f"Cancelled queued conversion of {job.source_path}")
+        self._notify(job)
+        return True
+
+    def pending(self):
+        """Return the number of jobs that are queued or running."""
+        with self._condition:
+            return sum(1 for _, _, job in self._heap if job.status == QUEUED) + len(self._running)
+
+    def shutdown(self, wait=False):
+        """Cancel all queued and running jobs and stop the workers."""
+        with self._condition:
+            self._shutdown = True
+            for job in self._running.values():
+                job.cancel_token.cancel()
+            cancelled = [job for _, _, job in self._heap if job.status == QUEUED]
+            for job in cancelled:
+                job.status = CANCELLED
+            self._heap.clear()
+            self._condition.notify_all()
+        for job in cancelled:
+            self._notify(job)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _start_workers(self):
+        # Called with the condition held; add workers up to the limit as jobs arrive
+        if len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f'conversion-{len(self._workers) + 1}')
+            worker.daemon = True
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self):
+        """Block until a queued job is available and mark it running; None on shutdown."""
+        with self._condition:
+            while True:
+                while self._heap:
+                    _, _, job = heapq.heappop(self._heap)
+                    # Cancelled jobs stay in the heap until a worker reaches them
+                    if job.status == QUEUED:
+                        job.status = RUNNING
+                        self._running[job.id] = job
+                        return job
+                if self._shutdown:
+                    return None
+                self._condition.wait()
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            self._notify(job)
+            # The timeout counts from the start of the conversion, not from submit()
+            cancel_token = CancellationToken(job.timeout, parent=job.cancel_token)
+            try:
+                success = convert_file(job.source_path, job.target_path,
+                                       progress_callback=job.progress_callback,
+                                       cache=self.cache, cancel_token=cancel_token, **job.options)
+                if success:
+                    job.status = DONE
+                elif job.cancel_token.cancelled:
+                    job.status = CANCELLED
+                else:
+                    # The reason of a failed conversion is in the log
+                    job.status = FAILED
+                    if cancel_token.reason == 'timed out':
+                        job.error = f"Timed out after {job.timeout:g}s"
+            except Exception as e:
+                logger.error(f"Queued conversion of {job.source_path} failed: {str(e)}")
+                logger.error(traceback.format_exc())
+                job.status = FAILED
+                job.error = str(e)
+            with self._condition:
+                self._running.pop(job.id, None)
+            self._notify(job)
+
+    def _notify(self, job):
+        if self.on_change is not None:
+            try:
+                self.on_change(job)
+            except Exception as e:
+                logger.error(f"Job status callback failed: {str(e)}")
@@ -1,16 +1,30 @@
 import os
 import time
-from PIL import Image
-import pandas as pd
 import tempfile
 import io
 import sys
 import subprocess
-from PyPDF2 import PdfReader, PdfWriter
-from docx import Document
 import traceback
 import logging
 import json
+import argparse
+import csv
+import glob
+import re
+import importlib.util
+import queue
+import multiprocessing
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from conversion_cache import ConversionCache, DEFAULT_MAX_SIZE
+from conversion_metrics import ConversionMetrics, current_metrics, stage, timed_iter
+from conversion_progress import (ProgressTracker, CancellationToken, ConversionCancelled,
+                                 as_tracker, open_counted)
+from conversion_output import (atomic_open, atomic_output, sync_outputs, outputs_synced,
+                               track_outputs, expect_output)
+from image_writers import (GifWriter, WebPWriter, ImagePdfWriter, QUANTIZERS, PDF_RESOLUTION,
+                           quantize, quantize_method)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
@@ -29,21 +43,208 @@ FORMAT_MAP = {
     '.gif': ['jpg', 'png', 'webp', 'bmp', 'pdf'],
     
     # Document formats
-    '.pdf': ['txt', 'jpg', 'png'],
+    '.pdf': ['txt', 'jsonl', 'jpg', 'png'],
     '.docx': ['pdf', 'txt'],
     '.txt': ['pdf', 'docx'],
     
     # Data formats
-    '.csv': ['xlsx', 'json', 'xml', 'html'],
-    '.xlsx': ['csv', 'json', 'xml', 'html'],
-    '.json': ['csv', 'xlsx', 'xml', 'html'],
+    '.csv': ['xlsx', 'json', 'xml', 'html', 'parquet', 'feather'],
+    '.xlsx': ['csv', 'json', 'xml', 'html', 'parquet', 'feather'],
+    '.json': ['csv', 'xlsx', 'xml', 'html', 'parquet', 'feather'],
+    '.parquet': ['csv', 'xlsx', 'json', 'xml', 'html', 'feather'],
+    '.feather': ['csv', 'xlsx', 'json', 'xml', 'html', 'parquet'],
 }
 
+# Formats that need an optional library; they are hidden when it is missing
+FORMAT_REQUIREMENTS = {
+    'parquet': 'pyarrow',
+    'feather': 'pyarrow',
+    'jsonl': 'fitz',
+}
+
+# Image formats that can be converted to each other and to PDF
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.gif')
+
+# Image DPI values below this are treated as missing when sizing PDF pages
+MIN_IMAGE_DPI = 36
+
+# Image formats that keep every frame of an animated source
+ANIMATED_IMAGE_FORMATS = ('.gif', '.webp')
+
+# Milliseconds each frame is shown when an animation does not say
+DEFAULT_FRAME_DURATION = 100
+
+# Downscaling by more than this factor starts with a fast integer reduce
+# before the filtered resize (Pillow's reducing_gap)
+RESIZE_REDUCING_GAP = 3.0
+
+# Pillow save parameters per image format for each encoding profile: 'fast'
+# spends the least CPU, 'balanced' matches Pillow's defaults and 'smallest'
+# spends more CPU on smaller files at the same quality
+ENCODER_PROFILES = {
+    'fast': {
+        'png': {'compress_level': 1},
+        'jpeg': {'quality': 75},
+        'webp': {'quality': 80, 'method': 0},
+    },
+    'balanced': {
+        'png': {'compress_level': 6},
+        'jpeg': {'quality': 75},
+        'webp': {'quality': 80, 'method': 4},
+    },
+    'smallest': {
+        'png': {'compress_level': 9, 'optimize': True},
+        'jpeg': {'quality': 75, 'optimize': True, 'progressive': True},
+        'webp': {'quality': 80, 'method': 6},
+        'gif': {'optimize': True},
+    },
+}
+
+# Encoding profile used when none is chosen
+DEFAULT_ENCODER_PROFILE = 'balanced'
+
+# JPEG quality of PDF pages rendered with PyMuPDF under the default profile
+# (PyMuPDF's own default, which these pages always had)
+PYMUPDF_JPEG_QUALITY = 95
+
+# Pages rendered per task when rasterizing PDFs; bounds the decoded pages held in memory
+PDF_RENDER_WINDOW = 4
+
+# Documents shorter than this are rendered in-process instead of on a process pool
+PDF_PARALLEL_MIN_PAGES = 8
+
+# Pages per task when extracting PDF text on a process pool
+PDF_TEXT_SHARD_PAGES = 32
+
+# Documents shorter than this have their text extracted in-process
+PDF_TEXT_PARALLEL_MIN_PAGES = 64
+
+# Pages with fewer non-whitespace characters than this are retried with pdfminer.six
+SPARSE_PAGE_CHARS = 10
+
+# Separator written after every page of extracted PDF text
+PAGE_BREAK = '\n\n--- Page Break ---\n\n'
+
+# Detail levels of PDF to JSON Lines output: text blocks only, or blocks with lines and font spans
+PDF_TEXT_DETAILS = ('blocks', 'spans')
+
+# Detail level used when none is chosen
+DEFAULT_PDF_TEXT_DETAIL = 'spans'
+
+# Decimal places kept for coordinates and font sizes in JSON Lines output
+PDF_COORDINATE_DIGITS = 2
+
+# Default DPI for PDF to image conversion
+DEFAULT_PDF_DPI = 300
+
+# Longest side in pixels of PDF thumbnails when thumbnail=True
+THUMBNAIL_SIZE = 256
+
+# CSV sources larger than this are converted in chunks instead of loaded whole
+CSV_STREAM_THRESHOLD = 64 * 1024 * 1024
+
+# Rows per chunk when streaming CSV sources
+CSV_CHUNK_ROWS = 100000
+
+# Spellings the CSV parser reads as booleans
+CSV_BOOL_VALUES = {'True': True, 'TRUE': True, 'true': True,
+                   'False': False, 'FALSE': False, 'false': False}
+
+# Values the CSV parser reads as missing by default (pandas' na_values)
+CSV_NA_VALUES = frozenset(['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+                           '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+                           'n/a', 'nan', 'null'])
+
+# Target formats that can be written chunk by chunk
+STREAMABLE_DATA_FORMATS = ('csv', 'json', 'xml', 'html')
+
+# Engines for reading and writing tabular data, fastest first, with the module
+# each one needs. Engines that are not installed are skipped, and the last
+# entry is pandas' default so conversions always have something to fall back on.
+DATA_READ_ENGINES = {
+    '.csv': [('pyarrow', 'pyarrow'), ('c', None)],
+    '.xlsx': [('calamine', 'python_calamine'), ('openpyxl', 'openpyxl')],
+}
+DATA_WRITE_ENGINES = {
+    'xlsx': [('xlsxwriter', 'xlsxwriter'), ('openpyxl', 'openpyxl')],
+}
+
+# XML document wrapper, matching the layout of DataFrame.to_xml
+XML_HEADER = "<?xml version='1.0' encoding='utf-8'?>\n<data>\n"
+XML_FOOTER = '</data>\n'
+
+# Rows rendered per batch when writing XML
+XML_BATCH_ROWS = 10000
+
+# Escapes for XML text; characters XML 1.0 cannot represent at all are dropped
+XML_ESCAPES = {ord('&'): '&amp;', ord('<'): '&lt;', ord('>'): '&gt;'}
+XML_ESCAPES.update((code, None) for code in list(range(0x00, 0x09)) + [0x0b, 0x0c]
+                   + list(range(0x0e, 0x20)) + list(range(0xd800, 0xe000)) + [0xfffe, 0xffff])
+
+# Columnar formats handled with pyarrow record batches
+COLUMNAR_FORMATS = ('parquet', 'feather')
+
+# Default compression codec for each columnar format
+DEFAULT_COMPRESSION = {
+    'parquet': 'snappy',
+    'feather': 'lz4',
+}
+
+# Rows per record batch when reading Parquet files
+ARROW_BATCH_ROWS = 64 * 1024
+
+# Characters per read of text sources, so progress moves during large reads
+READ_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Seconds without progress after which a batch job is reported as stalled
+DEFAULT_STALL_TIMEOUT = 120
+
+# Seconds between checks for finished and stalled batch jobs
+BATCH_POLL_INTERVAL = 1.0
+
+# Queue that batch workers send progress heartbeats to (set in each worker)
+_batch_progress_queue = None
+
+# Worker processes used for page rendering and sheet parsing (None means one per CPU)
+_pool_workers = None
+
+# Seconds between cancellation checks while waiting on worker or child processes
+CANCEL_POLL_INTERVAL = 0.1
+
+# docx2pdf drives Word, which can hang; it runs in a child process that can be killed
+DOCX2PDF_COMMAND = [sys.executable, '-c',
+                    'import sys; from docx2pdf import convert; convert(sys.argv[1], sys.argv[2])']
+
+def encoder_params(profile, image_format):
+    """
+    Return the Pillow save parameters of an encoding profile for an image format.
+    
+    Args:
+        profile: Name of a profile in ENCODER_PROFILES, or None for the default
+        image_format: Pillow format name, e.g. 'PNG' or 'JPEG'
+    
+    Returns:
+        dict: Keyword arguments for Image.save
+    """
+    name = profile or DEFAULT_ENCODER_PROFILE
+    if name not in ENCODER_PROFILES:
+        raise ValueError(f"Unknown encoder profile: {name} "
+                         f"(expected one of {', '.join(ENCODER_PROFILES)})")
+    return dict(ENCODER_PROFILES[name].get(image_format.lower(), {}))
+
+def _format_supported(file_format):
+    """Check that the library a format depends on is installed."""
+    module = FORMAT_REQUIREMENTS.get(file_format.lower().lstrip('.'))
+    return module is None or importlib.util.find_spec(module) is not None
+
 def get_available_formats(file_extension):
     """Get available output formats for a given file extension."""
-    return FORMAT_MAP.get(file_extension.lower(), [])
+    if not _format_supported(file_extension):
+        return []
+    return [fmt for fmt in FORMAT_MAP.get(file_extension.lower(), []) if _format_supported(fmt)]
 
-def convert_file(source_path, target_path, progress_callback=None):
+def convert_file(source_path, target_path, progress_callback=None, cache=None, metrics=None,
+                 cancel_token=None, timeout=None, fsync=False, **options):
     """
     Convert a file from one format to another.
     
@@ -51,10 +252,91 @@ def convert_file(source_path, target_path, progress_callback=None):
         source_path: Path to the source file
         target_path: Path where the converted file should be saved
         progress_callback: Function to call with progress updates (0-100)
+        cache: Optional ConversionCache; identical conversions are served from it
+        metrics: Optional ConversionMetrics that receives the stage timings,
+            bytes read and written and peak memory of the conversion
+        cancel_token: Optional CancellationToken; once it is cancelled the
+            conversion stops at the next page, chunk or row, partial outputs
+            are removed and False is returned
+        timeout: Seconds after which the conversion is cancelled
+        fsync: Flush the outputs to disk before returning, so they survive
+            a power loss (slower; the outputs are always replaced atomically)
+        **options: Converter specific options:
+            dpi: Render resolution for PDF to image (default 300)
+            pages: PDF pages to render, as a list of 1-based numbers or a
+                string such as "1-3,7" (default all pages)
+            thumbnail: Render PDF pages straight to a preview whose longest
+                side is this many pixels (True means THUMBNAIL_SIZE); only
+                the first page is rendered unless pages is given
+            chunksize: Stream CSV sources in chunks of this many rows
+                (large CSV files are streamed automatically)
+            read_engine: Parser for CSV/XLSX sources, e.g. 'pyarrow', 'c',
+                'calamine' or 'openpyxl' (default: fastest installed)
+            write_engine: Writer for XLSX targets, 'xlsxwriter' or 'openpyxl'
+                (default: fastest installed)
+            compression: Codec for Parquet ('snappy', 'zstd', 'gzip',
+                'brotli', 'lz4' or 'none') and Feather ('lz4', 'zstd' or
+                'none') targets
+            compression_level: Codec specific compression level
+            resize: Image output size as (width, height) or "WIDTHxHEIGHT";
+                leave one side out (e.g. "800x", or just "800") to keep the
+                aspect ratio
+            max_size: Longest side in pixels of image outputs; larger images
+                are scaled down, JPEGs already while they are decoded
+            resolution: Pixels per inch of images converted to PDF (default
+                the image's own DPI, or 100 when it has none)
+            profile: Encoder settings for image outputs, including PDF pages
+                rendered to images and images stored in PDFs: 'fast',
+                'balanced' (default) or 'smallest', see ENCODER_PROFILES;
+                with 'balanced', JPEG pages rendered by PyMuPDF keep
+                quality PYMUPDF_JPEG_QUALITY
+            quantizer: Palette quantizer for GIF targets: 'octree' (default,
+                fast), 'mediancut' or 'libimagequant'
+            sheets: Worksheets to convert from XLSX sources: 'all', a list
+                of sheet names or 0-based positions, or a comma separated
+                string (default the first sheet). With several sheets each
+                one is written to <target>_<sheet>.<ext>, or into a single
+                JSON document keyed by sheet name for JSON targets
     
     Returns:
         bool: True if conversion was successful, False otherwise
     """
+    if cancel_token is not None or timeout:
+        cancel_token = CancellationToken(timeout, parent=cancel_token)
+    # Only the exact paths this conversion writes are measured or removed on
+    # cancellation, never other files next to the target
+    with track_outputs() as outputs:
+        if metrics is None:
+            return _run_conversion(source_path, target_path, progress_callback, cache,
+                                   cancel_token, fsync, options, outputs)
+        
+        success = False
+        with metrics.activate():
+            metrics.start(source_path, target_path)
+            try:
+                success = _run_conversion(source_path, target_path, progress_callback, cache,
+                                          cancel_token, fsync, options, outputs)
+            finally:
+                metrics.finish(
+                    success,
+                    bytes_read=os.path.getsize(source_path) if os.path.exists(source_path) else 0,
+                    bytes_written=sum(outputs.written().values()) if success else 0)
+        return success
+
+def _cache_key_options(options):
+    """Leave out options set to their default, so they do not split the cache."""
+    if options.get('profile') == DEFAULT_ENCODER_PROFILE:
+        options = {name: value for name, value in options.items() if name != 'profile'}
+    return options
+
+def _remove_partial_outputs(outputs):
+    """Delete the outputs a cancelled conversion wrote, including temp files of killed workers."""
+    for path in outputs.remove_written():
+        logger.info(f"Removed partial output: {path}")
+
+def _run_conversion(source_path, target_path, progress_callback, cache, cancel_token, fsync,
+                    options, outputs):
+    """Validate the paths and run the conversion, through the cache when one is given."""
     try:
         # Validate file paths
         if not os.path.exists(source_path):
@@ -65,7 +347,32 @@ def convert_file(source_path, target_path, progress_callback=None):
         target_dir = os.path.dirname(target_path)
         if target_dir and not os.path.exists(target_dir):
             os.makedirs(target_dir)
-            
+        
+        try:
+            # Outputs written by worker processes land next to the target
+            with sync_outputs(target_dir) if fsync else nullcontext():
+                if cache is not None:
+                    return cache.run(
+                        source_path, target_path,
+                        lambda staged_target: _convert_file(source_path, staged_target,
+                                                            progress_callback, cancel_token,
+                                                            options),
+                        _cache_key_options(options))
+                return _convert_file(source_path, target_path, progress_callback, cancel_token,
+                                     options)
+        except ConversionCancelled as e:
+            logger.warning(f"{str(e)}: {source_path} -> {target_path}")
+            _remove_partial_outputs(outputs)
+            return False
+    
+    except Exception as e:
+        logger.error(f"Conversion error: {str(e)}")
+        logger.error(traceback.format_exc())
+        return False
+
+def _convert_file(source_path, target_path, progress_callback, cancel_token, options):
+    """Dispatch a conversion to the converter for the source and target formats."""
+    try:
         source_ext = os.path.splitext(source_path)[1].lower()
         target_ext = os.path.splitext(target_path)[1].lower()
         
@@ -74,26 +381,25 @@ def convert_file(source_path, target_path, progress_callback=None):
             
         logger.info(f"Converting {source_path} ({source_ext}) to {target_path} ({target_ext})")
         
-        # Simulate progress updates
-        def update_progress(value):
-            if progress_callback:
-                progress_callback(value)
-                
+        # Progress is driven by the work each converter reports
+        update_progress = as_tracker(progress_callback, cancel_token)
         update_progress(10)
         
         # Handle image conversions
-        if source_ext.lower() in ['.jpg', '.jpeg', '.png', '.bmp', '.webp', '.gif']:
+        if source_ext.lower() in IMAGE_EXTENSIONS:
             if target_ext.lower() in ['jpg', 'jpeg', 'png', 'bmp', 'webp', 'gif']:
-                return convert_image(source_path, target_path, update_progress)
+                return convert_image(source_path, target_path, update_progress, options)
             elif target_ext.lower() == 'pdf':
-                return image_to_pdf(source_path, target_path, update_progress)
+                return image_to_pdf(source_path, target_path, update_progress, options)
         
         # Handle document conversions
         elif source_ext.lower() == '.pdf':
             if target_ext.lower() in ['jpg', 'jpeg', 'png']:
-                return pdf_to_images(source_path, target_path, update_progress)
+                return pdf_to_images(source_path, target_path, update_progress, options)
             elif target_ext.lower() == 'txt':
                 return pdf_to_text(source_path, target_path, update_progress)
+            elif target_ext.lower() == 'jsonl':
+                return pdf_to_jsonl(source_path, target_path, update_progress, options)
         
         elif source_ext.lower() == '.docx':
             if target_ext.lower() == 'pdf':
@@ -108,9 +414,10 @@ def convert_file(source_path, target_path, progress_callback=None):
                 return text_to_docx(source_path, target_path, update_progress)
         
         # Handle data formats
-        elif source_ext.lower() in ['.csv', '.xlsx', '.json']:
-            if target_ext.lower() in ['csv', 'xlsx', 'json', 'xml', 'html']:
-                return convert_data_format(source_path, target_ext, target_path, update_progress)
+        elif source_ext.lower() in ['.csv', '.xlsx', '.json', '.parquet', '.feather']:
+            if target_ext.lower() in ['csv', 'xlsx', 'json', 'xml', 'html', 'parquet', 'feather']:
+                return convert_data_format(source_path, target_ext, target_path, update_progress,
+                                           options)
         
         logger.warning(f"No specific conversion routine found for {source_ext} to {target_ext}")
         update_progress(100)
@@ -121,57 +428,61 @@ def convert_file(source_path, target_path, progress_callback=None):
         logger.error(traceback.format_exc())
         return False
 
-def convert_image(source_path, target_path, progress_callback):
+def convert_image(source_path, target_path, progress_callback, options=None):
     """Convert between image formats."""
     try:
-        progress_callback(20)
+        from PIL import Image
+        progress_callback = as_tracker(progress_callback)
+        options = options or {}
+        
+        # Animations keep all their frames when the target can hold them
+        target_ext = os.path.splitext(target_path)[1].lower()
+        if target_ext in ANIMATED_IMAGE_FORMATS and _is_animated(source_path):
+            return _convert_animation(source_path, target_path, progress_callback, options)
         
-        # Open the image file
-        img = Image.open(source_path)
+        # Open and decode the image file, tracking the source bytes read
+        img = _decode_image(source_path, progress_callback, options)
         logger.info(f"Image opened: {source_path}, Mode: {img.mode}, Size: {img.size}")
         
         # Handle special cases for different formats
-        target_ext = os.path.splitext(target_path)[1].lower()
-        
-        # JPEG conversion - must be RGB
-        if target_ext in ['.jpg', '.jpeg'] or target_path.lower().endswith(('.jpg', '.jpeg')):
-            logger.info("Converting to JPEG format (ensuring RGB mode)")
-            # Convert to RGB mode for JPEG (which doesn't support alpha channels or palettes)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-                logger.info(f"Converted image mode to RGB")
-        
-        # PNG conversion - can handle RGBA
-        elif target_ext == '.png' or target_path.lower().endswith('.png'):
-            # PNG supports various modes, but RGBA is most common for transparency
-            if img.mode == 'P' and 'transparency' in img.info:
-                img = img.convert('RGBA')
-                logger.info(f"Converted palette with transparency to RGBA")
-        
-        # GIF conversion
-        elif target_ext == '.gif' or target_path.lower().endswith('.gif'):
-            # For animated GIFs, we'd need special handling here
-            # For single frame, convert to P mode with adaptive palette
-            if img.mode not in ['P', 'L', 'RGB']:
-                img = img.convert('RGB').convert('P', palette=Image.ADAPTIVE)
-                logger.info(f"Converted to palette mode for GIF")
+        image_format = Image.registered_extensions()[target_ext]
+        save_params = encoder_params(options.get('profile'), image_format)
+        with stage('transform'):
+            # JPEG conversion - must be RGB
+            if target_ext in ['.jpg', '.jpeg'] or target_path.lower().endswith(('.jpg', '.jpeg')):
+                logger.info("Converting to JPEG format (ensuring RGB mode)")
+                # Convert to RGB mode for JPEG (which doesn't support alpha channels or palettes)
+                if img.mode != 'RGB':
+                    img = img.convert('RGB')
+                    logger.info(f"Converted image mode to RGB")
+            
+            # PNG conversion - can handle RGBA
+            elif target_ext == '.png' or target_path.lower().endswith('.png'):
+                # PNG supports various modes, but RGBA is most common for transparency
+                if img.mode == 'P' and 'transparency' in img.info:
+                    img = img.convert('RGBA')
+                    logger.info(f"Converted palette with transparency to RGBA")
+            
+            # GIF conversion
+            elif target_ext == '.gif' or target_path.lower().endswith('.gif'):
+                # Reduce to a palette with the chosen quantizer instead of
+                # leaving it to Pillow's much slower adaptive palette
+                if img.mode not in ['P', 'L']:
+                    img, transparency = quantize(img, quantize_method(options.get('quantizer')))
+                    if transparency is not None:
+                        save_params['transparency'] = transparency
+                    logger.info(f"Converted to palette mode for GIF")
         
         progress_callback(60)
         
-        # Save the converted image
+        # Encode straight into the output file; the encode stage includes the disk writes
         logger.info(f"Saving image to {target_path}")
-        img.save(target_path)
+        progress_callback.begin('encode', unit='bytes', end=100)
+        with stage('encode'), atomic_open(target_path) as f:
+            img.save(_ProgressFile(f, progress_callback.advance), format=image_format,
+                     **save_params)
+            file_size = f.tell()
         
-        # Verify the file was created
-        if not os.path.exists(target_path):
-            logger.error(f"Failed to save image: File not created at {target_path}")
-            return False
-            
-        file_size = os.path.getsize(target_path)
-        if file_size == 0:
-            logger.error(f"Saved file has zero size: {target_path}")
-            return False
-            
         logger.info(f"Successfully saved image: {target_path}, Size: {file_size} bytes")
         progress_callback(100)
         return True
@@ -181,29 +492,165 @@ def convert_image(source_path, target_path, progress_callback):
         logger.error(traceback.format_exc())
         return False
 
-def image_to_pdf(source_path, target_path, progress_callback):
-    """Convert an image to PDF."""
+class _ProgressFile:
+    """
+    Output file wrapper that reports every chunk an encoder writes to it.
+    
+    It has no fileno(), so Pillow writes through write() rather than handing
+    the file descriptor straight to the encoder.
+    """
+    
+    def __init__(self, f, on_write):
+        self._file = f
+        self._on_write = on_write
+    
+    def write(self, data):
+        count = self._file.write(data)
+        self._on_write(count)
+        return count
+    
+    def fileno(self):
+        raise io.UnsupportedOperation("fileno")
+    
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+def _parse_resize(resize):
+    """
+    Parse the resize option into (width, height), with None for a side to scale.
+    
+    Args:
+        resize: (width, height), possibly with one side None, or a string
+            "WIDTHxHEIGHT", "WIDTHx", "xHEIGHT" or "WIDTH"
+    
+    Raises:
+        ValueError: If the format is wrong or a side is not a positive integer
+    """
+    if isinstance(resize, str):
+        sides = resize.lower().split('x')
+        if len(sides) == 1:
+            # A bare number is the width
+            sides.append('')
+        if len(sides) != 2:
+            raise ValueError(f"Invalid resize {resize!r}: expected WIDTHxHEIGHT, e.g. 800x600 or 800x")
+        try:
+            sides = [int(side) if side.strip() else None for side in sides]
+        except ValueError:
+            raise ValueError(f"Invalid resize {resize!r}: expected WIDTHxHEIGHT, e.g. 800x600 or 800x")
+    else:
+        sides = list(resize)
+        if len(sides) != 2:
+            raise ValueError(f"Invalid resize {resize!r}: expected (width, height)")
+    if sides == [None, None]:
+        raise ValueError(f"Invalid resize {resize!r}: give a width, a height or both")
+    if any(side is not None and side <= 0 for side in sides):
+        raise ValueError(f"Invalid resize {resize!r}: sides must be positive")
+    return tuple(sides)
+
+def _output_size(size, options):
+    """
+    Return the size to write an image of the given size at.
+    
+    Args:
+        size: (width, height) of the source image
+        options: Conversion options; resize is an exact (width, height) or a
+            "WIDTHxHEIGHT" string where a missing side keeps the aspect ratio
+            (see _parse_resize), and max_size limits the longest side without
+            ever enlarging
+    
+    Returns:
+        tuple: (width, height) of the output
+    """
+    width, height = size
+    resize = options.get('resize')
+    if resize:
+        new_width, new_height = _parse_resize(resize)
+        if new_width is None:
+            new_width = max(1, round(width * new_height / height))
+        elif new_height is None:
+            new_height = max(1, round(height * new_width / width))
+        width, height = new_width, new_height
+    
+    max_size = options.get('max_size')
+    if max_size is not None and max_size <= 0:
+        raise ValueError(f"Invalid max_size {max_size!r}: must be positive")
+    if max_size and max(width, height) > max_size:
+        scale = max_size / max(width, height)
+        width, height = max(1, round(width * scale)), max(1, round(height * scale))
+    return width, height
+
+def _decode_image(source_path, progress_callback, options):
+    """
+    Decode an image at the size asked for by the resize and max_size options.
+    
+    When the output is smaller, JPEGs are decoded directly at 1/2, 1/4 or
+    1/8 scale (Image.draft) and large reductions of other formats start
+    with a fast integer reduce, so the full resolution image is never
+    resampled and, for JPEGs, never held in memory.
+    """
+    from PIL import Image
+    progress_callback.begin('decode', os.path.getsize(source_path), 'bytes', end=50)
+    with stage('decode'), open_counted(source_path, progress_callback.advance) as f:
+        img = Image.open(f)
+        size = _output_size(img.size, options)
+        if size[0] < img.size[0] and size[1] < img.size[1]:
+            # Only changes anything for JPEGs; picks the smallest scale still at least size
+            img.draft(None, size)
+        img.load()
+    if img.size != size:
+        logger.info(f"Resizing image from {img.size} to {size}")
+        with stage('transform'):
+            img = img.resize(size, Image.LANCZOS, reducing_gap=RESIZE_REDUCING_GAP)
+    return img
+
+def image_to_pdf(source_path, target_path, progress_callback, options=None):
+    """
+    Convert an image to PDF; every frame of an animated image becomes a page.
+    
+    JPEGs that are not resized are embedded as they are, so the conversion
+    is little more than a copy of the file and loses no quality.
+    """
     try:
-        progress_callback(20)
-        
-        img = Image.open(source_path)
-        logger.info(f"Converting image to PDF: {source_path} -> {target_path}")
-        
-        # Always convert to RGB for PDF
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-            logger.info("Converted image to RGB mode for PDF")
-        
-        progress_callback(60)
-        
-        # Save as PDF
-        img.save(target_path, "PDF", resolution=100.0)
-        
-        # Verify file creation
-        if not os.path.exists(target_path):
-            logger.error(f"Failed to create PDF: {target_path}")
-            return False
+        from PIL import Image
+        progress_callback = as_tracker(progress_callback)
+        
+        options = options or {}
+        
+        if _is_animated(source_path):
+            return _convert_animation(source_path, target_path, progress_callback, options)
+        
+        # The header is enough to size the page and to see whether the JPEG can be embedded
+        with Image.open(source_path) as header:
+            resolution = _image_resolution(header, options)
+            embed = (ImagePdfWriter.can_embed(header)
+                     and _output_size(header.size, options) == header.size)
+        
+        if embed:
+            logger.info(f"Embedding JPEG in PDF: {source_path} -> {target_path}")
+            progress_callback.begin('write', os.path.getsize(source_path), 'bytes', end=100)
+            with stage('write'), atomic_open(target_path) as f:
+                writer = ImagePdfWriter(f)
+                writer.add_jpeg(source_path, header, resolution)
+                writer.close()
+            progress_callback.update(os.path.getsize(source_path))
+        else:
+            img = _decode_image(source_path, progress_callback, options)
+            logger.info(f"Converting image to PDF: {source_path} -> {target_path}")
+            # Keep the page size when the image was scaled down; each axis is
+            # scaled separately, as the two sides are rounded separately
+            resolution = (resolution * img.size[0] / header.size[0],
+                          resolution * img.size[1] / header.size[1])
             
+            progress_callback(60)
+            
+            # Save as PDF; the page image is stored as a JPEG, written straight to the file
+            progress_callback.begin('encode', unit='bytes', end=100)
+            with stage('encode'), atomic_open(target_path) as f:
+                writer = ImagePdfWriter(_ProgressFile(f, progress_callback.advance),
+                                        jpeg_params=encoder_params(options.get('profile'), 'JPEG'))
+                writer.add_image(img, resolution)
+                writer.close()
+        
         logger.info(f"Successfully created PDF: {target_path}")
         progress_callback(100)
         return True
@@ -213,16 +660,413 @@ def image_to_pdf(source_path, target_path, progress_callback):
         logger.error(traceback.format_exc())
         return False
 
-def pdf_to_images(source_path, target_path, progress_callback):
-    """Extract pages from a PDF as images."""
+def _is_animated(source_path):
+    """Check whether an image file has more than one frame, without decoding it."""
+    from PIL import Image
+    with Image.open(source_path) as img:
+        return getattr(img, 'is_animated', False)
+
+def _convert_animation(source_path, target_path, progress_callback, options):
+    """
+    Convert an animated image frame by frame to an animated GIF or WebP, or a PDF.
+    
+    Frames are decoded, encoded and written one at a time, so memory use
+    does not grow with the number of frames.
+    """
+    from PIL import Image
+    target_ext = os.path.splitext(target_path)[1].lower()
+    
+    with Image.open(source_path) as img:
+        frame_count = img.n_frames
+        loop = img.info.get('loop')
+        # Frames are RGBA only when the first one actually uses transparency
+        has_alpha = False
+        if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info:
+            with stage('decode'):
+                has_alpha = img.convert('RGBA').getchannel('A').getextrema()[0] < 255
+        mode = 'RGBA' if has_alpha else 'RGB'
+        size = _output_size(img.size, options)
+        logger.info(f"Converting {frame_count} frames of {source_path}, Size: {size}, "
+                    f"Alpha: {has_alpha}")
+        
+        progress_callback.begin('encode', frame_count, 'frames', end=95)
+        with atomic_open(target_path) as f:
+            if target_ext == '.gif':
+                writer = GifWriter(f, size, loop, has_alpha, options.get('quantizer'))
+            elif target_ext == '.webp':
+                # GIFs without a loop count play once
+                writer = WebPWriter(f, size, 1 if loop is None else loop, has_alpha,
+                                    encoder_params(options.get('profile'), 'WEBP'))
+            else:
+                writer = ImagePdfWriter(f, jpeg_params=encoder_params(options.get('profile'), 'JPEG'))
+            for index in range(frame_count):
+                with stage('decode'):
+                    img.seek(index)
+                    frame = img.convert(mode)
+                if frame.size != size:
+                    with stage('transform'):
+                        frame = frame.resize(size, Image.LANCZOS, reducing_gap=RESIZE_REDUCING_GAP)
+                duration = img.info.get('duration') or DEFAULT_FRAME_DURATION
+                with stage('encode'):
+                    if target_ext == '.pdf':
+                        writer.add_image(frame)
+                    else:
+                        writer.add_frame(frame, duration)
+                progress_callback.advance()
+            with stage('write'):
+                writer.close()
+    
+    logger.info(f"Successfully saved {frame_count} frames: {target_path}, "
+                f"Size: {os.path.getsize(target_path)} bytes")
+    progress_callback(100)
+    return True
+
+def _image_resolution(img, options):
+    """Return the pixels per inch to place an image at on a PDF page."""
+    if options.get('resolution'):
+        return float(options['resolution'])
+    # Images without a usable DPI (some carry e.g. 1 DPI) get the default
+    dpi = img.info.get('dpi')
+    if dpi and dpi[0] >= MIN_IMAGE_DPI:
+        return float(dpi[0])
+    return PDF_RESOLUTION
+
+def _add_pdf_pages(writer, source_path, options):
+    """
+    Add an image file to an ImagePdfWriter, as one page per frame.
+    
+    JPEGs are embedded as they are, without decoding them; other images
+    are decoded one frame at a time and stored losslessly.
+    
+    Returns:
+        int: Number of pages added
+    """
+    from PIL import Image
+    with Image.open(source_path) as img:
+        resolution = _image_resolution(img, options)
+        if writer.can_embed(img):
+            with stage('write'):
+                writer.add_jpeg(source_path, img, resolution)
+            return 1
+        frame_count = getattr(img, 'n_frames', 1)
+        for index in range(frame_count):
+            with stage('decode'):
+                img.seek(index)
+                img.load()
+            with stage('encode'):
+                writer.add_image(img, resolution, lossless=True)
+        return frame_count
+
+def merge_images_to_pdf(source_paths, target_path, progress_callback=None, cancel_token=None,
+                        timeout=None, fsync=False, **options):
+    """
+    Combine images into a single PDF with one page per image (or per frame).
+    
+    Pages are written as they are added, so memory use does not grow with
+    the number of images. JPEGs are copied into the PDF without being
+    decoded or re-encoded; other images are stored losslessly.
+    
+    Args:
+        source_paths: Image files in page order
+        target_path: PDF file to write
+        progress_callback: Function called with the progress percentage,
+            or a ProgressTracker
+        cancel_token: Optional CancellationToken, as for convert_file
+        timeout: Seconds after which the merge is cancelled
+        fsync: Flush the PDF to disk before returning
+        **options:
+            resolution: Pixels per inch for all pages (default each
+                image's own DPI, or 100 when it has none)
+            profile: Encoder profile, whose PNG compression level is used
+                for losslessly stored images (see convert_file)
+    
+    Returns:
+        bool: True if the PDF was written, False otherwise
+    """
+    if cancel_token is not None or timeout:
+        cancel_token = CancellationToken(timeout, parent=cancel_token)
+    progress_callback = as_tracker(progress_callback, cancel_token)
+    try:
+        if not source_paths:
+            logger.error("No images to merge")
+            return False
+        missing = [path for path in source_paths if not os.path.exists(path)]
+        if missing:
+            logger.error(f"Source files do not exist: {', '.join(missing)}")
+            return False
+        
+        target_dir = os.path.dirname(target_path)
+        if target_dir and not os.path.exists(target_dir):
+            os.makedirs(target_dir)
+        
+        logger.info(f"Merging {len(source_paths)} images into {target_path}")
+        compress_level = encoder_params(options.get('profile'), 'PNG').get('compress_level')
+        progress_callback.begin('merge', len(source_paths), 'images', end=100)
+        with sync_outputs(target_dir) if fsync else nullcontext():
+            with atomic_open(target_path) as f:
+                writer = ImagePdfWriter(f, compress_level=compress_level)
+                for source_path in source_paths:
+                    _add_pdf_pages(writer, source_path, options)
+                    progress_callback.advance()
+                with stage('write'):
+                    writer.close()
+        
+        logger.info(f"Successfully merged {writer.pages} pages: {target_path}, "
+                    f"Size: {os.path.getsize(target_path)} bytes")
+        progress_callback(100)
+        return True
+    
+    except ConversionCancelled as e:
+        logger.warning(f"{str(e)}: merging into {target_path}")
+        return False
+    except Exception as e:
+        logger.error(f"Image merge error: {str(e)}")
+        logger.error(traceback.format_exc())
+        return False
+
+def _pdf_page_count(source_path, has_pymupdf):
+    """Return the number of pages in a PDF without rendering it."""
+    if has_pymupdf:
+        import fitz
+        with fitz.open(source_path) as pdf_document:
+            return len(pdf_document)
+    from pdf2image import pdfinfo_from_path
+    return int(pdfinfo_from_path(source_path)['Pages'])
+
+def parse_page_selection(pages, total_pages):
+    """
+    Turn a page selection into a sorted list of 1-based page numbers.
+    
+    Args:
+        pages: None for all pages, a page number, a list of page numbers,
+            or a string such as "1-3,7,10-" (open ranges run to the last page)
+        total_pages: Number of pages in the document
+    
+    Returns:
+        list: Page numbers within the document, without duplicates
+    """
+    if pages is None:
+        return list(range(1, total_pages + 1))
+    if isinstance(pages, int):
+        pages = [pages]
+    if isinstance(pages, str):
+        selected = []
+        for part in pages.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if '-' in part:
+                first, last = part.split('-', 1)
+                first = int(first) if first.strip() else 1
+                last = int(last) if last.strip() else total_pages
+                selected.extend(range(first, last + 1))
+            else:
+                selected.append(int(part))
+        pages = selected
+    return sorted(set(p for p in pages if 1 <= p <= total_pages))
+
+def _page_windows(page_numbers):
+    """Split page numbers into runs of consecutive pages of at most PDF_RENDER_WINDOW pages."""
+    windows = []
+    for page_number in page_numbers:
+        if (windows and page_number == windows[-1][-1] + 1
+                and len(windows[-1]) < PDF_RENDER_WINDOW):
+            windows[-1].append(page_number)
+        else:
+            windows.append([page_number])
+    return windows
+
+def _page_image_path(base_path, page_number, ext):
+    """Build the output path of one rendered page, e.g. report_page3.png."""
+    return f"{base_path}_page{page_number}.{ext}"
+
+def _render_pdf_pages(source_path, base_path, ext, page_numbers, backend, dpi, thumbnail_size=None,
+                      save_params=None, fsync=False, on_page=None):
+    """
+    Render a window of PDF pages and write each image to disk as soon as it is ready.
+    
+    Runs in a worker process for large documents, so it only takes picklable
+    arguments and reopens the PDF itself. Page numbers are 1-based and
+    consecutive. With thumbnail_size, pages are rendered directly at the
+    scale that fits their longest side to that many pixels. Images are
+    encoded by Pillow with save_params (see encoder_params) and fsynced
+    when fsync is set. on_page is called after every written page when
+    rendering in-process.
+    
+    Returns:
+        list: Paths of the images that were written
+    """
+    with sync_outputs() if fsync else nullcontext():
+        return _write_pdf_pages(source_path, base_path, ext, page_numbers, backend, dpi,
+                                thumbnail_size, save_params, on_page)
+
+def _write_pdf_pages(source_path, base_path, ext, page_numbers, backend, dpi, thumbnail_size,
+                     save_params, on_page):
+    """Render and write a window of PDF pages for _render_pdf_pages."""
+    from PIL import Image
+    image_format = Image.registered_extensions()['.' + ext.lower()]
+    save_params = save_params or {}
+    created = []
+    if backend == 'pymupdf':
+        import fitz
+        with stage('decode'):
+            pdf_document = fitz.open(source_path)
+        try:
+            for page_number in page_numbers:
+                with stage('rasterize'):
+                    page = pdf_document[page_number - 1]
+                    if thumbnail_size:
+                        zoom = thumbnail_size / max(page.rect.width, page.rect.height)
+                    else:
+                        zoom = dpi / 72
+                    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+                img_path = _page_image_path(base_path, page_number, ext)
+                
+                with stage('encode'):
+                    # Encode with Pillow so the encoder settings apply; the
+                    # pixmap is RGB without alpha, and wrapped without a copy
+                    img = Image.frombuffer('RGB', (pix.width, pix.height), pix.samples_mv,
+                                           'raw', 'RGB', pix.stride, 1)
+                    buffer = io.BytesIO()
+                    img.save(buffer, format=image_format, **save_params)
+                
+                with stage('write'):
+                    with atomic_open(img_path) as f:
+                        f.write(buffer.getbuffer())
+                created.append(img_path)
+                if on_page:
+                    on_page(img_path)
+        finally:
+            pdf_document.close()
+    else:
+        from pdf2image import convert_from_path
+        with stage('rasterize'):
+            if thumbnail_size:
+                # An int size makes poppler scale the longest side to that many pixels
+                images = convert_from_path(source_path, size=thumbnail_size,
+                                           first_page=page_numbers[0], last_page=page_numbers[-1])
+            else:
+                images = convert_from_path(source_path, dpi=dpi,
+                                           first_page=page_numbers[0], last_page=page_numbers[-1])
+        for page_number, img in zip(page_numbers, images):
+            img_path = _page_image_path(base_path, page_number, ext)
+            with stage('encode'):
+                buffer = io.BytesIO()
+                img.save(buffer, format=image_format, **save_params)
+            with stage('write'):
+                with atomic_open(img_path) as f:
+                    f.write(buffer.getbuffer())
+            created.append(img_path)
+            if on_page:
+                on_page(img_path)
+    return created
+
+def _run_measured(func, *args):
+    """
+    Call func in a worker process and return its result with the stage
+    timings it recorded, for the parent to merge into its metrics.
+    """
+    metrics = ConversionMetrics()
+    with metrics.activate():
+        result = func(*args)
+    return result, metrics.stages
+
+def _merge_worker_stages(stages):
+    """Add stage timings returned by _run_measured to the active metrics."""
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.merge(stages)
+
+def _as_completed(futures, progress_callback):
+    """Yield futures as they finish, checking for cancellation while waiting."""
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+        progress_callback.check()
+        yield from done
+
+def _terminate_pool(pool):
+    """Stop a process pool at once, dropping queued tasks and killing busy workers."""
+    # ProcessPoolExecutor has no public way to stop running tasks, and
+    # shutdown() forgets its processes, so collect them first
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+
+def _render_pdf_windows(source_path, base_path, ext, page_numbers, backend, dpi, thumbnail_size,
+                        save_params, progress_callback, max_workers=None):
+    """
+    Render the selected pages in bounded windows, spreading the windows across worker processes.
+    
+    Only PDF_RENDER_WINDOW pages per worker are held in memory at any time,
+    so peak memory does not grow with the page count.
+    """
+    total_pages = len(page_numbers)
+    windows = _page_windows(page_numbers)
+    
+    workers = max_workers or _pool_workers or os.cpu_count() or 1
+    workers = min(workers, len(windows))
+    progress_callback = as_tracker(progress_callback)
+    progress_callback.begin('render', total_pages, 'pages', end=100)
+    
+    def page_done(img_path):
+        logger.info(f"Created image: {img_path}")
+        progress_callback.advance()
+    
+    for page_number in page_numbers:
+        expect_output(_page_image_path(base_path, page_number, ext))
+    
+    if workers > 1 and total_pages >= PDF_PARALLEL_MIN_PAGES:
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        except (ImportError, OSError, NotImplementedError) as e:
+            # Some mobile Python builds have no working multiprocessing
+            logger.warning(f"Process pool unavailable, rendering in-process: {str(e)}")
+            pool = None
+        if pool is not None:
+            logger.info(f"Rendering {total_pages} pages with {workers} worker processes")
+            with pool:
+                try:
+                    futures = [pool.submit(_run_measured, _render_pdf_pages, source_path, base_path,
+                                           ext, window, backend, dpi, thumbnail_size, save_params,
+                                           outputs_synced())
+                               for window in windows]
+                    for future in _as_completed(futures, progress_callback):
+                        paths, stages = future.result()
+                        _merge_worker_stages(stages)
+                        for img_path in paths:
+                            page_done(img_path)
+                except BaseException:
+                    _terminate_pool(pool)
+                    raise
+            return
+    
+    for window in windows:
+        _render_pdf_pages(source_path, base_path, ext, window, backend, dpi, thumbnail_size,
+                          save_params, on_page=page_done)
+
+def pdf_to_images(source_path, target_path, progress_callback, options=None):
+    """Extract pages from a PDF as images, streaming pages to disk."""
     try:
         progress_callback(10)
+        options = options or {}
+        dpi = options.get('dpi') or DEFAULT_PDF_DPI
+        thumbnail_size = options.get('thumbnail')
+        if thumbnail_size is True:
+            thumbnail_size = THUMBNAIL_SIZE
+        pages = options.get('pages')
+        if thumbnail_size and pages is None:
+            # Previews only need the first page
+            pages = [1]
         
         logger.info(f"Converting PDF to image(s): {source_path} -> {target_path}")
         
         # Check if pdf2image is available
         try:
-            from pdf2image import convert_from_path
+            import pdf2image
             has_pdf2image = True
         except ImportError:
             has_pdf2image = False
@@ -241,22 +1085,24 @@ def pdf_to_images(source_path, target_path, progress_callback):
         # Get base name without extension
         base_path = os.path.splitext(target_path)[0]
         ext = os.path.splitext(target_path)[1][1:]  # Remove leading dot
+        save_params = encoder_params(options.get('profile'),
+                                     'JPEG' if ext.lower() in ('jpg', 'jpeg') else ext.upper())
+        
+        total_pages = _pdf_page_count(source_path, has_pymupdf)
+        page_numbers = parse_page_selection(pages, total_pages)
+        logger.info(f"PDF has {total_pages} pages, rendering {len(page_numbers)} "
+                    f"at {f'{thumbnail_size}px thumbnail' if thumbnail_size else f'{dpi} DPI'}")
+        if not page_numbers:
+            logger.error(f"No pages selected from {source_path} (pages={pages})")
+            return False
         
         progress_callback(20)
         
         # Convert using pdf2image if available
         if has_pdf2image:
             try:
-                images = convert_from_path(source_path, dpi=300)
-                total_pages = len(images)
-                logger.info(f"PDF has {total_pages} pages")
-                
-                for i, img in enumerate(images):
-                    img_path = f"{base_path}_page{i+1}.{ext}"
-                    img.save(img_path)
-                    logger.info(f"Created image for page {i+1}: {img_path}")
-                    progress_callback(20 + (i+1) * 70 // total_pages)
-                    
+                _render_pdf_windows(source_path, base_path, ext, page_numbers, 'pdf2image', dpi,
+                                    thumbnail_size, save_params, progress_callback)
                 return True
             except Exception as e:
                 logger.error(f"pdf2image conversion failed: {str(e)}")
@@ -265,23 +1111,11 @@ def pdf_to_images(source_path, target_path, progress_callback):
         
         # Convert using PyMuPDF if pdf2image failed or is not available
         if has_pymupdf:
-            pdf_document = fitz.open(source_path)
-            total_pages = len(pdf_document)
-            logger.info(f"PDF has {total_pages} pages")
-            
-            for i, page in enumerate(pdf_document):
-                pix = page.get_pixmap(matrix=fitz.Matrix(300/72, 300/72))
-                img_path = f"{base_path}_page{i+1}.{ext}"
-                
-                # For JPG, we need RGB
-                if ext.lower() in ["jpg", "jpeg"]:
-                    pix = fitz.Pixmap(fitz.csRGB, pix)
-                
-                pix.save(img_path)
-                logger.info(f"Created image for page {i+1}: {img_path}")
-                progress_callback(20 + (i+1) * 70 // total_pages)
-            
-            pdf_document.close()
+            if (ext.lower() in ('jpg', 'jpeg')
+                    and (options.get('profile') or DEFAULT_ENCODER_PROFILE) == DEFAULT_ENCODER_PROFILE):
+                save_params['quality'] = PYMUPDF_JPEG_QUALITY
+            _render_pdf_windows(source_path, base_path, ext, page_numbers, 'pymupdf', dpi,
+                                thumbnail_size, save_params, progress_callback)
             return True
             
         # If we got here, both methods failed
@@ -293,18 +1127,127 @@ def pdf_to_images(source_path, target_path, progress_callback):
         logger.error(traceback.format_exc())
         return False
 
+def _text_chars(text):
+    """Count the non-whitespace characters in text."""
+    return len(''.join(text.split()))
+
+def _retry_sparse_pages(source_path, start, pages):
+    """
+    Re-extract pages that yielded almost no text with pdfminer.six.
+    
+    Only those pages are parsed again, and a page keeps the pdfminer text
+    only when it has more characters than the first attempt.
+    
+    Args:
+        source_path: PDF file
+        start: 0-based index of the first page in pages
+        pages: List of (text, method) for consecutive pages
+    
+    Returns:
+        list: (text, method) for the same pages
+    """
+    sparse = [start + offset for offset, (text, _) in enumerate(pages)
+              if _text_chars(text) < SPARSE_PAGE_CHARS]
+    if not sparse:
+        return pages
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+    pages = list(pages)
+    with stage('transform'):
+        # extract_pages yields the requested pages in document order
+        for page_index, layout in zip(sparse, extract_pages(source_path, page_numbers=sparse)):
+            text = ''.join(element.get_text() for element in layout
+                           if isinstance(element, LTTextContainer))
+            if _text_chars(text) > _text_chars(pages[page_index - start][0]):
+                pages[page_index - start] = (text, 'pdfminer')
+    return pages
+
+def _extract_pdf_text(source_path, start, stop, retry_sparse=False, pdf_document=None):
+    """
+    Extract the text of pages start to stop - 1 (0-based) with PyMuPDF.
+    
+    Runs in a worker process for large documents, so it reopens the PDF
+    itself unless an open document is passed. With retry_sparse, pages
+    with (almost) no text are retried with pdfminer.six.
+    
+    Returns:
+        list: (text, method) of each page, method being 'pymupdf' or 'pdfminer'
+    """
+    import fitz
+    document = pdf_document if pdf_document is not None else fitz.open(source_path)
+    try:
+        pages = []
+        for page_number in range(start, stop):
+            with stage('transform'):
+                pages.append((document[page_number].get_text(), 'pymupdf'))
+    finally:
+        if pdf_document is None:
+            document.close()
+    if retry_sparse:
+        pages = _retry_sparse_pages(source_path, start, pages)
+    return pages
+
+def _iter_pdf_shards(source_path, pdf_document, progress_callback, extract, args=(),
+                     max_workers=None):
+    """
+    Yield (first page index, result) for consecutive shards of a PDF, in page order.
+    
+    Each shard's result is extract(source_path, start, stop, *args). Large
+    documents are split into shards of PDF_TEXT_SHARD_PAGES pages that are
+    extracted on a process pool. Only a few shards per worker are in flight
+    at once, so shards that finish early do not pile up in memory.
+    """
+    total_pages = len(pdf_document)
+    shards = [(start, min(start + PDF_TEXT_SHARD_PAGES, total_pages))
+              for start in range(0, total_pages, PDF_TEXT_SHARD_PAGES)]
+    
+    workers = max_workers or _pool_workers or os.cpu_count() or 1
+    workers = min(workers, len(shards))
+    if workers > 1 and total_pages >= PDF_TEXT_PARALLEL_MIN_PAGES:
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        except (ImportError, OSError, NotImplementedError) as e:
+            # Some mobile Python builds have no working multiprocessing
+            logger.warning(f"Process pool unavailable, extracting in-process: {str(e)}")
+            pool = None
+        if pool is not None:
+            logger.info(f"Extracting text from {total_pages} pages with {workers} worker processes")
+            with pool:
+                try:
+                    futures = {}
+                    submitted = 0
+                    for index, (start, stop) in enumerate(shards):
+                        while submitted < len(shards) and submitted < index + 2 * workers:
+                            futures[submitted] = pool.submit(_run_measured, extract, source_path,
+                                                             *shards[submitted], *args)
+                            submitted += 1
+                        for _ in _as_completed([futures[index]], progress_callback):
+                            pass
+                        result, stages = futures.pop(index).result()
+                        _merge_worker_stages(stages)
+                        yield start, result
+                except BaseException:
+                    _terminate_pool(pool)
+                    raise
+            return
+    
+    for start, stop in shards:
+        yield start, extract(source_path, start, stop, *args, pdf_document=pdf_document)
+
 def pdf_to_text(source_path, target_path, progress_callback):
-    """Extract text from a PDF using a combination of methods for better results."""
+    """
+    Extract text from a PDF using a combination of methods for better results.
+    
+    Pages are extracted with PyMuPDF (or PyPDF2 when it is missing); pages
+    that come out (almost) empty are retried one by one with pdfminer.six,
+    and the method used for every page is logged.
+    """
     try:
+        progress_callback = as_tracker(progress_callback)
         progress_callback(10)
         
         logger.info(f"Converting PDF to text: {source_path} -> {target_path}")
         
-        # Try PyPDF2 first
-        pdf = PdfReader(source_path)
-        total_pages = len(pdf.pages)
-        logger.info(f"PDF has {total_pages} pages")
-        
         # Check if PyMuPDF is available for better text extraction
         try:
             import fitz
@@ -312,46 +1255,65 @@ def pdf_to_text(source_path, target_path, progress_callback):
         except ImportError:
             has_pymupdf = False
             logger.warning("PyMuPDF not available, using PyPDF2 for text extraction")
+        has_pdfminer = importlib.util.find_spec('pdfminer') is not None
         
-        progress_callback(20)
+        # Pages extracted by each method, and pages that stayed (almost) empty
+        methods = {}
+        sparse_pages = 0
         
-        with open(target_path, 'w', encoding='utf-8') as text_file:
+        def write_pages(text_file, start, pages):
+            nonlocal sparse_pages
+            for offset, (text, method) in enumerate(pages):
+                with stage('write'):
+                    text_file.write(text)
+                    text_file.write(PAGE_BREAK)
+                methods[method] = methods.get(method, 0) + 1
+                if _text_chars(text) < SPARSE_PAGE_CHARS:
+                    sparse_pages += 1
+                logger.info(f"Extracted text from page {start + offset + 1} with {method} "
+                            f"(length: {len(text)} chars)")
+                progress_callback.advance()
+        
+        with atomic_open(target_path, 'w', encoding='utf-8') as text_file:
             # Use PyMuPDF if available
             if has_pymupdf:
-                doc = fitz.open(source_path)
-                for i, page in enumerate(doc):
-                    text = page.get_text()
-                    text_file.write(text)
-                    text_file.write('\n\n--- Page Break ---\n\n')
-                    logger.info(f"Extracted text from page {i+1} (length: {len(text)} chars)")
-                    progress_callback(20 + (i+1) * 70 // total_pages)
-                doc.close()
+                with stage('decode'):
+                    doc = fitz.open(source_path)
+                try:
+                    total_pages = len(doc)
+                    logger.info(f"PDF has {total_pages} pages")
+                    progress_callback(20)
+                    progress_callback.begin('extract', total_pages, 'pages', end=90)
+                    # Pages are written in order as their shard arrives
+                    for start, pages in _iter_pdf_shards(source_path, doc, progress_callback,
+                                                         _extract_pdf_text, (has_pdfminer,)):
+                        write_pages(text_file, start, pages)
+                finally:
+                    doc.close()
             else:
                 # Fallback to PyPDF2
-                for i, page in enumerate(pdf.pages):
-                    text = page.extract_text()
-                    text_file.write(text)
-                    text_file.write('\n\n--- Page Break ---\n\n')
-                    logger.info(f"Extracted text from page {i+1} (length: {len(text)} chars)")
-                    progress_callback(20 + (i+1) * 70 // total_pages)
+                from PyPDF2 import PdfReader
+                with stage('decode'):
+                    pdf = PdfReader(source_path)
+                total_pages = len(pdf.pages)
+                logger.info(f"PDF has {total_pages} pages")
+                progress_callback(20)
+                progress_callback.begin('extract', total_pages, 'pages', end=90)
+                for start in range(0, total_pages, PDF_TEXT_SHARD_PAGES):
+                    pages = []
+                    for page in pdf.pages[start:start + PDF_TEXT_SHARD_PAGES]:
+                        with stage('transform'):
+                            pages.append((page.extract_text(), 'pypdf2'))
+                    if has_pdfminer:
+                        pages = _retry_sparse_pages(source_path, start, pages)
+                    write_pages(text_file, start, pages)
+        
+        logger.info("Pages per extraction method: "
+                    + ', '.join(f"{method}: {count}" for method, count in sorted(methods.items())))
+        if sparse_pages:
+            logger.warning(f"{sparse_pages} pages have little or no text layer"
+                           + ("" if has_pdfminer else "; pdfminer.six is not available to retry them"))
         
-        # Verify file was created
-        if not os.path.exists(target_path):
-            logger.error(f"Failed to create text file: {target_path}")
-            return False
-            
-        # If file is empty, try alternative method with pdfminer.six if available
-        if os.path.getsize(target_path) < 100:  # If file is very small
-            logger.warning("Text extraction yielded little content, trying alternative method")
-            try:
-                from pdfminer.high_level import extract_text as pdfminer_extract_text
-                text = pdfminer_extract_text(source_path)
-                with open(target_path, 'w', encoding='utf-8') as text_file:
-                    text_file.write(text)
-                logger.info(f"Used pdfminer.six to extract text (length: {len(text)} chars)")
-            except ImportError:
-                logger.warning("pdfminer.six not available for alternative text extraction")
-            
         logger.info(f"Successfully created text file: {target_path}")
         progress_callback(100)
         return True
@@ -361,27 +1323,184 @@ def pdf_to_text(source_path, target_path, progress_callback):
         logger.error(traceback.format_exc())
         return False
 
-def docx_to_pdf(source_path, target_path, progress_callback):
-    """Convert DOCX to PDF using multiple methods."""
-    try:
-        progress_callback(20)
-        
-        logger.info(f"Converting DOCX to PDF: {source_path} -> {target_path}")
-        
-        # Try docx2pdf if available
+def _rounded(values):
+    """Round a bbox or other sequence of coordinates for JSON output."""
+    return [round(value, PDF_COORDINATE_DIGITS) for value in values]
+
+def _extract_pdf_records(source_path, start, stop, detail=DEFAULT_PDF_TEXT_DETAIL, sort=False,
+                         pdf_document=None):
+    """
+    Build the JSON Lines records of pages start to stop - 1 (0-based) with PyMuPDF.
+    
+    Like _extract_pdf_text this may run in a worker process, so records are
+    serialized here and only the finished lines are sent back.
+    
+    Args:
+        source_path: PDF file
+        start: First page index
+        stop: Page index after the last page
+        detail: 'blocks' for the text and bbox of each block, 'spans' to
+            also include its lines and spans with font name, size, flags and color
+        sort: Order blocks top-left to bottom-right instead of content stream order
+        pdf_document: Already open document to read from
+    
+    Returns:
+        list: One JSON string per page
+    """
+    import fitz
+    document = pdf_document if pdf_document is not None else fitz.open(source_path)
+    try:
+        records = []
+        for page_number in range(start, stop):
+            page = document[page_number]
+            with stage('transform'):
+                if detail == 'blocks':
+                    blocks = [{'bbox': _rounded(block[:4]), 'text': block[4]}
+                              for block in page.get_text('blocks', sort=sort)
+                              if block[6] == 0]
+                else:
+                    # Leave out image blocks, which would carry the encoded image
+                    content = page.get_text('dict', sort=sort,
+                                            flags=fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES)
+                    blocks = []
+                    for block in content['blocks']:
+                        lines = [{'bbox': _rounded(line['bbox']),
+                                  'spans': [{'text': span['text'],
+                                             'bbox': _rounded(span['bbox']),
+                                             'font': span['font'],
+                                             'size': round(span['size'], PDF_COORDINATE_DIGITS),
+                                             'flags': span['flags'],
+                                             'color': span['color']}
+                                            for span in line['spans']]}
+                                 for line in block['lines']]
+                        text = '\n'.join(''.join(span['text'] for span in line['spans'])
+                                         for line in lines)
+                        blocks.append({'bbox': _rounded(block['bbox']), 'text': text,
+                                       'lines': lines})
+            with stage('encode'):
+                records.append(json.dumps({'page': page_number + 1,
+                                           'width': round(page.rect.width, PDF_COORDINATE_DIGITS),
+                                           'height': round(page.rect.height, PDF_COORDINATE_DIGITS),
+                                           'blocks': blocks}, ensure_ascii=False))
+        return records
+    finally:
+        if pdf_document is None:
+            document.close()
+
+def pdf_to_jsonl(source_path, target_path, progress_callback, options=None):
+    """
+    Write the text of a PDF as JSON Lines, one record per page.
+    
+    Each record has the page number, page size and text blocks with their
+    bounding boxes (and, at the 'spans' detail level, lines and font spans),
+    so indexers can consume it without parsing the text again. Pages are
+    written in order as soon as their shard has been extracted.
+    
+    Options:
+        text_detail: 'blocks' or 'spans' (default)
+        sort_text: Order blocks by position on the page
+    """
+    try:
+        options = options or {}
+        detail = options.get('text_detail') or DEFAULT_PDF_TEXT_DETAIL
+        if detail not in PDF_TEXT_DETAILS:
+            raise ValueError(f"Unknown text detail '{detail}', expected one of {', '.join(PDF_TEXT_DETAILS)}")
+        sort = bool(options.get('sort_text'))
+        
+        progress_callback = as_tracker(progress_callback)
+        progress_callback(10)
+        
+        logger.info(f"Converting PDF to JSON Lines: {source_path} -> {target_path}")
+        
+        import fitz
+        with stage('decode'):
+            doc = fitz.open(source_path)
         try:
-            from docx2pdf import convert
+            total_pages = len(doc)
+            logger.info(f"PDF has {total_pages} pages")
+            progress_callback(20)
+            progress_callback.begin('extract', total_pages, 'pages', end=90)
+            with atomic_open(target_path, 'w', encoding='utf-8', newline='\n') as jsonl_file:
+                for start, records in _iter_pdf_shards(source_path, doc, progress_callback,
+                                                       _extract_pdf_records, (detail, sort)):
+                    for record in records:
+                        with stage('write'):
+                            jsonl_file.write(record)
+                            jsonl_file.write('\n')
+                        progress_callback.advance()
+        finally:
+            doc.close()
+        
+        logger.info(f"Successfully created JSON Lines file: {target_path}")
+        progress_callback(100)
+        return True
+        
+    except Exception as e:
+        logger.error(f"PDF to JSON Lines error: {str(e)}")
+        logger.error(traceback.format_exc())
+        return False
+
+def _build_with_progress(pdf_doc, flowables, progress_callback, end=95):
+    """Build a reportlab document, advancing progress as its flowables are laid out."""
+    progress_callback.begin('layout', len(flowables), 'flowables', end=end)
+    
+    def on_progress(kind, value):
+        if kind == 'PROGRESS':
+            progress_callback.update(value)
+    
+    pdf_doc.setProgressCallBack(on_progress)
+    pdf_doc.build(flowables)
+
+def _run_killable(command, progress_callback):
+    """
+    Run a command in a child process, killing it if the conversion is cancelled.
+    
+    Returns:
+        int: The exit code of the command
+    """
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while True:
+            try:
+                _, stderr = process.communicate(timeout=CANCEL_POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                progress_callback.check()
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    if process.returncode:
+        logger.warning(f"Command exited with code {process.returncode}: "
+                       f"{stderr.decode('utf-8', 'replace').strip()[-500:]}")
+    return process.returncode
+
+def docx_to_pdf(source_path, target_path, progress_callback):
+    """Convert DOCX to PDF using multiple methods."""
+    try:
+        from docx import Document
+        from PyPDF2 import PdfReader
+        progress_callback = as_tracker(progress_callback)
+        progress_callback(20)
+        
+        logger.info(f"Converting DOCX to PDF: {source_path} -> {target_path}")
+        
+        # Try docx2pdf if available
+        if importlib.util.find_spec('docx2pdf') is not None:
             logger.info("Using docx2pdf for conversion")
-            convert(source_path, target_path)
-            
-            # Verify file was created
-            if os.path.exists(target_path) and os.path.getsize(target_path) > 0:
+            try:
+                with atomic_output(target_path) as temp_path:
+                    returncode = _run_killable(DOCX2PDF_COMMAND + [source_path, temp_path],
+                                               progress_callback)
+                    # docx2pdf runs elsewhere, so check it really produced a PDF
+                    if returncode != 0 or os.path.getsize(temp_path) == 0:
+                        raise OSError(f"docx2pdf exited with code {returncode}")
                 logger.info(f"Successfully created PDF file using docx2pdf: {target_path}")
                 progress_callback(100)
                 return True
-            else:
-                logger.warning("docx2pdf conversion failed or created empty file")
-        except ImportError:
+            except OSError as e:
+                logger.warning(f"docx2pdf conversion failed or created empty file: {str(e)}")
+        else:
             logger.warning("docx2pdf not available, trying alternative method")
         
         # Alternative method using python-docx and reportlab
@@ -394,28 +1513,26 @@ def docx_to_pdf(source_path, target_path, progress_callback):
             logger.info("Using python-docx and reportlab for conversion")
             
             # Read the DOCX file
-            doc = Document(source_path)
-            
-            # Extract text content
-            paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
-            
-            # Create a PDF
-            styles = getSampleStyleSheet()
-            pdf_doc = SimpleDocTemplate(target_path, pagesize=letter)
+            progress_callback.begin('decode', os.path.getsize(source_path), 'bytes', end=40)
+            with stage('decode'), open_counted(source_path, progress_callback.advance) as f:
+                doc = Document(f)
             
-            # Convert paragraphs to reportlab paragraphs
-            pdf_elements = [Paragraph(text, styles["Normal"]) for text in paragraphs]
+            with stage('transform'):
+                # Extract text content
+                paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
+                
+                # Convert paragraphs to reportlab paragraphs
+                styles = getSampleStyleSheet()
+                pdf_elements = [Paragraph(text, styles["Normal"]) for text in paragraphs]
             
             # Build the PDF
-            pdf_doc.build(pdf_elements)
+            with stage('write'), atomic_output(target_path) as temp_path:
+                pdf_doc = SimpleDocTemplate(temp_path, pagesize=letter)
+                _build_with_progress(pdf_doc, pdf_elements, progress_callback)
             
-            # Verify file was created
-            if os.path.exists(target_path) and os.path.getsize(target_path) > 0:
-                logger.info(f"Successfully created PDF file using reportlab: {target_path}")
-                progress_callback(100)
-                return True
-            else:
-                logger.warning("reportlab conversion failed or created empty file")
+            logger.info(f"Successfully created PDF file using reportlab: {target_path}")
+            progress_callback(100)
+            return True
         except ImportError:
             logger.warning("reportlab not available, falling back to basic method")
         
@@ -423,7 +1540,8 @@ def docx_to_pdf(source_path, target_path, progress_callback):
         progress_callback(80)
         
         # Read DOCX content
-        doc = Document(source_path)
+        with stage('decode'):
+            doc = Document(source_path)
         content = "\n".join([para.text for para in doc.paragraphs])
         
         # Create a simple PDF with PyPDF2
@@ -478,14 +1596,10 @@ def docx_to_pdf(source_path, target_path, progress_callback):
             output.add_page(new_pdf.pages[page])
         
         # Write to file
-        with open(target_path, "wb") as output_file:
-            output.write(output_file)
+        with stage('write'):
+            with atomic_open(target_path) as output_file:
+                output.write(output_file)
         
-        # Verify file was created
-        if not os.path.exists(target_path):
-            logger.error(f"Failed to create PDF file: {target_path}")
-            return False
-            
         logger.info(f"Successfully created basic PDF file: {target_path}")
         progress_callback(100)
         return True
@@ -498,33 +1612,35 @@ def docx_to_pdf(source_path, target_path, progress_callback):
 def docx_to_text(source_path, target_path, progress_callback):
     """Extract text from a DOCX file."""
     try:
-        progress_callback(20)
+        from docx import Document
+        progress_callback = as_tracker(progress_callback)
         
         logger.info(f"Converting DOCX to text: {source_path} -> {target_path}")
-        doc = Document(source_path)
+        progress_callback.begin('decode', os.path.getsize(source_path), 'bytes', end=50)
+        with stage('decode'), open_counted(source_path, progress_callback.advance) as f:
+            doc = Document(f)
         
-        progress_callback(50)
+        paragraphs = doc.paragraphs
+        tables = doc.tables
+        progress_callback.begin('write', len(paragraphs) + len(tables), 'blocks', end=95)
         
-        with open(target_path, 'w', encoding='utf-8') as text_file:
+        with stage('write'), atomic_open(target_path, 'w', encoding='utf-8') as text_file:
             # Extract text from paragraphs
-            for para in doc.paragraphs:
+            for para in paragraphs:
                 text_file.write(para.text)
                 text_file.write('\n')
+                progress_callback.advance()
             
             # Extract text from tables
-            for table in doc.tables:
+            for table in tables:
                 text_file.write('\n--- TABLE ---\n')
                 for row in table.rows:
                     row_text = [cell.text for cell in row.cells]
                     text_file.write(' | '.join(row_text))
                     text_file.write('\n')
                 text_file.write('--- END TABLE ---\n\n')
+                progress_callback.advance()
         
-        # Verify file was created
-        if not os.path.exists(target_path):
-            logger.error(f"Failed to create text file: {target_path}")
-            return False
-            
         logger.info(f"Successfully created text file: {target_path}")
         progress_callback(100)
         return True
@@ -534,9 +1650,18 @@ def docx_to_text(source_path, target_path, progress_callback):
         logger.error(traceback.format_exc())
         return False
 
+def _read_text(source_path, progress_callback, end):
+    """Read a UTF-8 text file, advancing progress by the bytes read."""
+    progress_callback.begin('decode', os.path.getsize(source_path), 'bytes', end=end)
+    with open_counted(source_path, progress_callback.advance) as f:
+        text_file = io.TextIOWrapper(f, encoding='utf-8')
+        return ''.join(iter(lambda: text_file.read(READ_CHUNK_SIZE), ''))
+
 def text_to_pdf(source_path, target_path, progress_callback):
     """Convert plain text to PDF."""
     try:
+        from PyPDF2 import PdfReader
+        progress_callback = as_tracker(progress_callback)
         progress_callback(20)
         
         logger.info(f"Converting text to PDF: {source_path} -> {target_path}")
@@ -551,42 +1676,39 @@ def text_to_pdf(source_path, target_path, progress_callback):
             logger.info("Using reportlab for text to PDF conversion")
             
             # Read the text file
-            with open(source_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Split into paragraphs
-            paragraphs = content.split('\n')
-            
-            # Create a PDF
-            styles = getSampleStyleSheet()
-            pdf_doc = SimpleDocTemplate(target_path, pagesize=letter)
+            with stage('decode'):
+                content = _read_text(source_path, progress_callback, end=30)
             
-            # Convert paragraphs to reportlab paragraphs
-            pdf_elements = []
-            for text in paragraphs:
-                if text.strip():  # Skip empty lines
-                    pdf_elements.append(Paragraph(text, styles["Normal"]))
-                else:
-                    # Add spacer for empty lines
-                    pdf_elements.append(Paragraph("&nbsp;", styles["Normal"]))
+            with stage('transform'):
+                # Split into paragraphs
+                paragraphs = content.split('\n')
+                
+                # Convert paragraphs to reportlab paragraphs
+                styles = getSampleStyleSheet()
+                pdf_elements = []
+                for text in paragraphs:
+                    if text.strip():  # Skip empty lines
+                        pdf_elements.append(Paragraph(text, styles["Normal"]))
+                    else:
+                        # Add spacer for empty lines
+                        pdf_elements.append(Paragraph("&nbsp;", styles["Normal"]))
             
             # Build the PDF
-            pdf_doc.build(pdf_elements)
+            with stage('write'), atomic_output(target_path) as temp_path:
+                pdf_doc = SimpleDocTemplate(temp_path, pagesize=letter)
+                _build_with_progress(pdf_doc, pdf_elements, progress_callback)
             
-            # Verify file was created
-            if os.path.exists(target_path) and os.path.getsize(target_path) > 0:
-                logger.info(f"Successfully created PDF file using reportlab: {target_path}")
-                progress_callback(100)
-                return True
-            else:
-                logger.warning("reportlab conversion failed or created empty file")
+            logger.info(f"Successfully created PDF file using reportlab: {target_path}")
+            progress_callback(100)
+            return True
             
         except ImportError:
             logger.warning("reportlab not available, using basic method")
         
         # Basic method using PyPDF2 and canvas
-        with open(source_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with stage('decode'):
+            with open(source_path, 'r', encoding='utf-8') as f:
+                content = f.read()
         
         progress_callback(50)
         
@@ -643,16 +1765,12 @@ def text_to_pdf(source_path, target_path, progress_callback):
             output.add_page(new_pdf.pages[page])
         
         # Write to file
-        with open(target_path, "wb") as output_file:
-            output.write(output_file)
+        with stage('write'):
+            with atomic_open(target_path) as output_file:
+                output.write(output_file)
         
         progress_callback(80)
         
-        # Verify file was created
-        if not os.path.exists(target_path):
-            logger.error(f"Failed to create PDF file: {target_path}")
-            return False
-            
         logger.info(f"Successfully created PDF file: {target_path}")
         progress_callback(100)
         return True
@@ -665,34 +1783,30 @@ def text_to_pdf(source_path, target_path, progress_callback):
 def text_to_docx(source_path, target_path, progress_callback):
     """Convert plain text to DOCX."""
     try:
-        progress_callback(20)
+        from docx import Document
+        progress_callback = as_tracker(progress_callback)
         
         logger.info(f"Converting text to DOCX: {source_path} -> {target_path}")
-        with open(source_path, 'r', encoding='utf-8') as text_file:
-            text = text_file.read()
-        
-        progress_callback(50)
-        
-        doc = Document()
-        # Split text into paragraphs by newlines
-        paragraphs = text.split('\n')
-        
-        for paragraph in paragraphs:
-            # Skip empty paragraphs but add an empty paragraph for spacing
-            if paragraph.strip():
-                doc.add_paragraph(paragraph)
-            else:
-                doc.add_paragraph()
-        
-        progress_callback(80)
+        with stage('decode'):
+            text = _read_text(source_path, progress_callback, end=20)
+        
+        with stage('transform'):
+            doc = Document()
+            # Split text into paragraphs by newlines
+            paragraphs = text.split('\n')
+            progress_callback.begin('transform', len(paragraphs), 'paragraphs', end=80)
+            
+            for paragraph in paragraphs:
+                # Skip empty paragraphs but add an empty paragraph for spacing
+                if paragraph.strip():
+                    doc.add_paragraph(paragraph)
+                else:
+                    doc.add_paragraph()
+                progress_callback.advance()
         
-        doc.save(target_path)
+        with stage('write'), atomic_output(target_path) as temp_path:
+            doc.save(temp_path)
         
-        # Verify file was created
-        if not os.path.exists(target_path):
-            logger.error(f"Failed to create DOCX file: {target_path}")
-            return False
-            
         logger.info(f"Successfully created DOCX file: {target_path}")
         progress_callback(100)
         return True
@@ -702,29 +1816,875 @@ def text_to_docx(source_path, target_path, progress_callback):
         logger.error(traceback.format_exc())
         return False
 
-def convert_data_format(source_path, target_format, target_path, progress_callback):
+def _float_representatives(values):
+    """
+    Pick the few values that decide how pandas formats a float column in HTML.
+    
+    pandas chooses the number of decimals and fixed or scientific notation
+    from the whole column: the widest values, the smallest non-zero value and
+    the value needing the most decimals. Formatting a chunk together with
+    these values reproduces the formatting of the complete column.
+    """
+    import numpy as np
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return []
+    representatives = [values.max(), values.min()]
+    nonzero = np.abs(values[values != 0])
+    if len(nonzero):
+        representatives.append(values[values != 0][nonzero.argmin()])
+    rounded = np.round(values, 6)
+    decimals = np.full(len(values), 6)
+    for digits in range(5, -1, -1):
+        decimals[np.round(values, digits) == rounded] = digits
+    representatives.append(values[decimals.argmax()])
+    return representatives
+
+def _csv_bool_converter(missing):
+    """
+    Build a read_csv converter that parses a boolean column with missing values.
+    
+    Other text raises ValueError, since it means the column is not boolean.
+    """
+    def convert(text):
+        if text in CSV_BOOL_VALUES:
+            return CSV_BOOL_VALUES[text]
+        if text in CSV_NA_VALUES:
+            return missing
+        raise ValueError(f"Not a boolean: {text!r}")
+    return convert
+
+def _csv_column_types(chunk):
+    """
+    Work out how to read every column of a CSV file with the types it has in one chunk.
+    
+    Returns:
+        tuple: (dtype of each column, columns holding booleans and missing values)
+    """
+    import pandas as pd
+    dtypes = {}
+    bool_columns = []
+    for column in chunk.columns:
+        values = chunk[column]
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) == 'boolean':
+            bool_columns.append(column)
+        else:
+            dtypes[column] = values.dtype
+    return dtypes, bool_columns
+
+def _scan_csv_chunks(source, chunksize, collect_float_formats, read_kwargs):
+    """
+    First pass over a CSV file that works out how to read it chunk by chunk.
+    
+    Chunks are typed independently, so a column that holds integers in one
+    chunk and blanks in another would be written differently than when the
+    whole file is read at once. This pass finds the type each column gets
+    for the whole file and, for HTML output, the values that decide float
+    formatting. Blank chunks of a column do not count towards its type.
+    
+    Returns:
+        tuple: (dtype overrides, columns holding booleans and missing
+            values, float representatives per column, chunk count, row count)
+    """
+    import pandas as pd
+    import numpy as np
+    column_kinds = {}
+    has_missing = set()
+    numeric_values = {}
+    chunk_count = 0
+    row_count = 0
+    for chunk in pd.read_csv(source, chunksize=chunksize, **read_kwargs):
+        chunk_count += 1
+        row_count += len(chunk)
+        for column in chunk.columns:
+            values = chunk[column]
+            kinds = column_kinds.setdefault(column, set())
+            missing = values.isna()
+            if missing.any():
+                has_missing.add(column)
+                if missing.all():
+                    continue
+            if values.dtype == bool or (values.dtype == object and
+                                        pd.api.types.infer_dtype(values, skipna=True) == 'boolean'):
+                kinds.add('bool')
+            else:
+                kinds.add(values.dtype)
+            if collect_float_formats and values.dtype.kind in 'iuf':
+                values = values.to_numpy(dtype=float)
+                values = np.concatenate([np.array(numeric_values.get(column, []), dtype=float),
+                                         values])
+                numeric_values[column] = _float_representatives(values)
+    
+    overrides = {}
+    bool_columns = []
+    final_kinds = {}
+    for column, kinds in column_kinds.items():
+        if kinds == {'bool'}:
+            # Read as True/False with gaps, never as the strings "True"/"False"
+            if column in has_missing:
+                bool_columns.append(column)
+            continue
+        if len(kinds) == 1:
+            dtype = next(iter(kinds))
+            if dtype.kind in 'iu' and column in has_missing:
+                overrides[column] = 'float64'
+            elif dtype.kind not in 'iuf' and column in has_missing:
+                # Blank chunks were typed as float; give them the column's type
+                overrides[column] = dtype
+            final_kinds[column] = 'f' if overrides.get(column) == 'float64' else dtype.kind
+        elif all(kind != 'bool' and kind.kind in 'iuf' for kind in kinds):
+            overrides[column] = 'float64'
+            final_kinds[column] = 'f'
+        else:
+            # Mixed columns come out as text, as they do when read in one go
+            overrides[column] = 'object'
+            final_kinds[column] = 'O'
+    
+    float_formats = {}
+    for column, representatives in numeric_values.items():
+        if final_kinds.get(column) == 'f' and representatives:
+            float_formats[column] = representatives
+    return overrides, bool_columns, float_formats, chunk_count, row_count
+
+def _html_rows(html):
+    """Split DataFrame.to_html output into its header, body rows and footer."""
+    head, rest = html.split('  <tbody>\n', 1)
+    body, tail = rest.rsplit('  </tbody>', 1)
+    rows = [row + '    </tr>\n' for row in body.split('    </tr>\n')[:-1]]
+    return head + '  <tbody>\n', rows, '  </tbody>' + tail
+
+def _stream_csv(source_path, target_format, target_path, progress_callback, chunksize,
+                read_engine=None):
+    """
+    Convert a CSV file chunk by chunk so memory use is bounded by the chunk size.
+    
+    The output is the same as reading the whole file into one DataFrame and
+    writing it with the in-memory path. Every chunk is read with the column
+    types of the first one, so the file is parsed once. Only when a later
+    chunk does not fit those types (say, blanks in an integer column), and
+    always for HTML, whose float formatting depends on every value, is the
+    whole file scanned first, which parses it twice.
+    
+    Returns:
+        bool: True if the file was streamed, False if it has no rows to stream
+    """
+    import pandas as pd
+    logger.info(f"Streaming CSV in chunks of {chunksize} rows")
+    # Only the C parser can read in chunks. pyarrow parses floats exactly, so
+    # match it when it is the engine the in-memory path would use.
+    read_kwargs = {}
+    whole_file_engine = _engine_candidates(DATA_READ_ENGINES['.csv'], read_engine)[0]
+    if whole_file_engine == 'pyarrow':
+        read_kwargs['float_precision'] = 'round_trip'
+    # Missing booleans are None when pyarrow reads the whole file, NaN with the C parser
+    missing = None if whole_file_engine == 'pyarrow' else float('nan')
+    progress_callback = as_tracker(progress_callback)
+    
+    if target_format != 'html':
+        with stage('decode'):
+            first_chunk = pd.read_csv(source_path, nrows=chunksize, **read_kwargs)
+        if len(first_chunk) == 0:
+            return False
+        dtypes, bool_columns = _csv_column_types(first_chunk)
+        del first_chunk
+        progress_callback.begin('write', os.path.getsize(source_path), 'bytes', end=95)
+        try:
+            with open_counted(source_path, progress_callback.advance) as f:
+                chunks = pd.read_csv(
+                    f, chunksize=chunksize, dtype=dtypes,
+                    converters={column: _csv_bool_converter(missing) for column in bool_columns},
+                    **read_kwargs)
+                with stage('write'):
+                    written_chunks = _write_data_chunks(timed_iter(chunks, 'decode'),
+                                                        target_format, target_path)
+            logger.info(f"Streamed {written_chunks} chunks to {target_path}")
+            return True
+        except (ValueError, OverflowError) as e:
+            logger.info(f"Column types change after the first chunk ({str(e)}), "
+                        f"scanning the whole file first")
+    
+    progress_callback.begin('scan', os.path.getsize(source_path), 'bytes', end=30)
+    with stage('decode'), open_counted(source_path, progress_callback.advance) as f:
+        dtype_overrides, bool_columns, float_formats, chunk_count, row_count = _scan_csv_chunks(
+            f, chunksize, target_format == 'html', read_kwargs)
+    if chunk_count == 0:
+        return False
+    if dtype_overrides or bool_columns:
+        logger.info(f"Reconciled column types across chunks: {dtype_overrides}, "
+                    f"booleans with missing values: {bool_columns}")
+    progress_callback.begin('write', row_count, 'rows', end=95)
+    
+    bool_converters = {column: _csv_bool_converter(missing) for column in bool_columns}
+    chunks = pd.read_csv(source_path, chunksize=chunksize, dtype=dtype_overrides or None,
+                         converters=bool_converters or None, **read_kwargs)
+    with stage('write'):
+        written_chunks = _write_data_chunks(
+            timed_iter(chunks, 'decode'), target_format, target_path, float_formats,
+            progress_callback.advance)
+    logger.info(f"Streamed {written_chunks} chunks to {target_path}")
+    return True
+
+def _xml_tag(name):
+    """Turn a column name into a valid XML element name."""
+    tag = re.sub(r'[^\w.\-]', '_', str(name))
+    if not tag or not (tag[0].isalpha() or tag[0] == '_'):
+        tag = '_' + tag
+    return tag
+
+def _xml_elements(tag, values):
+    """
+    Render one column as an array of XML elements, one per row.
+    
+    Missing and empty values become self-closing elements, as with
+    DataFrame.to_xml. Text values are escaped and stripped of characters
+    that XML cannot represent.
+    """
+    import pandas as pd
+    import numpy as np
+    values = pd.Series(values)
+    missing = values.isna().to_numpy()
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'iufb':
+        # Numbers never need escaping, so numpy can format them in one go
+        text = values.to_numpy().astype(str).astype(object)
+    else:
+        text = np.array([str(value).translate(XML_ESCAPES) if not is_missing else ''
+                         for value, is_missing in zip(values.to_numpy(dtype=object), missing)],
+                        dtype=object)
+        missing = missing | (text == '')
+    return np.where(missing, f'    <{tag}/>\n', f'    <{tag}>' + text + f'</{tag}>\n')
+
+def _write_xml_rows(df, f, on_rows=None):
+    """
+    Append a <row> element for every DataFrame row to an open XML file.
+    
+    Rows are built column by column with array operations in batches of
+    XML_BATCH_ROWS, so memory does not grow with the number of rows.
+    on_rows is called with the number of rows in each batch written.
+    """
+    import numpy as np
+    tags = [_xml_tag(column) for column in df.columns]
+    for start in range(0, len(df), XML_BATCH_ROWS):
+        with stage('encode'):
+            batch = df.iloc[start:start + XML_BATCH_ROWS]
+            rows = np.full(len(batch), '  <row>\n', dtype=object)
+            rows = rows + _xml_elements('index', batch.index)
+            for position, tag in enumerate(tags):
+                rows = rows + _xml_elements(tag, batch.iloc[:, position])
+            text = ''.join(rows + '  </row>\n')
+        f.write(text)
+        if on_rows:
+            on_rows(len(batch))
+
+def _write_data_chunks(chunks, target_format, target_path, float_formats=None, on_chunk=None):
+    """
+    Write DataFrame chunks as a single CSV, JSON, XML or HTML file.
+    
+    The result is the same as concatenating the chunks and writing them in
+    one go. For HTML, float_formats maps float columns to the values that
+    decide their formatting (see _float_representatives). on_chunk is
+    called with the number of rows in each chunk once it is written.
+    
+    Returns:
+        int: Number of chunks written
+    """
+    import pandas as pd
+    float_formats = float_formats or {}
+    written_chunks = 0
+    written_rows = 0
+    wrote_records = False
+    with atomic_open(target_path, 'w', encoding='utf-8', newline='') as f:
+        html_tail = None
+        if target_format == 'json':
+            f.write('[')
+        for chunk in chunks:
+            # Keep the row index running across chunks, as it would for one frame
+            chunk.index = pd.RangeIndex(written_rows, written_rows + len(chunk))
+            if target_format == 'csv':
+                chunk.to_csv(f, index=False, header=(written_chunks == 0))
+            elif target_format == 'json':
+                records = chunk.to_json(orient='records')[1:-1]
+                if records:
+                    f.write(',' + records if wrote_records else records)
+                    wrote_records = True
+            elif target_format == 'xml':
+                if written_chunks == 0:
+                    f.write(XML_HEADER)
+                _write_xml_rows(chunk, f)
+            elif target_format == 'html':
+                padding = max((len(r) for r in float_formats.values()), default=0)
+                if padding and len(chunk):
+                    # Format the chunk alongside the column-wide representative
+                    # values, then drop them again
+                    prefix = chunk.iloc[[0] * padding].copy()
+                    for column, representatives in float_formats.items():
+                        prefix[column] = (representatives * padding)[:padding]
+                    head, rows, html_tail = _html_rows(
+                        pd.concat([prefix, chunk]).to_html(index=False))
+                    rows = rows[padding:]
+                else:
+                    head, rows, html_tail = _html_rows(chunk.to_html(index=False))
+                if written_chunks == 0:
+                    f.write(head)
+                f.writelines(rows)
+            
+            written_chunks += 1
+            written_rows += len(chunk)
+            if on_chunk:
+                on_chunk(len(chunk))
+        
+        if target_format == 'json':
+            f.write(']')
+        elif target_format == 'xml':
+            f.write(XML_FOOTER)
+        elif target_format == 'html':
+            f.write(html_tail)
+    return written_chunks
+
+def _engine_candidates(engines, requested=None):
+    """
+    Order the installed engines of a preference list for trying one after another.
+    
+    Args:
+        engines: List of (engine, module) pairs, fastest first
+        requested: Engine to try first, or None/'auto' for the fastest installed one
+    
+    Returns:
+        list: Engine names to try, ending with pandas' default engine
+    """
+    installed = [engine for engine, module in engines
+                 if module is None or importlib.util.find_spec(module) is not None]
+    if requested and requested != 'auto':
+        if requested in installed:
+            installed.remove(requested)
+            installed.insert(0, requested)
+        else:
+            logger.warning(f"Engine '{requested}' is not available, using {installed[0]}")
+    return installed
+
+def _restore_text_dates(source_path, df):
+    """
+    Turn columns the pyarrow parser read as dates back into the original text.
+    
+    The C parser leaves dates as strings, so without this the output of a
+    conversion would depend on which engine happened to be installed.
+    """
+    import pandas as pd
+    date_columns = [column for column in df.columns
+                    if df[column].dtype.kind == 'M'
+                    or pd.api.types.infer_dtype(df[column], skipna=True) in ('date', 'datetime')]
+    if date_columns:
+        text = pd.read_csv(source_path, engine='pyarrow', usecols=date_columns,
+                           dtype={column: str for column in date_columns})
+        for column in date_columns:
+            df[column] = text[column]
+    return df
+
+def _read_table(source_path, source_ext, requested_engine=None, sheet_name=0, on_read=None):
+    """
+    Read a CSV or Excel file with the fastest available engine, falling back on failure.
+    
+    on_read, when given, is called with the number of source bytes read as
+    the engine reads them.
+    """
+    import pandas as pd
+    reader = pd.read_csv if source_ext == '.csv' else pd.read_excel
+    read_kwargs = {} if source_ext == '.csv' else {'sheet_name': sheet_name}
+    candidates = _engine_candidates(DATA_READ_ENGINES[source_ext], requested_engine)
+    for i, engine in enumerate(candidates):
+        try:
+            with stage('decode'):
+                if on_read:
+                    with open_counted(source_path, on_read) as f:
+                        df = reader(f, engine=engine, **read_kwargs)
+                else:
+                    df = reader(source_path, engine=engine, **read_kwargs)
+            if engine == 'pyarrow':
+                df = _restore_text_dates(source_path, df)
+            logger.info(f"Read {source_path} with the {engine} engine")
+            return df
+        except Exception as e:
+            if i == len(candidates) - 1:
+                raise
+            logger.warning(f"{engine} engine failed ({str(e)}), falling back to {candidates[i + 1]}")
+
+def _write_excel(df, target_path, requested_engine=None):
+    """Write an Excel file with the fastest available engine, falling back on failure."""
+    candidates = _engine_candidates(DATA_WRITE_ENGINES['xlsx'], requested_engine)
+    for i, engine in enumerate(candidates):
+        try:
+            with atomic_output(target_path) as temp_path:
+                df.to_excel(temp_path, index=False, engine=engine)
+            logger.info(f"Wrote {target_path} with the {engine} engine")
+            return
+        except Exception as e:
+            if i == len(candidates) - 1:
+                raise
+            logger.warning(f"{engine} engine failed ({str(e)}), falling back to {candidates[i + 1]}")
+
+def _open_arrow_source(source_path, source_ext, on_read=None):
+    """
+    Open a CSV, Parquet or Feather file as a stream of pyarrow record batches.
+    
+    on_read, when given, is called with the number of CSV bytes read.
+    
+    Returns:
+        tuple: (schema, batch iterator, total rows or None when unknown)
+    """
+    import pyarrow as pa
+    
+    if source_ext == '.csv':
+        import pyarrow.csv as pa_csv
+        reader = pa_csv.open_csv(open_counted(source_path, on_read) if on_read else source_path)
+        return reader.schema, iter(reader), None
+    
+    if source_ext == '.parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(source_path)
+        return (parquet_file.schema_arrow, parquet_file.iter_batches(batch_size=ARROW_BATCH_ROWS),
+                parquet_file.metadata.num_rows)
+    
+    # Feather v2 is the Arrow IPC file format, which can be read a batch at a time
+    source = pa.memory_map(source_path, 'r')
+    try:
+        reader = pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        # Feather v1 files have no record batches to stream
+        source.close()
+        import pyarrow.feather as feather
+        table = feather.read_table(source_path)
+        return table.schema, iter(table.to_batches()), table.num_rows
+    
+    def batches():
+        with source:
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+    
+    return reader.schema, batches(), reader.count_rows()
+
+def _open_arrow_writer(target_path, target_format, schema, options):
+    """Create a Parquet or Feather writer honouring the compression options."""
+    import pyarrow as pa
+    
+    compression = options.get('compression', DEFAULT_COMPRESSION[target_format])
+    if compression in (None, 'none', 'uncompressed'):
+        compression = None
+    level = options.get('compression_level')
+    logger.info(f"Writing {target_format} with {compression or 'no'} compression")
+    
+    if target_format == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(target_path, schema, compression=compression or 'none',
+                                compression_level=level)
+    
+    codec = pa.Codec(compression, compression_level=level) if compression else None
+    return pa.ipc.new_file(target_path, schema, options=pa.ipc.IpcWriteOptions(compression=codec))
+
+def _write_arrow_table(df, target_format, target_path, options):
+    """Write an in-memory DataFrame as Parquet or Feather."""
+    import pyarrow as pa
+    
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with atomic_output(target_path) as temp_path:
+        writer = _open_arrow_writer(temp_path, target_format, table.schema, options)
+        try:
+            writer.write_table(table)
+        finally:
+            writer.close()
+
+def _float_formats_from_chunks(chunks):
+    """Collect the values that decide HTML float formatting for every float column."""
+    import numpy as np
+    float_formats = {}
+    for chunk in chunks:
+        for column in chunk.columns:
+            if chunk[column].dtype.kind == 'f':
+                values = np.concatenate([np.array(float_formats.get(column, []), dtype=float),
+                                         chunk[column].to_numpy(dtype=float)])
+                float_formats[column] = _float_representatives(values)
+    return {column: values for column, values in float_formats.items() if values}
+
+def _write_excel_chunks(chunks, target_path, requested_engine=None):
+    """Append DataFrame chunks to a single Excel sheet."""
+    import pandas as pd
+    engine = _engine_candidates(DATA_WRITE_ENGINES['xlsx'], requested_engine)[0]
+    next_row = 0
+    with atomic_output(target_path) as temp_path, pd.ExcelWriter(temp_path, engine=engine) as writer:
+        for chunk in chunks:
+            # The header takes the first row of the sheet
+            chunk.to_excel(writer, index=False, header=(next_row == 0), startrow=next_row)
+            next_row += len(chunk) + (1 if next_row == 0 else 0)
+
+def _arrow_null_columns(source_path, source_ext, names):
+    """
+    Return which of the named columns of a Parquet/Feather file contain nulls.
+    
+    Parquet row group statistics answer this without reading the data;
+    files without them, and Feather files, are scanned once.
+    """
+    if source_ext == '.parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(source_path)
+        metadata = parquet_file.metadata
+        null_columns = set()
+        complete = True
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            for j in range(row_group.num_columns):
+                column = row_group.column(j)
+                if column.path_in_schema not in names:
+                    continue
+                statistics = column.statistics
+                if statistics is None or not statistics.has_null_count:
+                    complete = False
+                elif statistics.null_count:
+                    null_columns.add(column.path_in_schema)
+        if complete:
+            return null_columns
+        batches = parquet_file.iter_batches(batch_size=ARROW_BATCH_ROWS, columns=list(names))
+    else:
+        batches = _open_arrow_source(source_path, source_ext)[1]
+    
+    null_columns = set()
+    for batch in batches:
+        for name in names:
+            if batch.column(name).null_count:
+                null_columns.add(name)
+    return null_columns
+
+def _arrow_pandas_dtypes(source_path, source_ext, schema):
+    """
+    Pick the pandas dtypes a whole-file read would give columns whose dtype depends on nulls.
+    
+    to_pandas() turns an integer column into float64, and a boolean column
+    into object, only when the batch at hand has nulls, so batches converted
+    one by one would otherwise disagree with each other and with a read of
+    the whole file.
+    
+    Returns:
+        dict: Column name -> dtype, for the columns that need casting
+    """
+    import pyarrow as pa
+    
+    names = [field.name for field in schema
+             if pa.types.is_integer(field.type) or pa.types.is_boolean(field.type)]
+    if not names:
+        return {}
+    null_columns = _arrow_null_columns(source_path, source_ext, names)
+    return {field.name: 'float64' if pa.types.is_integer(field.type) else object
+            for field in schema if field.name in null_columns}
+
+def _arrow_frames(batches, dtypes=None):
+    """
+    Convert record batches to DataFrames, timing the read and the conversion.
+    
+    Columns in dtypes are cast to the given dtype in every frame.
+    """
+    for batch in timed_iter(batches, 'decode'):
+        with stage('transform'):
+            df = batch.to_pandas()
+            if dtypes:
+                df = df.astype(dtypes)
+        yield df
+
+def _convert_columnar(source_path, source_ext, target_format, target_path, progress_callback,
+                      options):
+    """
+    Convert to or from Parquet/Feather one record batch at a time.
+    
+    Batches flow straight from the source reader to the target writer, so
+    the data is never held as one complete pandas DataFrame.
+    """
+    import pyarrow as pa
+    
+    progress_callback = as_tracker(progress_callback)
+    if source_ext == '.csv':
+        # The row count of a CSV file is unknown up front, so follow the bytes read
+        progress_callback.begin('convert', os.path.getsize(source_path), 'bytes', end=95)
+        schema, batches, total_rows = _open_arrow_source(source_path, source_ext,
+                                                         progress_callback.advance)
+    else:
+        schema, batches, total_rows = _open_arrow_source(source_path, source_ext)
+        progress_callback.begin('convert', total_rows, 'rows', end=95)
+    rows_done = 0
+    
+    def track(batch_iter):
+        nonlocal rows_done
+        for batch in batch_iter:
+            yield batch
+            rows_done += batch.num_rows
+            if source_ext != '.csv':
+                progress_callback.advance(batch.num_rows)
+    
+    if target_format in COLUMNAR_FORMATS:
+        try:
+            with atomic_output(target_path) as temp_path:
+                writer = _open_arrow_writer(temp_path, target_format, schema, options)
+                try:
+                    for batch in timed_iter(track(batches), 'decode'):
+                        with stage('write'):
+                            writer.write_batch(batch)
+                finally:
+                    writer.close()
+        except pa.ArrowInvalid as e:
+            if source_ext != '.csv':
+                raise
+            # pyarrow infers CSV column types from the first block only; a
+            # later block that disagrees needs the whole file to type it
+            logger.warning(f"Streaming CSV read failed ({str(e)}), reading the whole file")
+            _write_arrow_table(_read_table(source_path, source_ext, options.get('read_engine')),
+                               target_format, target_path, options)
+            return True
+    else:
+        with stage('decode'):
+            dtypes = _arrow_pandas_dtypes(source_path, source_ext, schema)
+        if target_format == 'xlsx':
+            with stage('write'):
+                _write_excel_chunks(_arrow_frames(track(batches), dtypes), target_path,
+                                    options.get('write_engine'))
+        else:
+            float_formats = None
+            if target_format == 'html':
+                float_formats = _float_formats_from_chunks(
+                    _arrow_frames(_open_arrow_source(source_path, source_ext)[1], dtypes))
+            with stage('write'):
+                _write_data_chunks(_arrow_frames(track(batches), dtypes), target_format,
+                                   target_path, float_formats)
+    
+    logger.info(f"Converted {rows_done} rows batch by batch")
+    return True
+
+def _write_dataframe(df, target_format, target_path, options, on_rows=None):
+    """
+    Write a DataFrame in the target data format; returns False for unknown formats.
+    
+    on_rows is called with the number of rows in each batch for formats
+    written in batches (XML), and with all rows once the others are written.
+    """
+    with stage('write'):
+        if target_format == 'csv':
+            logger.info("Writing to CSV format")
+            with atomic_open(target_path, 'w', encoding='utf-8', newline='') as f:
+                df.to_csv(f, index=False)
+        elif target_format == 'xlsx':
+            logger.info("Writing to Excel format")
+            _write_excel(df, target_path, options.get('write_engine'))
+        elif target_format == 'json':
+            logger.info("Writing to JSON format")
+            with atomic_open(target_path, 'w', encoding='utf-8', newline='') as f:
+                df.to_json(f, orient='records')
+        elif target_format == 'xml':
+            logger.info("Writing to XML format")
+            with atomic_open(target_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(XML_HEADER)
+                _write_xml_rows(df, f, on_rows)
+                f.write(XML_FOOTER)
+        elif target_format == 'html':
+            logger.info("Writing to HTML format")
+            with atomic_open(target_path, 'w', encoding='utf-8', newline='') as f:
+                df.to_html(f, index=False)
+        elif target_format in COLUMNAR_FORMATS:
+            logger.info(f"Writing to {target_format} format")
+            _write_arrow_table(df, target_format, target_path, options)
+        else:
+            logger.error(f"Unsupported target format: {target_format}")
+            return False
+    if on_rows and target_format != 'xml':
+        on_rows(len(df))
+    return True
+
+def _select_sheets(source_path, sheets, requested_engine=None):
+    """Resolve the sheets option to worksheet names, in workbook order for 'all'."""
+    import pandas as pd
+    if sheets is None:
+        sheets = [0]
+    elif isinstance(sheets, str):
+        if sheets.strip().lower() in ('all', '*'):
+            sheets = None
+        else:
+            sheets = [name.strip() for name in sheets.split(',') if name.strip()]
+    elif isinstance(sheets, int):
+        sheets = [sheets]
+    
+    engine = _engine_candidates(DATA_READ_ENGINES['.xlsx'], requested_engine)[0]
+    with pd.ExcelFile(source_path, engine=engine) as workbook:
+        names = list(workbook.sheet_names)
+    if sheets is None:
+        return names
+    
+    selected = []
+    for sheet in sheets:
+        if isinstance(sheet, int):
+            if not -len(names) <= sheet < len(names):
+                raise ValueError(f"Workbook has {len(names)} sheets, no sheet at position {sheet}")
+            sheet = names[sheet]
+        elif sheet not in names:
+            raise ValueError(f"Sheet {sheet!r} not found; available sheets: {', '.join(names)}")
+        if sheet not in selected:
+            selected.append(sheet)
+    return selected
+
+def _sheet_target_paths(target_path, sheet_names):
+    """
+    Build the output path for each worksheet, e.g. report_Q1.csv.
+    
+    Sheets whose names only differ in characters that are replaced in file
+    names (e.g. "Q1 2024" and "Q1_2024") get their 1-based position added,
+    as in report_Q1_2024_1.csv and report_Q1_2024_2.csv.
+    
+    Returns:
+        list: Output path of each sheet, in the order of sheet_names
+    """
+    base, ext = os.path.splitext(target_path)
+    safe_names = [re.sub(r'[^\w\-]+', '_', name).strip('_') or 'sheet' for name in sheet_names]
+    # Compare case-insensitively, since many filesystems do
+    counts = {}
+    for safe_name in safe_names:
+        counts[safe_name.lower()] = counts.get(safe_name.lower(), 0) + 1
+    paths = [f"{base}_{safe_name}{ext}" if counts[safe_name.lower()] == 1
+             else f"{base}_{safe_name}_{position + 1}{ext}"
+             for position, safe_name in enumerate(safe_names)]
+    if len(set(path.lower() for path in paths)) != len(paths):
+        raise ValueError(f"Sheet names {sheet_names} do not map to distinct file names")
+    return paths
+
+def _convert_sheet(source_path, sheet_name, target_format, target_path, options, fsync=False):
+    """
+    Parse one worksheet and write it out; runs in a worker process.
+    
+    Returns the records as a JSON string when target_path is None, so the
+    parent can assemble a combined document, otherwise the written path,
+    which is fsynced when fsync is set.
+    """
+    df = _read_table(source_path, '.xlsx', options.get('read_engine'), sheet_name)
+    if target_path is None:
+        return df.to_json(orient='records')
+    with sync_outputs() if fsync else nullcontext():
+        if not _write_dataframe(df, target_format, target_path, options):
+            raise ValueError(f"Unsupported target format: {target_format}")
+    return target_path
+
+def _convert_sheets(source_path, sheet_names, target_format, target_path, progress_callback,
+                    options):
+    """Convert several worksheets concurrently, one worker process per sheet."""
+    combine = target_format == 'json'
+    if combine:
+        paths = [None] * len(sheet_names)
+    else:
+        paths = _sheet_target_paths(target_path, sheet_names)
+    jobs = list(zip(sheet_names, paths))
+    for name, path in jobs:
+        if path is not None:
+            expect_output(path)
+    workers = min(len(jobs), _pool_workers or os.cpu_count() or 1)
+    logger.info(f"Converting {len(jobs)} sheets with {workers} workers")
+    
+    results = {}
+    
+    progress_callback = as_tracker(progress_callback)
+    progress_callback.begin('sheets', len(jobs), 'sheets', end=95)
+    
+    def finish(name, result):
+        results[name] = result
+        progress_callback.advance()
+    
+    pool = None
+    if workers > 1:
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError) as e:
+            logger.warning(f"Could not start sheet workers ({str(e)}), converting in-process")
+    
+    if pool is not None:
+        with pool:
+            try:
+                futures = {pool.submit(_run_measured, _convert_sheet, source_path, name,
+                                       target_format, path, options, outputs_synced()): name
+                           for name, path in jobs}
+                for future in _as_completed(futures, progress_callback):
+                    result, stages = future.result()
+                    _merge_worker_stages(stages)
+                    finish(futures[future], result)
+            except BaseException:
+                _terminate_pool(pool)
+                raise
+    else:
+        for name, path in jobs:
+            finish(name, _convert_sheet(source_path, name, target_format, path, options))
+    
+    if combine:
+        with atomic_open(target_path, 'w', encoding='utf-8') as f:
+            f.write('{')
+            for i, name in enumerate(sheet_names):
+                if i:
+                    f.write(',')
+                f.write(json.dumps(name) + ':' + results[name])
+            f.write('}')
+    return True
+
+def convert_data_format(source_path, target_format, target_path, progress_callback, options=None):
     """Convert between data formats (CSV, Excel, JSON, etc.)."""
     try:
+        import pandas as pd
+        progress_callback = as_tracker(progress_callback)
         progress_callback(10)
+        options = options or {}
         
         logger.info(f"Converting data format: {source_path} -> {target_path} ({target_format})")
         # Read source file based on its extension
         source_ext = os.path.splitext(source_path)[1].lower()
         
+        if not _format_supported(source_ext) or not _format_supported(target_format):
+            logger.error(f"pyarrow is required to convert {source_ext} to {target_format}")
+            return False
+        
+        if source_ext in ('.parquet', '.feather') or (
+                source_ext == '.csv' and target_format in COLUMNAR_FORMATS):
+            if not _convert_columnar(source_path, source_ext, target_format, target_path,
+                                     progress_callback, options):
+                return False
+            logger.info(f"Successfully created {target_format} file: {target_path}")
+            progress_callback(100)
+            return True
+        
+        if source_ext == '.csv' and target_format in STREAMABLE_DATA_FORMATS:
+            chunksize = options.get('chunksize')
+            if chunksize or os.path.getsize(source_path) > CSV_STREAM_THRESHOLD:
+                if _stream_csv(source_path, target_format, target_path, progress_callback,
+                               chunksize or CSV_CHUNK_ROWS, options.get('read_engine')):
+                    logger.info(f"Successfully created {target_format} file: {target_path}")
+                    progress_callback(100)
+                    return True
+        
+        # Reading the source takes the progress up to 50%, writing the rest
+        if source_ext in ('.csv', '.xlsx', '.json'):
+            progress_callback.begin('decode', os.path.getsize(source_path), 'bytes', end=50)
+        
         if source_ext == '.csv':
             logger.info("Reading CSV file")
-            df = pd.read_csv(source_path)
+            df = _read_table(source_path, source_ext, options.get('read_engine'),
+                             on_read=progress_callback.advance)
         elif source_ext == '.xlsx':
-            logger.info("Reading Excel file")
-            df = pd.read_excel(source_path)
+            sheet_names = _select_sheets(source_path, options.get('sheets'),
+                                         options.get('read_engine'))
+            if len(sheet_names) > 1:
+                if not _convert_sheets(source_path, sheet_names, target_format, target_path,
+                                       progress_callback, options):
+                    return False
+                logger.info(f"Successfully converted {len(sheet_names)} sheets to {target_format}")
+                progress_callback(100)
+                return True
+            logger.info(f"Reading Excel sheet {sheet_names[0]!r}")
+            df = _read_table(source_path, source_ext, options.get('read_engine'), sheet_names[0],
+                             on_read=progress_callback.advance)
         elif source_ext == '.json':
             logger.info("Reading JSON file")
             # Try to handle different JSON formats
             try:
-                df = pd.read_json(source_path)
+                with stage('decode'), open_counted(source_path, progress_callback.advance) as f:
+                    df = pd.read_json(f)
             except ValueError:
                 # For JSON Lines or irregular formats
-                with open(source_path, 'r', encoding='utf-8') as f:
+                with stage('decode'), open(source_path, 'r', encoding='utf-8') as f:
                     json_data = json.load(f)
                 
                 # Handle different JSON structures
@@ -745,46 +2705,12 @@ def convert_data_format(source_path, target_format, target_path, progress_callba
         
         logger.info(f"Read data with shape: {df.shape}")
         progress_callback(50)
+        progress_callback.begin('write', len(df), 'rows', end=95)
         
-        # Write to target format
-        if target_format == 'csv':
-            logger.info("Writing to CSV format")
-            df.to_csv(target_path, index=False)
-        elif target_format == 'xlsx':
-            logger.info("Writing to Excel format")
-            df.to_excel(target_path, index=False)
-        elif target_format == 'json':
-            logger.info("Writing to JSON format")
-            df.to_json(target_path, orient='records')
-        elif target_format == 'xml':
-            logger.info("Writing to XML format")
-            # Check if to_xml is available (pandas >= 1.3.0)
-            if hasattr(df, 'to_xml'):
-                df.to_xml(target_path)
-            else:
-                # Fallback for older pandas versions
-                xml_data = '<?xml version="1.0" encoding="UTF-8"?>\n<data>\n'
-                for _, row in df.iterrows():
-                    xml_data += '  <record>\n'
-                    for col, value in row.items():
-                        xml_data += f'    <{col}>{value}</{col}>\n'
-                    xml_data += '  </record>\n'
-                xml_data += '</data>'
-                
-                with open(target_path, 'w', encoding='utf-8') as f:
-                    f.write(xml_data)
-        elif target_format == 'html':
-            logger.info("Writing to HTML format")
-            df.to_html(target_path, index=False)
-        else:
-            logger.error(f"Unsupported target format: {target_format}")
+        if not _write_dataframe(df, target_format, target_path, options,
+                                progress_callback.advance):
             return False
         
-        # Verify file was created
-        if not os.path.exists(target_path):
-            logger.error(f"Failed to create file: {target_path}")
-            return False
-            
         logger.info(f"Successfully created {target_format} file: {target_path}")
         progress_callback(100)
         return True
@@ -792,4 +2718,447 @@ def convert_data_format(source_path, target_format, target_path, progress_callba
     except Exception as e:
         logger.error(f"Data format conversion error: {str(e)}")
         logger.error(traceback.format_exc())
-        return False
\ No newline at end of file
+        return False
+
+def _job_result(job, success, duration, error=None, bytes_in=0, metrics=None):
+    """Build the per-job entry reported by convert_batch."""
+    return {
+        'source': job['source'],
+        'target': job['target'],
+        'success': success,
+        'duration': duration,
+        'bytes_in': bytes_in,
+        'error': error,
+        'metrics': metrics,
+        'stalled': False,
+    }
+
+def _init_batch_worker(progress_queue=None):
+    """Keep batch workers from starting nested process pools and connect their heartbeats."""
+    global _pool_workers, _batch_progress_queue
+    _pool_workers = 1
+    _batch_progress_queue = progress_queue
+
+def _run_batch_job(job, cache=None, index=None):
+    """Convert a single batch job inside a worker process."""
+    start = time.perf_counter()
+    progress = None
+    if _batch_progress_queue is not None and index is not None:
+        progress = ProgressTracker(
+            on_update=lambda snapshot: _batch_progress_queue.put((index, snapshot)))
+    try:
+        bytes_in = os.path.getsize(job['source'])
+    except OSError:
+        bytes_in = 0
+    metrics = ConversionMetrics()
+    cancel_token = CancellationToken(job.get('timeout'))
+    try:
+        success = convert_file(job['source'], job['target'], progress, cache=cache,
+                               metrics=metrics, cancel_token=cancel_token,
+                               fsync=job.get('fsync', False), **job.get('options', {}))
+        if success:
+            error = None
+        elif cancel_token.reason:
+            error = f"Conversion {cancel_token.reason} after {job['timeout']:g}s"
+        else:
+            error = "Conversion failed"
+    except Exception as e:
+        success = False
+        error = str(e)
+    return _job_result(job, success, time.perf_counter() - start, error, bytes_in,
+                       metrics.to_dict())
+
+class _BatchMonitor:
+    """
+    Follow the progress heartbeats of running batch jobs and report the
+    ones that stop making progress, e.g. a parser stuck on a damaged file.
+    """
+    
+    def __init__(self, jobs, stall_timeout):
+        self.jobs = jobs
+        self.stall_timeout = stall_timeout
+        self.queue = multiprocessing.Queue()
+        # job index -> monotonic time of its last heartbeat, for running jobs
+        self.last_seen = {}
+        self.progress = {}
+        # Jobs that have stalled at some point, and those that are stalled now
+        self.stalled = set()
+        self.quiet = set()
+    
+    def poll(self):
+        """Collect pending heartbeats and warn about jobs that have gone quiet."""
+        now = time.monotonic()
+        while True:
+            try:
+                index, snapshot = self.queue.get_nowait()
+            except (queue.Empty, OSError, EOFError):
+                break
+            if index in self.quiet:
+                self.quiet.discard(index)
+                logger.info(f"Batch job resumed: {self.jobs[index]['source']}")
+            self.progress[index] = snapshot
+            self.last_seen[index] = now
+        
+        for index, seen in self.last_seen.items():
+            if index not in self.quiet and now - seen > self.stall_timeout:
+                self.stalled.add(index)
+                self.quiet.add(index)
+                snapshot = self.progress[index]
+                logger.warning(f"Batch job stalled: {self.jobs[index]['source']} has made no "
+                               f"progress for {now - seen:.0f}s (at {snapshot['percent']}%, "
+                               f"phase {snapshot['phase']})")
+    
+    def finished(self, index):
+        """Stop watching a job that has completed."""
+        self.last_seen.pop(index, None)
+        self.quiet.discard(index)
+    
+    def close(self):
+        self.queue.close()
+
+def _run_job_pool(jobs, indices, max_workers, results, on_result, cache=None, monitor=None):
+    """
+    Run the given jobs on a fresh process pool.
+    
+    Returns:
+        list: Indices of jobs that were lost because a worker process died
+    """
+    lost = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_batch_worker,
+                             initargs=(monitor.queue if monitor else None,)) as pool:
+        futures = {pool.submit(_run_batch_job, jobs[i], cache, i): i for i in indices}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=BATCH_POLL_INTERVAL,
+                                 return_when=FIRST_COMPLETED)
+            if monitor:
+                monitor.poll()
+            for future in done:
+                index = futures[future]
+                if monitor:
+                    monitor.finished(index)
+                try:
+                    results[index] = future.result()
+                except BrokenProcessPool:
+                    lost.append(index)
+                    continue
+                except Exception as e:
+                    results[index] = _job_result(jobs[index], False, 0, str(e))
+                results[index]['stalled'] = bool(monitor and index in monitor.stalled)
+                on_result(results[index])
+    return sorted(lost)
+
+def convert_batch(jobs, max_workers=None, progress_callback=None, cache=None, metrics=None,
+                  stall_timeout=DEFAULT_STALL_TIMEOUT, timeout=None, fsync=False):
+    """
+    Convert many files in parallel using a pool of worker processes.
+    
+    Args:
+        jobs: Iterable of (source, target) pairs or dicts with 'source' and 'target'
+            keys, an optional 'options' dict passed on to convert_file and an
+            optional 'timeout' in seconds
+        max_workers: Number of worker processes (defaults to the CPU count)
+        progress_callback: Function to call with progress updates (0-100)
+        cache: Optional ConversionCache shared by all workers
+        metrics: Optional ConversionMetrics that the per-job metrics are added to
+        stall_timeout: Seconds a running job may go without making progress
+            before it is reported as stalled (None disables the check)
+        timeout: Seconds after which a job is cancelled, for jobs without
+            their own 'timeout' (None means no limit)
+        fsync: Flush every job's outputs to disk before it is reported done
+    
+    Returns:
+        dict: Batch report with per-job results, throughput figures and the
+            combined stage metrics of all jobs
+    
+    Raises:
+        ValueError: If two jobs have the same target, since they would
+            overwrite each other's output
+    """
+    jobs = [dict(job) if isinstance(job, dict) else {'source': job[0], 'target': job[1]}
+            for job in jobs]
+    _check_unique_targets((job['source'], job['target']) for job in jobs)
+    for job in jobs:
+        if timeout:
+            job.setdefault('timeout', timeout)
+        if fsync:
+            job['fsync'] = True
+    results = [None] * len(jobs)
+    completed = [0]
+    
+    def on_result(result):
+        completed[0] += 1
+        if not result['success']:
+            logger.warning(f"Batch job failed: {result['source']} -> {result['target']}: {result['error']}")
+        if progress_callback:
+            progress_callback(completed[0] * 100 // len(jobs))
+    
+    logger.info(f"Starting batch of {len(jobs)} jobs with {max_workers or os.cpu_count()} workers")
+    start = time.perf_counter()
+    
+    if jobs:
+        monitor = _BatchMonitor(jobs, stall_timeout) if stall_timeout else None
+        try:
+            lost = _run_job_pool(jobs, range(len(jobs)), max_workers, results, on_result, cache,
+                                 monitor)
+            # A dead worker breaks the whole pool and takes every pending job with it.
+            # Re-run those jobs one per pool so only the job that crashes is marked failed.
+            for index in lost:
+                if _run_job_pool(jobs, [index], 1, results, on_result, cache, monitor):
+                    results[index] = _job_result(jobs[index], False, 0, "Worker process crashed")
+                    on_result(results[index])
+        finally:
+            if monitor:
+                monitor.close()
+    
+    elapsed = time.perf_counter() - start
+    if metrics is None:
+        metrics = ConversionMetrics()
+    for result in results:
+        if result['metrics']:
+            metrics.add_summary(result['metrics'])
+    succeeded = sum(1 for r in results if r['success'])
+    bytes_in = sum(r['bytes_in'] for r in results)
+    report = {
+        'total': len(jobs),
+        'succeeded': succeeded,
+        'failed': len(jobs) - succeeded,
+        'elapsed': elapsed,
+        'jobs_per_second': len(jobs) / elapsed if elapsed > 0 else 0.0,
+        'bytes_per_second': bytes_in / elapsed if elapsed > 0 else 0.0,
+        'bytes_in': bytes_in,
+        'stalled': sum(1 for r in results if r['stalled']),
+        'metrics': metrics.to_dict(),
+        'results': results,
+    }
+    logger.info(f"Batch finished: {succeeded}/{len(jobs)} succeeded in {elapsed:.2f}s "
+                f"({report['jobs_per_second']:.2f} files/s)")
+    return report
+
+def collect_jobs(sources, target_format, output_dir=None, recursive=False):
+    """
+    Build (source, target) jobs from files, directories and glob patterns.
+    
+    Args:
+        sources: List of file paths, directories or glob patterns
+        target_format: Output format without the leading dot (e.g. 'png')
+        output_dir: Directory for converted files (defaults to next to each source)
+        recursive: Whether to descend into subdirectories and '**' patterns
+    
+    Files found in subdirectories of a directory source keep their relative
+    subdirectory under output_dir.
+    
+    Returns:
+        list: (source, target) tuples for every file that supports the target format
+    
+    Raises:
+        ValueError: If two sources would be converted to the same target
+    """
+    target_format = target_format.lower().lstrip('.')
+    jobs = []
+    for path, root in _expand_sources(sources, recursive):
+        if target_format not in get_available_formats(os.path.splitext(path)[1]):
+            logger.info(f"Skipping {path}: cannot convert to {target_format}")
+            continue
+        base_name = os.path.splitext(os.path.basename(path))[0]
+        if not output_dir:
+            target_dir = os.path.dirname(path)
+        elif root is not None and os.path.dirname(path) != root:
+            target_dir = os.path.join(output_dir, os.path.relpath(os.path.dirname(path), root))
+        else:
+            target_dir = output_dir
+        jobs.append((path, os.path.join(target_dir, f"{base_name}.{target_format}")))
+    _check_unique_targets(jobs)
+    return jobs
+
+def _expand_sources(sources, recursive):
+    """
+    List the files named by file paths, directories and glob patterns.
+    
+    Returns:
+        list: (path, directory source it was found in or None) for each file, without repeats
+    """
+    found = []
+    for source in sources:
+        if os.path.isdir(source):
+            pattern = os.path.join(source, '**', '*') if recursive else os.path.join(source, '*')
+            found.extend((path, os.path.normpath(source))
+                         for path in sorted(glob.glob(pattern, recursive=recursive)))
+        elif os.path.isfile(source):
+            found.append((source, None))
+        else:
+            found.extend((path, None) for path in sorted(glob.glob(source, recursive=recursive)))
+    
+    files = []
+    seen = set()
+    for path, root in found:
+        if not os.path.isfile(path) or path in seen:
+            continue
+        seen.add(path)
+        files.append((path, root))
+    return files
+
+def _check_unique_targets(jobs):
+    """Raise ValueError if several (source, target) jobs would write the same target."""
+    sources_by_target = {}
+    for source, target in jobs:
+        key = os.path.normcase(os.path.abspath(target))
+        sources_by_target.setdefault(key, (target, []))[1].append(source)
+    clashes = [f"{target} (from {', '.join(sources)})"
+               for target, sources in sources_by_target.values() if len(sources) > 1]
+    if clashes:
+        raise ValueError(f"Several sources would be converted to the same target: "
+                         f"{'; '.join(clashes)}")
+
+def load_manifest(manifest_path):
+    """
+    Load batch jobs from a manifest file.
+    
+    The manifest is either a JSON list of [source, target] pairs or
+    {"source": ..., "target": ..., "options": {...}, "timeout": ...} objects,
+    or a CSV file with 'source' and 'target' columns.
+    
+    Returns:
+        list: Job dicts with 'source', 'target' and 'options' keys, and
+            'timeout' where the manifest sets one
+    """
+    if manifest_path.lower().endswith('.csv'):
+        with open(manifest_path, 'r', encoding='utf-8', newline='') as f:
+            return [{'source': row['source'], 'target': row['target'], 'options': {}}
+                    for row in csv.DictReader(f)]
+    
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    jobs = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            job = {'source': entry['source'], 'target': entry['target'],
+                   'options': entry.get('options', {})}
+            if entry.get('timeout'):
+                job['timeout'] = entry['timeout']
+            jobs.append(job)
+        else:
+            jobs.append({'source': entry[0], 'target': entry[1], 'options': {}})
+    return jobs
+
+def main(argv=None):
+    """Command line entry point for headless batch conversion."""
+    parser = argparse.ArgumentParser(description="Convert files in bulk without the GUI.")
+    parser.add_argument('sources', nargs='*', help="Files, directories or glob patterns to convert")
+    parser.add_argument('-t', '--to', dest='target_format', help="Output format (e.g. png, pdf, csv)")
+    parser.add_argument('-o', '--output-dir', help="Directory for converted files")
+    parser.add_argument('--merge', metavar='PDF',
+                        help="Combine the image sources into this single PDF instead")
+    parser.add_argument('-m', '--manifest', help="JSON or CSV manifest of source/target jobs")
+    parser.add_argument('-r', '--recursive', action='store_true', help="Descend into subdirectories")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Number of worker processes")
+    parser.add_argument('--report', help="Write the full JSON report to this file")
+    parser.add_argument('--metrics', help="Write stage timings in Prometheus text format to this file")
+    parser.add_argument('--stall-timeout', type=float, default=DEFAULT_STALL_TIMEOUT, metavar='SECONDS',
+                        help="Report jobs that make no progress for this long (0 disables)")
+    parser.add_argument('--timeout', type=float, metavar='SECONDS',
+                        help="Cancel jobs that run longer than this")
+    parser.add_argument('--fsync', action='store_true',
+                        help="Flush outputs to disk before reporting them done")
+    parser.add_argument('--cache-dir', help="Reuse results from this conversion cache directory")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_SIZE // (1024 * 1024),
+                        metavar='MB', help="Maximum size of the conversion cache")
+    parser.add_argument('--read-engine', help="Parser for CSV/XLSX sources (pyarrow, c, calamine, openpyxl)")
+    parser.add_argument('--write-engine', help="Writer for XLSX targets (xlsxwriter, openpyxl)")
+    parser.add_argument('--compression', help="Codec for Parquet/Feather targets (e.g. zstd, snappy, lz4)")
+    parser.add_argument('--sheets', help="XLSX sheets to convert: 'all' or comma separated names")
+    parser.add_argument('--dpi', type=int, help="Render resolution for PDF to image")
+    parser.add_argument('--pages', help="PDF pages to render, e.g. 1-3,7")
+    parser.add_argument('--thumbnail', type=int, metavar='PIXELS',
+                        help="Render PDF pages as thumbnails of this size")
+    parser.add_argument('--resize', metavar='WIDTHxHEIGHT',
+                        help="Resize images, e.g. 800x600, or 800x or 800 to keep the aspect ratio")
+    parser.add_argument('--max-size', type=int, metavar='PIXELS',
+                        help="Scale images down so their longest side fits")
+    parser.add_argument('--resolution', type=float, metavar='DPI',
+                        help="Pixels per inch of images merged into a PDF (default: their own DPI)")
+    parser.add_argument('--profile', choices=sorted(ENCODER_PROFILES),
+                        help="Image encoder settings: fast, balanced (default) or smallest")
+    parser.add_argument('--quantizer', choices=sorted(QUANTIZERS),
+                        help="Palette quantizer for GIF targets (default octree)")
+    parser.add_argument('--text-detail', choices=PDF_TEXT_DETAILS,
+                        help="Detail of PDF to JSON Lines output: blocks or spans (default)")
+    parser.add_argument('--sort-text', action='store_true', default=None,
+                        help="Order PDF text blocks by position instead of content order")
+    args = parser.parse_args(argv)
+    
+    options = {}
+    for name in ('dpi', 'pages', 'thumbnail', 'read_engine', 'write_engine', 'compression',
+                 'sheets', 'resize', 'max_size', 'resolution', 'profile', 'quantizer',
+                 'text_detail', 'sort_text'):
+        if getattr(args, name) is not None:
+            options[name] = getattr(args, name)
+    
+    try:
+        if args.resize:
+            _parse_resize(args.resize)
+        if args.max_size is not None and args.max_size <= 0:
+            raise ValueError("--max-size must be positive")
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.merge:
+        if not args.sources:
+            parser.error("--merge needs image sources")
+        images = [source for source, _ in _expand_sources(args.sources, args.recursive)
+                  if os.path.splitext(source)[1].lower() in IMAGE_EXTENSIONS]
+        if not images:
+            parser.error("No images found to merge")
+        success = merge_images_to_pdf(images, args.merge, timeout=args.timeout, fsync=args.fsync,
+                                      **options)
+        print(f"{'Merged' if success else 'FAILED merging'} {len(images)} images into {args.merge}")
+        return 0 if success else 1
+    
+    jobs = []
+    if args.manifest:
+        # Options given on the command line act as defaults for manifest jobs
+        jobs.extend(dict(job, options=dict(options, **job['options']))
+                    for job in load_manifest(args.manifest))
+    if args.sources:
+        if not args.target_format:
+            parser.error("--to is required when converting sources")
+        try:
+            sources = collect_jobs(args.sources, args.target_format, args.output_dir,
+                                   args.recursive)
+        except ValueError as e:
+            parser.error(str(e))
+        jobs.extend({'source': source, 'target': target, 'options': options}
+                    for source, target in sources)
+    if not jobs:
+        parser.error("No conversion jobs found")
+    try:
+        _check_unique_targets((job['source'], job['target']) for job in jobs)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    cache = None
+    if args.cache_dir:
+        cache = ConversionCache(args.cache_dir, max_size=args.cache_size * 1024 * 1024)
+    
+    metrics = ConversionMetrics()
+    report = convert_batch(jobs, max_workers=args.workers, cache=cache, metrics=metrics,
+                           stall_timeout=args.stall_timeout or None, timeout=args.timeout,
+                           fsync=args.fsync)
+    
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.metrics:
+        with open(args.metrics, 'w', encoding='utf-8') as f:
+            f.write(metrics.to_prometheus())
+    
+    for result in report['results']:
+        if not result['success']:
+            print(f"FAILED {result['source']} -> {result['target']}: {result['error']}")
+    print(f"{report['succeeded']}/{report['total']} succeeded in {report['elapsed']:.2f}s "
+          f"({report['jobs_per_second']:.2f} files/s, "
+          f"{report['bytes_per_second'] / (1024 * 1024):.2f} MB/s)")
+    return 0 if report['failed'] == 0 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,378 @@
+import io
+import os
+import zlib
+import struct
+import logging
+
+logger = logging.getLogger("FileConverter")
+
+# Palette quantizers for GIF output, by option name, with the Image.Quantize
+# method each one uses; libimagequant needs a Pillow build that includes it
+QUANTIZERS = {
+    'octree': 'FASTOCTREE',
+    'mediancut': 'MEDIANCUT',
+    'libimagequant': 'LIBIMAGEQUANT',
+}
+
+# Quantizer used when none is chosen; much faster than median cut
+DEFAULT_QUANTIZER = 'octree'
+
+# Pixels with less alpha than this are transparent in GIF output
+GIF_ALPHA_THRESHOLD = 128
+
+# Quality of the lossy frames in animated WebP output (Pillow's default)
+WEBP_QUALITY = 80
+
+# JPEG quality of the images in PDF output, matching Pillow's PDF writer
+PDF_JPEG_QUALITY = 75
+
+# Pixels per inch images are placed at in PDF output when they do not say
+PDF_RESOLUTION = 100.0
+
+# zlib level of images stored losslessly in PDF output
+PDF_COMPRESS_LEVEL = 6
+
+# PDF color space of each JPEG mode that can be embedded without re-encoding
+JPEG_COLOR_SPACES = {
+    'L': 'DeviceGray',
+    'RGB': 'DeviceRGB',
+    'CMYK': 'DeviceCMYK',
+}
+
+# Bytes per read when copying JPEG data into a PDF
+COPY_CHUNK_SIZE = 1024 * 1024
+
+def quantize_method(quantizer=None):
+    """Return the Image.Quantize method for a quantizer name from QUANTIZERS."""
+    from PIL import Image, features
+    name = (quantizer or DEFAULT_QUANTIZER).lower()
+    if name not in QUANTIZERS:
+        raise ValueError(f"Unknown quantizer: {quantizer} (expected one of {', '.join(QUANTIZERS)})")
+    if name == 'libimagequant' and not features.check('libimagequant'):
+        logger.warning("Pillow was built without libimagequant, using the octree quantizer")
+        name = 'octree'
+    return getattr(Image.Quantize, QUANTIZERS[name])
+
+def quantize(image, method):
+    """
+    Reduce an image to a palette image for GIF output.
+
+    Pixels with alpha below GIF_ALPHA_THRESHOLD are mapped to an extra
+    palette entry that is marked transparent.
+
+    Returns:
+        tuple: The palette image and its transparent index, or None if it is opaque
+    """
+    if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info:
+        image = image.convert('RGBA')
+        mask = image.getchannel('A').point(lambda a: 255 if a < GIF_ALPHA_THRESHOLD else 0)
+        image = image.convert('RGB')
+        if mask.getbbox():
+            palette_image = image.quantize(255, method=method)
+            palette = palette_image.getpalette()
+            palette_image.putpalette(palette + [0] * (768 - len(palette)))
+            palette_image.paste(255, mask=mask)
+            return palette_image, 255
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image.quantize(256, method=method), None
+
+def changed_box(previous, frame):
+    """Return the bounding box of the pixels that differ between two frames, or None."""
+    from PIL import ImageChops
+    return ImageChops.difference(previous, frame).getbbox(alpha_only=False)
+
+class GifWriter:
+    """
+    Write an animated GIF one frame at a time.
+
+    Each frame is quantized to its own palette and written straight away, so
+    only the previous frame is kept in memory. Opaque frames are cropped to
+    the area that changed since the previous one; animations with alpha are
+    written as full frames that clear the canvas after they are shown.
+
+    Args:
+        f: Binary file to write to
+        size: Canvas (width, height)
+        loop: Times to repeat the animation (0 forever), or None to play it once
+        has_alpha: Whether the frames are RGBA with transparent pixels
+        quantizer: Name of the palette quantizer, see QUANTIZERS
+    """
+
+    def __init__(self, f, size, loop=0, has_alpha=False, quantizer=None):
+        self.f = f
+        self.size = size
+        self.loop = loop
+        self.has_alpha = has_alpha
+        self.method = quantize_method(quantizer)
+        self.frames = 0
+        self._previous = None
+
+    def add_frame(self, frame, duration):
+        """Append a full-canvas RGB or RGBA frame shown for duration milliseconds."""
+        from PIL import GifImagePlugin
+        region, offset = frame, (0, 0)
+        if self._previous is not None and not self.has_alpha:
+            # An unchanged frame still needs a pixel to carry its duration
+            box = changed_box(self._previous, frame) or (0, 0, 1, 1)
+            region, offset = frame.crop(box), box[:2]
+        palette_image, transparency = quantize(region, self.method)
+
+        if self.frames == 0:
+            palette_image.info['version'] = b'89a'
+            header, _ = GifImagePlugin.getheader(palette_image, info={'loop': self.loop})
+            self.f.write(b''.join(header))
+        params = {'duration': duration, 'disposal': 2 if self.has_alpha else 1,
+                  'include_color_table': True}
+        if transparency is not None:
+            params['transparency'] = transparency
+        for data in GifImagePlugin.getdata(palette_image, offset, **params):
+            self.f.write(data)
+        self.frames += 1
+        self._previous = None if self.has_alpha else frame
+
+    def close(self):
+        """Write the GIF trailer."""
+        self.f.write(b';')
+
+def _riff_chunk(fourcc, data):
+    # Chunks are padded to an even size
+    return fourcc + struct.pack('<I', len(data)) + data + b'\0' * (len(data) & 1)
+
+def _uint24(value):
+    return value.to_bytes(3, 'little')
+
+class WebPWriter:
+    """
+    Write an animated WebP one frame at a time.
+
+    Every frame is encoded on its own by Pillow and wrapped in an ANMF chunk
+    of the WebP container, so only the previous frame is kept in memory.
+    Frames are cropped to the area that changed since the previous one and
+    replace that area instead of being blended into it.
+
+    Args:
+        f: Seekable binary file to write to
+        size: Canvas (width, height)
+        loop: Times to play the animation (0 forever)
+        has_alpha: Whether the frames are RGBA with transparent pixels
+        save_params: Pillow WebP save parameters for the frames, e.g.
+            quality and method (default quality WEBP_QUALITY)
+    """
+
+    def __init__(self, f, size, loop=0, has_alpha=False, save_params=None):
+        self.f = f
+        self.size = size
+        self.save_params = save_params or {'quality': WEBP_QUALITY}
+        self.frames = 0
+        self._previous = None
+        self._start = f.tell()
+        # Animation flag, plus the alpha flag when frames have transparency
+        flags = 0x02 | (0x10 if has_alpha else 0)
+        header = (bytes([flags, 0, 0, 0]) + _uint24(size[0] - 1) + _uint24(size[1] - 1))
+        # The RIFF size is filled in by close()
+        f.write(b'RIFF\0\0\0\0WEBP')
+        f.write(_riff_chunk(b'VP8X', header))
+        f.write(_riff_chunk(b'ANIM', struct.pack('<4BH', 0, 0, 0, 0, loop)))
+
+    def add_frame(self, frame, duration):
+        """Append a full-canvas RGB or RGBA frame shown for duration milliseconds."""
+        left, top, right, bottom = (0, 0) + frame.size
+        if self._previous is not None:
+            box = changed_box(self._previous, frame) or (0, 0, 1, 1)
+            # Frame offsets are stored in units of two pixels
+            left, top, right, bottom = box[0] & ~1, box[1] & ~1, box[2], box[3]
+        region = frame if self._previous is None else frame.crop((left, top, right, bottom))
+
+        buffer = io.BytesIO()
+        region.save(buffer, 'WEBP', **self.save_params)
+        encoded = buffer.getbuffer()
+        # Keep the alpha and bitstream chunks of the still image, skipping its RIFF header
+        frame_data = []
+        position = 12
+        while position + 8 <= len(encoded):
+            fourcc = bytes(encoded[position:position + 4])
+            size, = struct.unpack_from('<I', encoded, position + 4)
+            if fourcc in (b'ALPH', b'VP8 ', b'VP8L'):
+                frame_data.append(_riff_chunk(fourcc, bytes(encoded[position + 8:position + 8 + size])))
+            position += 8 + size + (size & 1)
+        encoded.release()
+
+        # Do not blend with the canvas, do not dispose afterwards
+        header = (_uint24(left // 2) + _uint24(top // 2) + _uint24(right - left - 1)
+                  + _uint24(bottom - top - 1) + _uint24(min(int(duration), 0xffffff)) + b'\x02')
+        self.f.write(_riff_chunk(b'ANMF', header + b''.join(frame_data)))
+        self.frames += 1
+        self._previous = frame
+
+    def close(self):
+        """Fill in the RIFF size now that all frames are written."""
+        end = self.f.tell()
+        self.f.seek(self._start + 4)
+        self.f.write(struct.pack('<I', end - self._start - 8))
+        self.f.seek(end)
+
+class ImagePdfWriter:
+    """
+    Write a PDF with one image per page, one page at a time.
+
+    Pages are written as soon as they are added, so only the image being
+    added is held in memory; the page tree and cross-reference table are
+    written by close(). JPEG files can be embedded as they are, without
+    decoding them.
+
+    Args:
+        f: Binary file to write to
+        resolution: Pixels per inch images are placed at unless a page says
+            otherwise; pages may also give an (x, y) pair
+        jpeg_params: Pillow JPEG save parameters for re-encoded images
+            (default quality PDF_JPEG_QUALITY)
+        compress_level: zlib level for images stored losslessly
+    """
+
+    def __init__(self, f, resolution=PDF_RESOLUTION, jpeg_params=None,
+                 compress_level=PDF_COMPRESS_LEVEL):
+        self.f = f
+        self.resolution = resolution
+        self.jpeg_params = jpeg_params or {'quality': PDF_JPEG_QUALITY}
+        self.compress_level = compress_level
+        self.pages = 0
+        # Object number -> offset in the file; 1 is the catalog and 2 the page tree
+        self._offsets = {}
+        self._page_ids = []
+        self._next_id = 3
+        self._position = 0
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _write(self, data):
+        self.f.write(data)
+        self._position += len(data)
+
+    def _write_object(self, object_id, body, stream=None):
+        self._offsets[object_id] = self._position
+        self._write(f'{object_id} 0 obj\n'.encode() + body)
+        if stream is not None:
+            self._write(b'\nstream\n')
+            self._write(stream)
+            self._write(b'\nendstream')
+        self._write(b'\nendobj\n')
+
+    def _reserve(self):
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _write_image(self, size, color_space, bits, filter_name, data, extra=''):
+        """Write an image XObject whose data is already encoded; returns its object number."""
+        image_id = self._reserve()
+        self._write_object(image_id, (
+            f'<< /Type /XObject /Subtype /Image /Width {size[0]} /Height {size[1]} '
+            f'/ColorSpace {color_space} /BitsPerComponent {bits} /Filter /{filter_name}{extra} '
+            f'/Length {len(data)} >>').encode(), data)
+        return image_id
+
+    def _write_page(self, image_id, size, resolution):
+        """Write a page showing an image XObject scaled to its size at resolution."""
+        resolution = resolution or self.resolution
+        x_resolution, y_resolution = (resolution if isinstance(resolution, tuple)
+                                      else (resolution, resolution))
+        page_width = size[0] * 72.0 / x_resolution
+        page_height = size[1] * 72.0 / y_resolution
+        contents_id, page_id = self._reserve(), self._reserve()
+        contents = f'q {page_width:.2f} 0 0 {page_height:.2f} 0 0 cm /Im0 Do Q'.encode()
+        self._write_object(contents_id, f'<< /Length {len(contents)} >>'.encode(), contents)
+        self._write_object(page_id, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] '
+            f'/Resources << /XObject << /Im0 {image_id} 0 R >> '
+            f'/ProcSet [/PDF /ImageC /ImageB /ImageI] >> /Contents {contents_id} 0 R >>').encode())
+        self._page_ids.append(page_id)
+        self.pages += 1
+
+    @staticmethod
+    def can_embed(image):
+        """Check whether an opened (not yet decoded) image can be embedded by add_jpeg()."""
+        return image.format == 'JPEG' and image.mode in JPEG_COLOR_SPACES
+
+    def add_jpeg(self, path, image, resolution=None):
+        """
+        Add a page showing a JPEG file, copying its bytes instead of re-encoding it.
+
+        Args:
+            path: JPEG file to embed
+            image: The file opened with Image.open, for its size and mode
+            resolution: Pixels per inch, or None for the writer's resolution
+        """
+        # Adobe CMYK JPEGs store inverted values
+        decode = ' /Decode [1 0 1 0 1 0 1 0]' if image.mode == 'CMYK' and 'adobe' in image.info else ''
+        length = os.path.getsize(path)
+        image_id = self._reserve()
+        self._offsets[image_id] = self._position
+        self._write((
+            f'{image_id} 0 obj\n<< /Type /XObject /Subtype /Image /Width {image.size[0]} '
+            f'/Height {image.size[1]} /ColorSpace /{JPEG_COLOR_SPACES[image.mode]} '
+            f'/BitsPerComponent 8 /Filter /DCTDecode{decode} /Length {length} >>\nstream\n').encode())
+        with open(path, 'rb') as source:
+            copied = 0
+            while copied < length:
+                chunk = source.read(min(COPY_CHUNK_SIZE, length - copied))
+                if not chunk:
+                    raise OSError(f"{path} shrank while it was being embedded")
+                self._write(chunk)
+                copied += len(chunk)
+        self._write(b'\nendstream\nendobj\n')
+        self._write_page(image_id, image.size, resolution)
+
+    def add_image(self, image, resolution=None, lossless=False):
+        """
+        Add a page showing a decoded image.
+
+        The image is stored as a JPEG, or with lossless Flate compression
+        when lossless is set, in which case transparency is kept as a soft
+        mask and palette images stay indexed.
+        """
+        if not lossless:
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', **self.jpeg_params)
+            color_space = '/DeviceRGB' if image.mode == 'RGB' else '/DeviceGray'
+            image_id = self._write_image(image.size, color_space, 8, 'DCTDecode', buffer.getvalue())
+            self._write_page(image_id, image.size, resolution)
+            return
+
+        extra = ''
+        if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info:
+            image = image.convert('LA' if image.mode == 'LA' else 'RGBA')
+            alpha = image.getchannel('A')
+            image = image.convert('L' if image.mode == 'LA' else 'RGB')
+            if alpha.getextrema()[0] < 255:
+                mask_id = self._write_image(alpha.size, '/DeviceGray', 8, 'FlateDecode',
+                                            zlib.compress(alpha.tobytes(), self.compress_level))
+                extra = f' /SMask {mask_id} 0 R'
+        elif image.mode not in ('1', 'L', 'P', 'RGB', 'CMYK'):
+            image = image.convert('RGB')
+
+        bits = 1 if image.mode == '1' else 8
+        if image.mode == 'P':
+            palette = bytes(image.getpalette()[:768])
+            color_space = f'[/Indexed /DeviceRGB {len(palette) // 3 - 1} <{palette.hex()}>]'
+        else:
+            color_space = {'1': '/DeviceGray', 'L': '/DeviceGray', 'RGB': '/DeviceRGB',
+                           'CMYK': '/DeviceCMYK'}[image.mode]
+        image_id = self._write_image(image.size, color_space, bits, 'FlateDecode',
+                                     zlib.compress(image.tobytes(), self.compress_level), extra)
+        self._write_page(image_id, image.size, resolution)
+
+    def close(self):
+        """Write the page tree, catalog, cross-reference table and trailer."""
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self._page_ids)
+        self._write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {self.pages} >>'.encode())
+        self._write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+        xref_position = self._position
+        entries = [b'0000000000 65535 f \n']
+        entries.extend(f'{self._offsets[object_id]:010d} 00000 n \n'.encode()
+                       for object_id in range(1, self._next_id))
+        self._write(f'xref\n0 {self._next_id}\n'.encode() + b''.join(entries))
+        self._write(f'trailer\n<< /Size {self._next_id} /Root 1 0 R >>\n'
+                    f'startxref\n{xref_position}\n%%EOF\n'.encode())
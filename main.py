@@ -21,10 +21,13 @@ from kivy.factory import Factory
 from kivy.graphics import Color, Rectangle
 
 import os
-import threading
 import shutil
 import subprocess
-from converters import get_available_formats, convert_file
+from converters import get_available_formats, DEFAULT_ENCODER_PROFILE
+from conversion_cache import ConversionCache
+from conversion_progress import ProgressTracker
+from conversion_queue import (ConversionQueue, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW,
+                              QUEUED, RUNNING, DONE, FAILED, CANCELLED)
 import time
 import json
 
@@ -32,6 +35,12 @@ import json
 if platform not in ('android', 'ios'):
     Window.size = (400, 700)
 
+# Seconds between progress refreshes of the UI, one per frame at 60 fps
+PROGRESS_FRAME_INTERVAL = 1 / 60
+
+# Priority spinner choices
+JOB_PRIORITIES = {'High': PRIORITY_HIGH, 'Normal': PRIORITY_NORMAL, 'Low': PRIORITY_LOW}
+
 class DrawerLayout(BoxLayout):
     """Custom navigation drawer implementation"""
     
@@ -99,6 +108,8 @@ class DownloadSuccessPopup(Popup):
 
 class SettingsScreen(Screen):
     dark_mode = BooleanProperty(False)
+    # Encoder profile for image outputs: fast, balanced or smallest
+    encoder_profile = StringProperty(DEFAULT_ENCODER_PROFILE)
     
     def __init__(self, **kwargs):
         super(SettingsScreen, self).__init__(**kwargs)
@@ -110,12 +121,18 @@ class SettingsScreen(Screen):
         app.update_theme(self.dark_mode)
         self.save_settings()
     
+    def set_encoder_profile(self, profile):
+        if profile != self.encoder_profile:
+            self.encoder_profile = profile
+            self.save_settings()
+    
     def load_settings(self):
         try:
             if os.path.exists('settings.json'):
                 with open('settings.json', 'r') as f:
                     settings = json.load(f)
                     self.dark_mode = settings.get('dark_mode', False)
+                    self.encoder_profile = settings.get('encoder_profile', DEFAULT_ENCODER_PROFILE)
         except Exception:
             # If error loading settings, use defaults
             pass
@@ -123,7 +140,8 @@ class SettingsScreen(Screen):
     def save_settings(self):
         try:
             with open('settings.json', 'w') as f:
-                json.dump({'dark_mode': self.dark_mode}, f)
+                json.dump({'dark_mode': self.dark_mode,
+                           'encoder_profile': self.encoder_profile}, f)
         except Exception:
             # If error saving settings, just continue
             pass
@@ -362,11 +380,78 @@ class RecentFilesScreen(Screen):
 class HelpScreen(Screen):
     pass
 
+class ProgressChannel:
+    """
+    Hand progress from a conversion thread to the UI at most once per frame.
+
+    Worker threads only store the latest value, which costs next to nothing
+    no matter how often converters report. A Clock event on the UI thread
+    picks it up every interval and calls on_progress only when it changed,
+    so intermediate values are dropped and the latest one always wins.
+
+    Args:
+        on_progress: Called on the UI thread with (percent, snapshot), where
+            snapshot is the latest ProgressTracker.snapshot() or None
+        interval: Seconds between deliveries
+    """
+
+    def __init__(self, on_progress, interval=PROGRESS_FRAME_INTERVAL):
+        self.on_progress = on_progress
+        self.interval = interval
+        self._percent = 0
+        self._snapshot = None
+        # Incremented by the worker on every change, compared on the UI thread
+        self._version = 0
+        self._delivered = 0
+        self._event = None
+
+    def open(self):
+        """Start delivering updates; call from the UI thread."""
+        if self._event is None:
+            self._event = Clock.schedule_interval(self._deliver, self.interval)
+
+    def close(self):
+        """Deliver the last pending update and stop; call from the UI thread."""
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        self._deliver(0)
+
+    def put(self, percent):
+        """Record a new percentage (called from the conversion thread)."""
+        self._percent = percent
+        self._version += 1
+
+    def put_snapshot(self, snapshot):
+        """Record a ProgressTracker snapshot (called from the conversion thread)."""
+        self._snapshot = snapshot
+        self._percent = max(self._percent, snapshot['percent'])
+        self._version += 1
+
+    def tracker(self):
+        """Return a ProgressTracker feeding this channel, for convert_file."""
+        return ProgressTracker(callback=self.put, on_update=self.put_snapshot)
+
+    def _deliver(self, dt):
+        version = self._version
+        if version != self._delivered:
+            self._delivered = version
+            self.on_progress(self._percent, self._snapshot)
+
 class FileConverterScreen(Screen):
     def __init__(self, **kwargs):
         super(FileConverterScreen, self).__init__(**kwargs)
         self.current_output_file = None
         self.selected_file_path = None
+        self.selected_files = []
+        self.conversion_queue = None
+        # Jobs of the current run, i.e. since the queue was last idle
+        self.run_jobs = []
+        # job id -> widgets of its row in the job list
+        self.job_rows = {}
+        # Files dropped together arrive one event each; collect them per frame
+        self._dropped_files = []
+        self._drop_trigger = Clock.create_trigger(self._select_dropped_files)
         # Setup drag and drop handling
         Window.bind(on_dropfile=self._on_file_drop)
     
@@ -376,10 +461,16 @@ class FileConverterScreen(Screen):
         if isinstance(file_path, bytes):
             file_path = file_path.decode('utf-8')
         
-        # Process the file
-        self.select_file(file_path)
+        # Select all files of the same drop together on the next frame
+        self._dropped_files.append(file_path)
+        self._drop_trigger()
         return True
     
+    def _select_dropped_files(self, dt):
+        files, self._dropped_files = self._dropped_files, []
+        if files:
+            self.select_files(files)
+    
     def open_file_picker(self):
         """Open the native file picker dialog"""
         if platform == 'android':
@@ -406,20 +497,20 @@ class FileConverterScreen(Screen):
             root = tk.Tk()
             root.withdraw()
             
-            # Show file dialog and get selected file
-            file_path = filedialog.askopenfilename(
-                title="Select a file to convert",
+            # Show file dialog and get selected files
+            file_paths = filedialog.askopenfilenames(
+                title="Select files to convert",
                 filetypes=[
                     ("All supported files", "*.*"),
                     ("Images", "*.jpg *.jpeg *.png *.bmp *.webp *.gif"),
                     ("Documents", "*.pdf *.docx *.txt"),
-                    ("Data files", "*.csv *.xlsx *.json")
+                    ("Data files", "*.csv *.xlsx *.json *.parquet *.feather")
                 ]
             )
             
-            # Process the selected file
-            if file_path:
-                self.select_file(file_path)
+            # Process the selected files
+            if file_paths:
+                self.select_files(list(file_paths))
             
             # Close Tkinter
             root.destroy()
@@ -518,48 +609,59 @@ class FileConverterScreen(Screen):
     
     def select_file(self, file_path):
         """Process the selected file"""
-        if os.path.exists(file_path):
-            self.selected_file_path = file_path
-            self.ids.selected_file_label.text = f'Selected: {os.path.basename(file_path)}'
-            
-            # Animate the label
-            anim = Animation(opacity=0, duration=0.1) + Animation(opacity=1, duration=0.1)
-            anim.start(self.ids.selected_file_label)
-            
-            # Get available output formats for this file type
-            file_ext = os.path.splitext(file_path)[1].lower()
-            formats = get_available_formats(file_ext)
-            
-            if formats:
-                self.ids.format_spinner.values = formats
-                self.ids.format_spinner.text = formats[0]
-                self.ids.convert_button.disabled = False
-                
-                # Enable animation when enabling the button
-                anim = Animation(background_color=[0.2, 0.7, 0.3, 1], duration=0.3)
-                anim.start(self.ids.convert_button)
-            else:
-                self.ids.format_spinner.values = ['Unsupported file type']
-                self.ids.format_spinner.text = 'Unsupported file type'
-                self.ids.convert_button.disabled = True
-                
-                # Animate the button to red to indicate disabled state
-                anim = Animation(background_color=[0.7, 0.2, 0.2, 1], duration=0.3)
-                anim.start(self.ids.convert_button)
-            
-            # Disable download button when a new file is selected
-            self.ids.download_button.disabled = True
-            self.current_output_file = None
+        self.select_files([file_path])
+    
+    def select_files(self, file_paths):
+        """Process the selected files; formats offered are those all of them support"""
+        missing = [path for path in file_paths if not os.path.exists(path)]
+        file_paths = [path for path in file_paths if os.path.exists(path)]
+        if missing:
+            self.ids.status_label.text = f"File not found: {missing[0]}"
+        if not file_paths:
+            return
+        
+        self.selected_files = file_paths
+        self.selected_file_path = file_paths[0]
+        if len(file_paths) == 1:
+            self.ids.selected_file_label.text = f'Selected: {os.path.basename(file_paths[0])}'
+        else:
+            self.ids.selected_file_label.text = f'Selected: {len(file_paths)} files'
+        
+        # Animate the label
+        anim = Animation(opacity=0, duration=0.1) + Animation(opacity=1, duration=0.1)
+        anim.start(self.ids.selected_file_label)
+        
+        # Get the output formats available for every selected file type
+        formats = get_available_formats(os.path.splitext(file_paths[0])[1].lower())
+        for path in file_paths[1:]:
+            allowed = get_available_formats(os.path.splitext(path)[1].lower())
+            formats = [fmt for fmt in formats if fmt in allowed]
+        
+        if formats:
+            self.ids.format_spinner.values = formats
+            self.ids.format_spinner.text = formats[0]
+            self.ids.convert_button.disabled = False
             
-            # Add to recent files
-            if hasattr(App.get_running_app().root, 'recent_files_screen'):
-                App.get_running_app().root.recent_files_screen.add_recent_file(file_path)
+            # Enable animation when enabling the button
+            anim = Animation(background_color=[0.2, 0.7, 0.3, 1], duration=0.3)
+            anim.start(self.ids.convert_button)
         else:
-            self.ids.status_label.text = f"File not found: {file_path}"
+            self.ids.format_spinner.values = ['Unsupported file type']
+            self.ids.format_spinner.text = 'Unsupported file type'
+            self.ids.convert_button.disabled = True
+            
+            # Animate the button to red to indicate disabled state
+            anim = Animation(background_color=[0.7, 0.2, 0.2, 1], duration=0.3)
+            anim.start(self.ids.convert_button)
+        
+        # Add to recent files
+        if hasattr(App.get_running_app().root, 'recent_files_screen'):
+            for path in file_paths:
+                App.get_running_app().root.recent_files_screen.add_recent_file(path)
     
     def on_convert_pressed(self):
-        # Start conversion process
-        if not self.selected_file_path:
+        # Queue conversion of the selected files
+        if not self.selected_files:
             self.ids.status_label.text = 'Please select a file first'
             
             # Shake animation for status label
@@ -570,7 +672,6 @@ class FileConverterScreen(Screen):
             shake.start(self.ids.status_label)
             return
         
-        source_file = self.selected_file_path
         target_format = self.ids.format_spinner.text
         
         if target_format == 'Select format' or target_format == 'Unsupported file type':
@@ -584,80 +685,232 @@ class FileConverterScreen(Screen):
             shake.start(self.ids.format_spinner)
             return
         
-        # Start conversion in a separate thread
-        self.ids.convert_button.disabled = True
-        self.ids.download_button.disabled = True
-        self.ids.status_label.text = 'Converting...'
-        self.ids.progress_bar.value = 0
+        priority = JOB_PRIORITIES.get(self.ids.priority_spinner.text, PRIORITY_NORMAL)
+        conversion_queue = self._get_conversion_queue()
         
-        # Animate the progress bar
-        anim = Animation(opacity=1, duration=0.3)
-        anim.start(self.ids.progress_bar)
+        # Image encoder settings chosen on the settings screen
+        profile = DEFAULT_ENCODER_PROFILE
+        if hasattr(App.get_running_app().root, 'settings_screen'):
+            profile = App.get_running_app().root.settings_screen.encoder_profile
         
-        # Start conversion thread
-        conversion_thread = threading.Thread(
-            target=self.run_conversion,
-            args=(source_file, target_format)
-        )
-        conversion_thread.daemon = True
-        conversion_thread.start()
-    
-    def run_conversion(self, source_file, target_format):
-        """Run the conversion process in a background thread."""
-        try:
-            # Generate output filename
+        if not self.run_jobs:
+            # A new run starts; animate the overall progress bar
+            self.ids.progress_bar.value = 0
+            anim = Animation(opacity=1, duration=0.3)
+            anim.start(self.ids.progress_bar)
+        
+        # Queue one job per selected file; the queue limits how many run at once
+        for source_file in self.selected_files:
             base_name = os.path.splitext(source_file)[0]
             output_file = f"{base_name}.{target_format}"
             
-            # Start conversion
-            success = convert_file(
-                source_file, 
-                output_file, 
-                progress_callback=self.update_progress
-            )
+            # Progress reaches the UI through a channel refreshed once per frame
+            channel = ProgressChannel(None)
+            job = conversion_queue.submit(source_file, output_file, priority=priority,
+                                          progress_callback=channel.tracker(), profile=profile)
+            channel.on_progress = lambda percent, snapshot, job=job: self._update_job_progress(job, percent, snapshot)
+            channel.open()
             
-            # Update UI on main thread
-            Clock.schedule_once(lambda dt: self.conversion_completed(success, output_file), 0)
-        except Exception as e:
-            Clock.schedule_once(lambda dt: self.conversion_failed(str(e)), 0)
+            self.run_jobs.append(job)
+            self._add_job_row(job, channel)
+        
+        count = len(self.selected_files)
+        self.ids.status_label.text = f"Queued {count} file{'s' if count != 1 else ''} for conversion"
     
-    def update_progress(self, percent):
-        """Update progress bar (called from the conversion thread)."""
-        Clock.schedule_once(lambda dt: setattr(self.ids.progress_bar, 'value', percent), 0)
+    def _get_conversion_queue(self):
+        """Create the conversion queue on first use."""
+        if self.conversion_queue is None:
+            # Status changes arrive on worker threads; handle them on the UI thread
+            self.conversion_queue = ConversionQueue(
+                cache=App.get_running_app().conversion_cache,
+                on_change=lambda job: Clock.schedule_once(
+                    lambda dt, status=job.status: self._job_changed(job, status), 0))
+        return self.conversion_queue
     
-    def conversion_completed(self, success, output_file):
-        """Handle conversion completion."""
-        self.ids.convert_button.disabled = False
-        if success:
-            self.current_output_file = output_file
-            self.ids.status_label.text = f'Conversion complete: {os.path.basename(output_file)}'
-            self.ids.progress_bar.value = 100
+    def _add_job_row(self, job, channel):
+        """Add a row with status, progress and a cancel button for a queued job."""
+        row = BoxLayout(
+            orientation='vertical',
+            size_hint_y=None,
+            height=dp(56),
+            padding=[dp(5), dp(2)],
+            spacing=dp(2)
+        )
+        
+        info_layout = BoxLayout(
+            size_hint_y=None,
+            height=dp(28),
+            spacing=dp(5)
+        )
+        
+        name_label = Label(
+            text=os.path.basename(job.target_path),
+            size_hint_x=0.5,
+            halign='left',
+            valign='middle',
+            shorten=True,
+            shorten_from='right',
+            color=App.get_running_app().theme_text_color
+        )
+        name_label.bind(size=name_label.setter('text_size'))
+        
+        status_label = Label(
+            text=job.status,
+            size_hint_x=0.25,
+            font_size='12sp',
+            color=[0.5, 0.5, 0.5, 1]
+        )
+        
+        cancel_btn = Button(
+            text='Cancel',
+            size_hint_x=0.25
+        )
+        cancel_btn.bind(on_press=lambda btn: self.cancel_job(job))
+        
+        info_layout.add_widget(name_label)
+        info_layout.add_widget(status_label)
+        info_layout.add_widget(cancel_btn)
+        row.add_widget(info_layout)
+        
+        progress = ProgressBar(
+            max=100,
+            value=0,
+            size_hint_y=None,
+            height=dp(20)
+        )
+        row.add_widget(progress)
+        
+        self.ids.job_list.add_widget(row)
+        self.job_rows[job.id] = {
+            'job': job,
+            'row': row,
+            'status': status_label,
+            'progress': progress,
+            'cancel': cancel_btn,
+            'channel': channel,
+            'percent': 0,
+        }
+    
+    def cancel_job(self, job):
+        """Cancel a queued job or stop a running one."""
+        if not self.conversion_queue.cancel(job):
+            self.ids.status_label.text = f'{os.path.basename(job.source_path)} is already {job.status}'
+    
+    def clear_finished_jobs(self):
+        """Remove the rows of finished jobs from the job list."""
+        for job_id, row in list(self.job_rows.items()):
+            if row['job'].finished:
+                self.ids.job_list.remove_widget(row['row'])
+                del self.job_rows[job_id]
+    
+    def _update_job_progress(self, job, percent, snapshot=None):
+        """Update a job's row and the overall progress (called by its progress channel on the UI thread)."""
+        row = self.job_rows.get(job.id)
+        if row is not None:
+            row['percent'] = percent
+            row['progress'].value = percent
+        self._update_overall_progress()
+        if snapshot and snapshot['phase'] and job.status == RUNNING:
+            status = self._progress_status(snapshot)
+            if len(self.run_jobs) > 1:
+                status = f'{os.path.basename(job.source_path)} - {status}'
+            self.ids.status_label.text = status
+    
+    def _update_overall_progress(self):
+        """Show the average progress of the current run's jobs on the main progress bar."""
+        percents = []
+        for job in self.run_jobs:
+            if job.status == CANCELLED:
+                continue
+            row = self.job_rows.get(job.id)
+            percents.append(100 if job.finished else (row['percent'] if row else 0))
+        if percents:
+            self.ids.progress_bar.value = sum(percents) / len(percents)
+    
+    def _progress_status(self, snapshot):
+        """Describe the current phase of a conversion, e.g. 'Converting: render 3/10 pages, 4s left'."""
+        status = f"Converting: {snapshot['phase']}"
+        if snapshot['total'] and snapshot['unit'] != 'bytes':
+            status += f" {snapshot['done']}/{snapshot['total']} {snapshot['unit']}"
+        if snapshot['eta'] is not None:
+            status += f", {int(snapshot['eta']) + 1}s left"
+        return status
+    
+    def _job_changed(self, job, status):
+        """Reflect a job status change in the UI (called on the UI thread)."""
+        row = self.job_rows.get(job.id)
+        if row is not None:
+            row['status'].text = status
+            row['cancel'].disabled = status not in (QUEUED, RUNNING)
+            if status in (DONE, FAILED, CANCELLED):
+                row['channel'].close()
+            if status == DONE:
+                row['progress'].value = 100
+        
+        if status == RUNNING:
+            self.ids.status_label.text = f'Converting {os.path.basename(job.source_path)}...'
+        elif status == DONE:
+            self.current_output_file = job.target_path
             self.ids.download_button.disabled = False
             
             # Enable animation for download button
             anim = Animation(background_color=[0.2, 0.3, 0.8, 1], duration=0.3)
             anim.start(self.ids.download_button)
             
+            # Add to recent files with output
+            if hasattr(App.get_running_app().root, 'recent_files_screen'):
+                App.get_running_app().root.recent_files_screen.add_recent_file(job.source_path, job.target_path)
+        
+        if status in (DONE, FAILED, CANCELLED):
+            self._update_overall_progress()
+            if self.conversion_queue.pending() == 0:
+                self._run_finished()
+    
+    def _run_finished(self):
+        """Report the outcome once every job of the current run is finished."""
+        jobs, self.run_jobs = self.run_jobs, []
+        if not jobs:
+            return
+        
+        if len(jobs) == 1:
+            job = jobs[0]
+            if job.status == CANCELLED:
+                self.ids.status_label.text = 'Conversion cancelled'
+            elif job.error:
+                self.conversion_failed(job.error)
+            else:
+                self.conversion_completed(job.status == DONE, job.target_path)
+            return
+        
+        done = [job for job in jobs if job.status == DONE]
+        failed = [job for job in jobs if job.status == FAILED]
+        self.ids.status_label.text = f'Converted {len(done)} of {len(jobs)} files'
+        self.ids.progress_bar.value = 100
+        if failed:
+            names = '\n'.join(os.path.basename(job.source_path) for job in failed[:5])
+            popup = ErrorPopup(error_text=f"{len(failed)} of {len(jobs)} conversions failed:\n{names}")
+            popup.open()
+        elif done:
+            result_text = f"Successfully converted {len(done)} files"
+            popup = SuccessPopup(result_text=result_text, converted_file=done[-1].target_path)
+            popup.open()
+    
+    def conversion_completed(self, success, output_file):
+        """Handle completion of a single conversion."""
+        if success:
+            self.ids.status_label.text = f'Conversion complete: {os.path.basename(output_file)}'
+            self.ids.progress_bar.value = 100
+            
             # Show success popup
             result_text = f"Successfully converted to:\n{os.path.basename(output_file)}"
             popup = SuccessPopup(result_text=result_text, converted_file=output_file)
             popup.open()
-            
-            # Add to recent files with output
-            if hasattr(App.get_running_app().root, 'recent_files_screen'):
-                source_file = self.selected_file_path
-                App.get_running_app().root.recent_files_screen.add_recent_file(source_file, output_file)
         else:
             self.ids.status_label.text = 'Conversion failed'
-            self.ids.download_button.disabled = True
-            self.current_output_file = None
     
     def conversion_failed(self, error_message):
         """Handle conversion failure."""
-        self.ids.convert_button.disabled = False
         self.ids.status_label.text = f'Error: {error_message}'
-        self.ids.download_button.disabled = True
-        self.current_output_file = None
         
         # Show error popup
         popup = ErrorPopup(error_text=f"Conversion failed: {error_message}")
@@ -735,11 +988,18 @@ class FileConverterApp(App):
     theme_text_color = ColorProperty([0.1, 0.1, 0.1, 1])
     theme_accent_color = ColorProperty([0.2, 0.7, 0.3, 1])
     is_dark_mode = BooleanProperty(False)
+    conversion_cache = None
     
     def build(self):
         self.title = 'Universal File Converter'
         self.icon = 'data/icon.png'
         
+        # Cache conversion results so "Open again" on an unchanged file is instant
+        try:
+            self.conversion_cache = ConversionCache(os.path.join(self.user_data_dir, 'conversion_cache'))
+        except Exception as e:
+            print(f"Conversion cache disabled: {e}")
+        
         # Create screen manager
         sm = ScreenManager()
         
@@ -750,6 +1010,7 @@ class FileConverterApp(App):
         # Add settings screen
         settings_screen = SettingsScreen(name='settings')
         sm.add_widget(settings_screen)
+        sm.settings_screen = settings_screen
         
         # Add recent files screen
         recent_files_screen = RecentFilesScreen(name='recent')
@@ -812,6 +1073,12 @@ class FileConverterApp(App):
             print(f"Error updating nav buttons: {e}")
             pass
     
+    def on_stop(self):
+        # Drop conversions that have not started yet
+        converter_screen = self.root.get_screen('converter')
+        if converter_screen.conversion_queue is not None:
+            converter_screen.conversion_queue.shutdown()
+    
     def on_start(self):
         """Called when the application is started"""
         # Initialize navigation buttons
@@ -0,0 +1,87 @@
+import fitz
+import pytest
+from PIL import Image, ImageSequence
+
+import converters
+
+DURATIONS = [100, 200, 300, 400, 500]
+COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (0, 255, 255)]
+
+
+@pytest.fixture
+def gif(tmp_path):
+    """A five frame GIF with a different duration per frame, looping three times."""
+    path = tmp_path / 'anim.gif'
+    frames = []
+    for index, color in enumerate(COLORS):
+        frame = Image.new('RGB', (40, 30), color)
+        # A moving square, so frames differ in part of the image only
+        frame.paste((255, 255, 255), (index * 5, 5, index * 5 + 10, 15))
+        frames.append(frame)
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=DURATIONS, loop=3)
+    return path
+
+
+@pytest.fixture
+def transparent_gif(tmp_path):
+    """A three frame GIF whose frames are transparent outside a square."""
+    path = tmp_path / 'alpha.gif'
+    frames = []
+    for index, color in enumerate(COLORS[:3]):
+        frame = Image.new('RGBA', (40, 30), (0, 0, 0, 0))
+        frame.paste(color + (255,), (index * 10, 10, index * 10 + 10, 20))
+        frames.append(frame)
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=100, loop=0,
+                   disposal=2)
+    return path
+
+
+def _frames(path):
+    with Image.open(path) as image:
+        info = {'loop': image.info.get('loop')}
+        frames = [(frame.convert('RGBA'), frame.info.get('duration'))
+                  for frame in ImageSequence.Iterator(image)]
+    return info, frames
+
+
+def _close(a, b, tolerance=24):
+    return all(abs(x - y) <= tolerance for x, y in zip(a, b))
+
+
+@pytest.mark.parametrize('target_ext', ['gif', 'webp'])
+def test_animation_round_trip(tmp_path, gif, target_ext):
+    target = tmp_path / f'out.{target_ext}'
+    assert converters.convert_file(str(gif), str(target))
+    info, frames = _frames(target)
+    assert info['loop'] == 3
+    assert [duration for _, duration in frames] == DURATIONS
+    for index, ((frame, _), color) in enumerate(zip(frames, COLORS)):
+        assert frame.size == (40, 30)
+        assert _close(frame.getpixel((35, 25)), color + (255,))
+        assert _close(frame.getpixel((index * 5 + 5, 10)), (255, 255, 255, 255))
+
+
+def test_animation_to_pdf(tmp_path, gif):
+    target = tmp_path / 'out.pdf'
+    assert converters.convert_file(str(gif), str(target))
+    with fitz.open(target) as document:
+        assert len(document) == len(COLORS)
+        for page, color in zip(document, COLORS):
+            pixmap = page.get_pixmap()
+            corner = pixmap.pixel(pixmap.width - 2, pixmap.height - 2)
+            assert _close(corner, color)
+
+
+@pytest.mark.parametrize('target_ext', ['gif', 'webp'])
+def test_transparent_animation(tmp_path, transparent_gif, target_ext):
+    target = tmp_path / f'out.{target_ext}'
+    assert converters.convert_file(str(transparent_gif), str(target))
+    _, frames = _frames(target)
+    assert len(frames) == 3
+    for index, ((frame, _), color) in enumerate(zip(frames, COLORS)):
+        assert frame.getpixel((index * 10 + 5, 15))[3] == 255
+        assert _close(frame.getpixel((index * 10 + 5, 15))[:3], color)
+        # Outside the square, including where earlier frames drew, is transparent
+        assert frame.getpixel((39, 0))[3] == 0
+        if index:
+            assert frame.getpixel(((index - 1) * 10 + 5, 15))[3] == 0
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+import converters
+
+
+def _touch(path, text='id\n1\n'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+
+
+def test_collect_jobs_keeps_subdirectories(tmp_path):
+    _touch(tmp_path / 'src' / 'x.csv')
+    _touch(tmp_path / 'src' / 'sub' / 'x.csv')
+    out = tmp_path / 'out'
+    jobs = converters.collect_jobs([str(tmp_path / 'src')], 'json', output_dir=str(out),
+                                   recursive=True)
+    assert sorted(target for _, target in jobs) == [
+        os.path.join(str(out), 'sub', 'x.json'), os.path.join(str(out), 'x.json')]
+
+
+def test_collect_jobs_rejects_clashing_targets(tmp_path):
+    _touch(tmp_path / 'a' / 'x.csv')
+    _touch(tmp_path / 'b' / 'x.csv')
+    with pytest.raises(ValueError) as error:
+        converters.collect_jobs([str(tmp_path / 'a'), str(tmp_path / 'b')], 'json',
+                                output_dir=str(tmp_path / 'out'), recursive=True)
+    assert os.path.join('a', 'x.csv') in str(error.value)
+    assert os.path.join('b', 'x.csv') in str(error.value)
+
+
+def test_convert_batch_rejects_clashing_targets(tmp_path):
+    _touch(tmp_path / 'x.csv')
+    _touch(tmp_path / 'y.csv')
+    target = str(tmp_path / 'out.json')
+    with pytest.raises(ValueError):
+        converters.convert_batch([(str(tmp_path / 'x.csv'), target),
+                                  {'source': str(tmp_path / 'y.csv'), 'target': target}])
+    assert not os.path.exists(target)
@@ -0,0 +1,54 @@
+import os
+
+import converters
+from conversion_progress import CancellationToken
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('id,name\n')
+        for i in range(rows):
+            f.write(f'{i},row{i}\n')
+
+
+def test_cancel_keeps_other_jobs_outputs(tmp_path):
+    source = tmp_path / 'big.csv'
+    _write_csv(source, 50)
+    out_dir = tmp_path / 'race'
+    out_dir.mkdir()
+    target = out_dir / 'report.json'
+    # Outputs of another job that share the target's name as a prefix
+    other = out_dir / 'report_2023.json'
+    other_temp = out_dir / '.report_2023.0123abcd.tmp.json'
+    token = CancellationToken()
+
+    def progress(value):
+        # The other job finishes while this one runs, then this one is cancelled
+        if not other.exists():
+            other.write_text('[{"id": 1}]', encoding='utf-8')
+            other_temp.write_text('[', encoding='utf-8')
+            token.cancel()
+
+    assert not converters.convert_file(str(source), str(target), progress, cancel_token=token,
+                                       chunksize=5)
+    assert not target.exists()
+    assert other.read_text(encoding='utf-8') == '[{"id": 1}]'
+    assert other_temp.exists()
+    assert not [name for name in os.listdir(out_dir) if name.startswith('.report.')]
+
+
+def test_cancel_removes_own_outputs(tmp_path):
+    source = tmp_path / 'big.csv'
+    _write_csv(source, 200000)
+    target = tmp_path / 'report.json'
+    token = CancellationToken()
+
+    def progress(value):
+        # Cancel once the output is being written
+        if any(name.startswith('.report.') for name in os.listdir(tmp_path)):
+            token.cancel()
+
+    assert not converters.convert_file(str(source), str(target), progress, cancel_token=token,
+                                       chunksize=1000)
+    assert token.cancelled
+    assert os.listdir(tmp_path) == ['big.csv']
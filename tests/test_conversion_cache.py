@@ -0,0 +1,33 @@
+from conversion_cache import ConversionCache
+
+import converters
+
+
+def test_editing_output_does_not_change_cache(tmp_path):
+    source = tmp_path / 'data.csv'
+    source.write_text('id,name\n1,a\n2,b\n', encoding='utf-8')
+    cache = ConversionCache(str(tmp_path / 'cache'))
+    first = tmp_path / 'first.json'
+    assert converters.convert_file(str(source), str(first), cache=cache)
+    expected = first.read_bytes()
+
+    # A same-size edit made in place, as an editor saving over the file would
+    with open(first, 'r+b') as f:
+        f.write(b'X')
+
+    second = tmp_path / 'second.json'
+    assert converters.convert_file(str(source), str(second), cache=cache)
+    assert second.read_bytes() == expected
+
+
+def test_default_profile_shares_cache_entry(tmp_path):
+    source = tmp_path / 'data.csv'
+    source.write_text('id\n1\n', encoding='utf-8')
+    cache = ConversionCache(str(tmp_path / 'cache'))
+    with_profile = cache.make_key(str(source), 'out.json',
+                                  converters._cache_key_options({'profile': 'balanced'}))
+    without = cache.make_key(str(source), 'out.json', converters._cache_key_options({}))
+    assert with_profile == without
+    smallest = cache.make_key(str(source), 'out.json',
+                              converters._cache_key_options({'profile': 'smallest'}))
+    assert smallest != without
@@ -0,0 +1,43 @@
+import fitz
+import pytest
+from PIL import Image
+
+import converters
+
+
+def _close(a, b, tolerance=40):
+    return all(abs(x - y) <= tolerance for x, y in zip(a, b))
+
+
+@pytest.mark.parametrize('mode, color', [('RGB', (200, 40, 40)), ('CMYK', (0, 255, 255, 0))])
+def test_jpeg_embedded(tmp_path, mode, color):
+    source = tmp_path / 'image.jpg'
+    Image.new(mode, (300, 200), color).save(source, dpi=(150, 150))
+    target = tmp_path / 'out.pdf'
+    assert converters.convert_file(str(source), str(target))
+    with fitz.open(target) as document:
+        assert len(document) == 1
+        page = document[0]
+        assert (page.rect.width, page.rect.height) == (144, 96)
+        (xref, *_), = page.get_images(full=True)
+        assert document.xref_stream_raw(xref) == source.read_bytes()
+        # Adobe CMYK JPEGs store inverted values; they must not render inverted
+        expected = Image.new(mode, (1, 1), color).convert('RGB').getpixel((0, 0))
+        pixmap = page.get_pixmap(dpi=72)
+        assert _close(pixmap.pixel(72, 48), expected)
+
+
+@pytest.mark.parametrize('size', [(300, 200), (300, 201), (201, 300)])
+def test_page_size_kept_when_scaled_down(tmp_path, size):
+    source = tmp_path / 'image.jpg'
+    Image.new('RGB', size, (200, 40, 40)).save(source, dpi=(100, 100))
+    target = tmp_path / 'out.pdf'
+    assert converters.convert_file(str(source), str(target), max_size=200)
+    with fitz.open(target) as document:
+        page = document[0]
+        (xref, *_), = page.get_images(full=True)
+        # The image was re-encoded at the smaller size, the page is not
+        assert max(document.extract_image(xref)['width'],
+                   document.extract_image(xref)['height']) == 200
+        assert (page.rect.width, page.rect.height) == pytest.approx(
+            (size[0] * 0.72, size[1] * 0.72), abs=0.01)
@@ -0,0 +1,32 @@
+import pytest
+from PIL import Image
+
+import converters
+
+
+@pytest.fixture
+def png(tmp_path):
+    path = tmp_path / 'image.png'
+    Image.new('RGB', (400, 200), 'red').save(path)
+    return path
+
+
+@pytest.mark.parametrize('resize, size', [('100x30', (100, 30)), ('100x', (100, 50)),
+                                          ('x50', (100, 50)), ('100', (100, 50)),
+                                          ((100, None), (100, 50))])
+def test_resize(tmp_path, png, resize, size):
+    target = tmp_path / 'out.jpg'
+    assert converters.convert_file(str(png), str(target), resize=resize)
+    with Image.open(target) as image:
+        assert image.size == size
+
+
+@pytest.mark.parametrize('resize', ['0x100', '-5x', '100x200x3', 'x', 'abc', (0, 10)])
+def test_invalid_resize(resize):
+    with pytest.raises(ValueError, match='Invalid resize'):
+        converters._output_size((400, 200), {'resize': resize})
+
+
+def test_invalid_max_size():
+    with pytest.raises(ValueError, match='max_size'):
+        converters._output_size((400, 200), {'max_size': 0})
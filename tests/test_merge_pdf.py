@@ -0,0 +1,72 @@
+import fitz
+import pytest
+from PIL import Image
+
+import converters
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """A 200 dpi JPEG, a PNG without a DPI and a half transparent RGBA PNG."""
+    jpeg = tmp_path / 'a.jpg'
+    Image.new('RGB', (300, 200), (200, 40, 40)).save(jpeg, dpi=(200, 200))
+    png = tmp_path / 'b.png'
+    Image.new('RGB', (100, 50), (40, 200, 40)).save(png)
+    rgba = tmp_path / 'c.png'
+    image = Image.new('RGBA', (60, 60), (40, 40, 200, 255))
+    image.paste((40, 40, 200, 0), (0, 0, 30, 60))
+    image.save(rgba)
+    return [str(jpeg), str(png), str(rgba)]
+
+
+def _page_image(page):
+    (xref, smask, *_), = page.get_images(full=True)
+    return xref, smask
+
+
+def test_merge_page_count_and_sizes(tmp_path, sources):
+    target = tmp_path / 'merged.pdf'
+    assert converters.merge_images_to_pdf(sources, str(target))
+    with fitz.open(target) as document:
+        assert len(document) == 3
+        sizes = [(round(page.rect.width, 1), round(page.rect.height, 1)) for page in document]
+        # 300x200 at 200 dpi; images without a DPI are placed at 100
+        assert sizes == [(108.0, 72.0), (72.0, 36.0), (43.2, 43.2)]
+
+
+def test_merge_embeds_jpeg_unchanged(tmp_path, sources):
+    target = tmp_path / 'merged.pdf'
+    assert converters.merge_images_to_pdf(sources, str(target))
+    with fitz.open(target) as document:
+        xref, smask = _page_image(document[0])
+        assert smask == 0
+        assert document.xref_get_key(xref, 'Filter') == ('name', '/DCTDecode')
+        assert document.xref_stream_raw(xref) == open(sources[0], 'rb').read()
+        xref, _ = _page_image(document[1])
+        assert document.xref_get_key(xref, 'Filter') == ('name', '/FlateDecode')
+
+
+def test_merge_keeps_alpha_as_soft_mask(tmp_path, sources):
+    target = tmp_path / 'merged.pdf'
+    assert converters.merge_images_to_pdf(sources, str(target))
+    with fitz.open(target) as document:
+        _, smask = _page_image(document[1])
+        assert smask == 0
+        _, smask = _page_image(document[2])
+        assert smask
+        mask = fitz.Pixmap(document, smask)
+        assert (mask.width, mask.height) == (60, 60)
+        assert mask.pixel(10, 30) == (0,)
+        assert mask.pixel(50, 30) == (255,)
+        # Transparent half shows the white page, the opaque half the image
+        pixmap = document[2].get_pixmap(dpi=100)
+        assert pixmap.pixel(10, 30) == (255, 255, 255)
+        assert pixmap.pixel(50, 30) == (40, 40, 200)
+
+
+def test_merge_resolution_option(tmp_path, sources):
+    target = tmp_path / 'merged.pdf'
+    assert converters.merge_images_to_pdf(sources, str(target), resolution=72)
+    with fitz.open(target) as document:
+        sizes = [(round(page.rect.width), round(page.rect.height)) for page in document]
+        assert sizes == [(300, 200), (100, 50), (60, 60)]
@@ -0,0 +1,140 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+import pytest
+
+import converters
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    """Split documents into 3 page shards, extracted on a pool from 4 pages on."""
+    monkeypatch.setattr(converters, 'PDF_TEXT_SHARD_PAGES', 3)
+    monkeypatch.setattr(converters, 'PDF_TEXT_PARALLEL_MIN_PAGES', 4)
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    """Count the process pools the converters start."""
+    started = []
+
+    class CountingPool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            started.append(kwargs.get('max_workers'))
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(converters, 'ProcessPoolExecutor', CountingPool)
+    return started
+
+
+def _make_pdf(path, texts):
+    document = fitz.open()
+    for text in texts:
+        page = document.new_page(width=300, height=200)
+        if text:
+            page.insert_text((20, 50), text)
+    document.save(path)
+    document.close()
+    return path
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    return _make_pdf(tmp_path / 'doc.pdf', [f'This is page number {number}' for number in range(1, 11)])
+
+
+@pytest.mark.parametrize('target_ext', ['txt', 'jsonl'])
+def test_pool_matches_in_process(tmp_path, monkeypatch, small_shards, pools, pdf, target_ext):
+    outputs = []
+    for workers in (1, 2):
+        monkeypatch.setattr(converters, '_pool_workers', workers)
+        target = tmp_path / f'out{workers}.{target_ext}'
+        assert converters.convert_file(str(pdf), str(target))
+        outputs.append(target.read_text(encoding='utf-8'))
+    assert pools == [2]
+    assert outputs[0] == outputs[1]
+    # Every page is there once, in order, across the four shards
+    positions = [outputs[0].index(f'page number {number}') for number in range(1, 11)]
+    assert positions == sorted(positions)
+
+
+def test_only_sparse_pages_retried(tmp_path, monkeypatch, small_shards):
+    import pdfminer.high_level
+    from pdfminer.layout import LTTextContainer
+
+    class Text(LTTextContainer):
+        def __init__(self, text):
+            super().__init__()
+            self.text = text
+
+        def get_text(self):
+            return self.text
+
+    requested = []
+
+    def extract_pages(path, page_numbers=None):
+        requested.append(list(page_numbers))
+        for index in page_numbers:
+            yield [Text(f'Retried page {index + 1}')]
+
+    monkeypatch.setattr(pdfminer.high_level, 'extract_pages', extract_pages)
+    monkeypatch.setattr(converters, '_pool_workers', 1)
+    # Blank pages in the first, second (twice) and third of four shards
+    blank = {2, 4, 5, 9}
+    texts = ['' if number in blank else f'This is page number {number}' for number in range(1, 11)]
+    pdf = _make_pdf(tmp_path / 'mixed.pdf', texts)
+    target = tmp_path / 'out.txt'
+    assert converters.convert_file(str(pdf), str(target))
+
+    assert requested == [[1], [3, 4], [8]]
+    pages = target.read_text(encoding='utf-8').split(converters.PAGE_BREAK)[:-1]
+    assert len(pages) == 10
+    for number, text in enumerate(pages, 1):
+        if number in blank:
+            assert text == f'Retried page {number}'
+        else:
+            assert text.strip() == f'This is page number {number}'
+
+
+@pytest.fixture
+def pdf_with_image(tmp_path):
+    """Three pages of text; the second also shows an image."""
+    path = _make_pdf(tmp_path / 'image.pdf', [f'This is page number {number}' for number in range(1, 4)])
+    document = fitz.open(path)
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 20, 20), False)
+    pixmap.set_rect(pixmap.irect, (200, 40, 40))
+    document[1].insert_image(fitz.Rect(100, 100, 200, 180), pixmap=pixmap)
+    document.saveIncr()
+    document.close()
+    return path
+
+
+def _records(tmp_path, pdf, **options):
+    target = tmp_path / 'out.jsonl'
+    assert converters.convert_file(str(pdf), str(target), **options)
+    return [json.loads(line) for line in target.read_text(encoding='utf-8').splitlines()]
+
+
+@pytest.mark.parametrize('detail', ['blocks', 'spans'])
+def test_jsonl_records(tmp_path, pdf_with_image, detail):
+    records = _records(tmp_path, pdf_with_image, text_detail=detail)
+    assert [record['page'] for record in records] == [1, 2, 3]
+    for record in records:
+        assert (record['width'], record['height']) == (300, 200)
+        # The image on page 2 is left out; only the text block remains
+        block, = record['blocks']
+        assert block['text'].strip() == f"This is page number {record['page']}"
+        assert len(block['bbox']) == 4
+        if detail == 'blocks':
+            assert set(block) == {'bbox', 'text'}
+        else:
+            assert set(block) == {'bbox', 'text', 'lines'}
+            span, = block['lines'][0]['spans']
+            assert set(span) == {'text', 'bbox', 'font', 'size', 'flags', 'color'}
+            assert span['size'] == 11
+
+
+def test_jsonl_invalid_detail(tmp_path, pdf):
+    assert not converters.convert_file(str(pdf), str(tmp_path / 'out.jsonl'), text_detail='words')
+    assert not (tmp_path / 'out.jsonl').exists()
@@ -0,0 +1,36 @@
+import importlib.util
+import io
+
+import fitz
+import pytest
+from PIL import Image
+
+import converters
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / 'doc.pdf'
+    document = fitz.open()
+    document.new_page(width=200, height=200).insert_text((20, 50), 'hello')
+    document.save(path)
+    return path
+
+
+def _quantization(quality):
+    """The quantization tables Pillow writes for a JPEG quality."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8)).save(buffer, 'JPEG', quality=quality)
+    return Image.open(buffer).quantization
+
+
+@pytest.mark.skipif(importlib.util.find_spec('pdf2image') is not None,
+                    reason="pages are rendered with pdf2image")
+@pytest.mark.parametrize('profile, quality', [(None, converters.PYMUPDF_JPEG_QUALITY),
+                                              ('balanced', converters.PYMUPDF_JPEG_QUALITY),
+                                              ('fast', 75)])
+def test_pymupdf_jpeg_quality(tmp_path, pdf, profile, quality):
+    options = {'profile': profile} if profile else {}
+    assert converters.convert_file(str(pdf), str(tmp_path / 'page.jpg'), **options)
+    with Image.open(tmp_path / 'page_page1.jpg') as page:
+        assert page.quantization == _quantization(quality)
@@ -0,0 +1,31 @@
+import json
+
+import pandas as pd
+import pytest
+
+import converters
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / 'wb.xlsx'
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'x': [1]}).to_excel(writer, sheet_name='Q1 2024', index=False)
+        pd.DataFrame({'x': [2]}).to_excel(writer, sheet_name='Q1_2024', index=False)
+        pd.DataFrame({'x': [3]}).to_excel(writer, sheet_name='Notes', index=False)
+    return path
+
+
+def test_all_sheets_get_distinct_files(tmp_path, workbook):
+    assert converters.convert_file(str(workbook), str(tmp_path / 'wb.csv'), sheets='all')
+    assert pd.read_csv(tmp_path / 'wb_Q1_2024_1.csv')['x'].tolist() == [1]
+    assert pd.read_csv(tmp_path / 'wb_Q1_2024_2.csv')['x'].tolist() == [2]
+    assert pd.read_csv(tmp_path / 'wb_Notes.csv')['x'].tolist() == [3]
+    assert not (tmp_path / 'wb_Q1_2024.csv').exists()
+
+
+def test_all_sheets_to_json(tmp_path, workbook):
+    target = tmp_path / 'wb.json'
+    assert converters.convert_file(str(workbook), str(target), sheets='all')
+    assert json.loads(target.read_text(encoding='utf-8')) == {
+        'Q1 2024': [{'x': 1}], 'Q1_2024': [{'x': 2}], 'Notes': [{'x': 3}]}
@@ -0,0 +1,98 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import pytest
+
+import converters
+
+TEXT_FORMATS = ['csv', 'json', 'xml', 'html']
+
+
+def _in_memory(df, target_format, path):
+    """Write df the way the whole-file (non-streaming) path does."""
+    assert converters._write_dataframe(df, target_format, str(path), {})
+    return path.read_bytes()
+
+
+@pytest.fixture
+def arrow_table():
+    # Nulls only in the second batch of three rows
+    return pa.table({'n': pa.array([1, 2, 3, 4, None, 6], pa.int64()),
+                     'flag': pa.array([True, False, True, None, False, True]),
+                     'name': ['a', 'b', 'c', 'd', 'e', 'f']})
+
+
+@pytest.mark.parametrize('target_format', TEXT_FORMATS)
+@pytest.mark.parametrize('source_ext, statistics', [('.parquet', True), ('.parquet', False),
+                                                    ('.feather', None)])
+def test_arrow_batches_match_whole_file(tmp_path, monkeypatch, arrow_table, source_ext,
+                                        statistics, target_format):
+    monkeypatch.setattr(converters, 'ARROW_BATCH_ROWS', 3)
+    source = tmp_path / f'table{source_ext}'
+    if source_ext == '.parquet':
+        # Without statistics the null counts come from a scan of the file
+        pq.write_table(arrow_table, source, row_group_size=3, write_statistics=statistics)
+        whole = pd.read_parquet(source)
+    else:
+        feather.write_feather(arrow_table, source, chunksize=3)
+        whole = pd.read_feather(source)
+
+    target = tmp_path / f'streamed.{target_format}'
+    assert converters.convert_file(str(source), str(target))
+    assert target.read_bytes() == _in_memory(whole, target_format,
+                                             tmp_path / f'memory.{target_format}')
+
+
+# Columns whose chunks are typed differently: booleans with gaps in one
+# chunk or a whole blank chunk, integers and text with a blank chunk, and
+# a column that turns from numbers to text
+MIXED_CSV = '''flag,gap,count,label,price,code
+True,True,1,x,1.5,1
+False,False,2,y,2.25,2
+True,True,3,z,3.0,3
+,,,,,
+False,,5,,4.125,A7
+True,,6,,5.5,B8
+'''
+
+
+@pytest.mark.parametrize('target_format', TEXT_FORMATS)
+@pytest.mark.parametrize('read_engine', ['pyarrow', 'c'])
+def test_csv_stream_matches_in_memory(tmp_path, target_format, read_engine):
+    source = tmp_path / 'mixed.csv'
+    source.write_text(MIXED_CSV, encoding='utf-8')
+    streamed = tmp_path / f'streamed.{target_format}'
+    in_memory = tmp_path / f'memory.{target_format}'
+    assert converters.convert_file(str(source), str(streamed), chunksize=3,
+                                   read_engine=read_engine)
+    assert converters.convert_file(str(source), str(in_memory), read_engine=read_engine)
+    assert streamed.read_bytes() == in_memory.read_bytes()
+
+
+# Every later chunk fits the column types of the first one, so no scan is needed
+CONSISTENT_CSV = '''flag,count,label,price
+True,1,x,1.5
+,,,
+False,3,7,2
+True,4,y,3.25
+False,5,z,4
+'''
+
+
+@pytest.mark.parametrize('target_format', ['csv', 'json', 'xml'])
+@pytest.mark.parametrize('read_engine', ['pyarrow', 'c'])
+def test_csv_stream_single_pass(tmp_path, monkeypatch, target_format, read_engine):
+    source = tmp_path / 'consistent.csv'
+    source.write_text(CONSISTENT_CSV, encoding='utf-8')
+    in_memory = tmp_path / f'memory.{target_format}'
+    assert converters.convert_file(str(source), str(in_memory), read_engine=read_engine)
+
+    def no_scan(*args, **kwargs):
+        raise AssertionError("the file was scanned")
+
+    monkeypatch.setattr(converters, '_scan_csv_chunks', no_scan)
+    streamed = tmp_path / f'streamed.{target_format}'
+    assert converters.convert_file(str(source), str(streamed), chunksize=3,
+                                   read_engine=read_engine)
+    assert streamed.read_bytes() == in_memory.read_bytes()